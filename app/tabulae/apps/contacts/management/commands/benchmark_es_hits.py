@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+# Stdlib imports
+import copy
+import datetime
+import random
+import time
+
+# Core Django imports
+from django.core.management.base import BaseCommand
+
+# Imports from app
+from tabulae.apps.general.elastic_search import normalize_hits
+
+
+def format_es_response(es_response):
+    # The per-hit formatter normalize_hits replaced, kept as the baseline
+    data = es_response['_source']['data']
+    if 'CreatedAt' in data:
+        if 'T' in data['CreatedAt']:
+            now = datetime.datetime.strptime(
+                data['CreatedAt'], '%Y-%m-%dT%H:%M:%S')
+        else:
+            now = datetime.datetime.strptime(data['CreatedAt'], '%Y-%m-%d')
+        data['CreatedAt'] = int(now.strftime('%s'))
+
+    for key in list(data):
+        data[key.lower()] = data.pop(key)
+
+    return es_response
+
+
+def _created_at(index):
+    created_at = datetime.datetime(2017, 1, 1) + datetime.timedelta(
+        minutes=index * 7)
+    return created_at.strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def _tweet_hit(index):
+    return {
+        '_id': str(index),
+        '_source': {
+            'data': {
+                'TweetId': index,
+                'Text': 'Tweet number %d' % index,
+                'Username': 'journalist%d' % (index % 50),
+                'Likes': random.randint(0, 500),
+                'Retweets': random.randint(0, 100),
+                'CreatedAt': _created_at(index),
+                'Type': 'Tweet',
+            }
+        }
+    }
+
+
+def _headline_hit(index):
+    return {
+        '_id': str(index),
+        '_source': {
+            'data': {
+                'Title': 'Headline number %d' % index,
+                'Url': 'https://example.com/%d' % index,
+                'FeedURL': 'https://example.com/feed/%d' % (index % 50),
+                'Summary': 'Summary of headline %d' % index,
+                'PublishDate': _created_at(index),
+                'CreatedAt': _created_at(index)[:10],
+                'Type': 'Headline',
+            }
+        }
+    }
+
+
+class Command(BaseCommand):
+    help = ('Times normalize_hits against the per-hit format_es_response '
+            'over synthetic tweet and headline hits.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hits', type=int, default=10000)
+        parser.add_argument('--rounds', type=int, default=5)
+
+    def handle(self, *args, **options):
+        count = options['hits']
+        hits = [_tweet_hit(index) if index % 2 else _headline_hit(index)
+                for index in xrange(count)]
+
+        expected = [format_es_response(hit)['_source']['data']
+                    for hit in copy.deepcopy(hits)]
+        if normalize_hits(hits) != expected:
+            self.stderr.write('normalize_hits output differs from '
+                              'format_es_response')
+            return
+
+        legacy = []
+        batch = []
+        for _ in xrange(options['rounds']):
+            # The old formatter mutates hits, so it gets a fresh copy
+            # every round; the copy isn't timed.
+            fresh_hits = copy.deepcopy(hits)
+            start = time.time()
+            for hit in fresh_hits:
+                format_es_response(hit)
+            legacy.append(time.time() - start)
+
+            start = time.time()
+            normalize_hits(hits)
+            batch.append(time.time() - start)
+
+        self.stdout.write('%d hits, best of %d rounds' % (
+            count, options['rounds']))
+        self.stdout.write('format_es_response: %.1f ms' % (
+            min(legacy) * 1000))
+        self.stdout.write('normalize_hits:     %.1f ms' % (
+            min(batch) * 1000))
@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.6 on 2017-11-06 18:12
+from __future__ import unicode_literals
+
+from django.conf import settings
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('contacts', '0007_auto_20171031_1633'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SocialMetricsRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('network', models.CharField(max_length=20)),
+                ('username', models.TextField()),
+                ('month', models.DateField()),
+                ('followers', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(null=True), blank=True, default=list, size=None)),
+                ('following', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(null=True), blank=True, default=list, size=None)),
+                ('likes', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(null=True), blank=True, default=list, size=None)),
+                ('retweets', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(null=True), blank=True, default=list, size=None)),
+                ('comments', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(null=True), blank=True, default=list, size=None)),
+                ('posts', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(null=True), blank=True, default=list, size=None)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='socialmetricsrollup',
+            unique_together=set([('network', 'username', 'month')]),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.6 on 2017-11-08 02:41
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('contacts', '0008_socialmetricsrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContactSocialFields',
+            fields=[
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('contact', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='social_fields', serialize=False, to='contacts.Contact')),
+                ('twitter_followers', models.BigIntegerField(db_index=True, null=True)),
+                ('twitter_following', models.BigIntegerField(db_index=True, null=True)),
+                ('twitter_likes', models.BigIntegerField(db_index=True, null=True)),
+                ('twitter_retweets', models.BigIntegerField(db_index=True, null=True)),
+                ('twitter_posts', models.BigIntegerField(db_index=True, null=True)),
+                ('instagram_followers', models.BigIntegerField(db_index=True, null=True)),
+                ('instagram_following', models.BigIntegerField(db_index=True, null=True)),
+                ('instagram_likes', models.BigIntegerField(db_index=True, null=True)),
+                ('instagram_comments', models.BigIntegerField(db_index=True, null=True)),
+                ('instagram_posts', models.BigIntegerField(db_index=True, null=True)),
+                ('latest_headline', models.TextField(blank=True, default='')),
+                ('latest_headline_published', models.DateTimeField(db_index=True, null=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'contact social fields',
+            },
+        ),
+    ]
@@ -69,3 +69,75 @@ class Contact(BaseModel):
 
     def enhance_contact(self):
         pass
+
+
+class SocialMetricsRollup(BaseModel):
+    '''
+        A month of daily social metrics for one username, one array per
+        metric indexed by day of the month (0 is the 1st). Days without a
+        document are null.
+    '''
+    network = models.CharField(max_length=20)
+    username = models.TextField()
+    month = models.DateField()
+
+    followers = ArrayField(models.BigIntegerField(
+        null=True), blank=True, default=list)
+    following = ArrayField(models.BigIntegerField(
+        null=True), blank=True, default=list)
+    likes = ArrayField(models.BigIntegerField(
+        null=True), blank=True, default=list)
+    retweets = ArrayField(models.BigIntegerField(
+        null=True), blank=True, default=list)
+    comments = ArrayField(models.BigIntegerField(
+        null=True), blank=True, default=list)
+    posts = ArrayField(models.BigIntegerField(
+        null=True), blank=True, default=list)
+
+    class Meta:
+        unique_together = ('network', 'username', 'month',)
+
+
+class SocialMetricsCoverage(BaseModel):
+    '''
+        The days the rollups of one username hold without a gap: every
+        day from `covered_from` to `covered_until` has been read from
+        Elasticsearch.
+    '''
+    network = models.CharField(max_length=20)
+    username = models.TextField()
+    covered_from = models.DateField()
+    covered_until = models.DateField()
+
+    class Meta:
+        unique_together = ('network', 'username',)
+
+
+class ContactSocialFields(BaseModel):
+    '''
+        The read-only list columns of a contact (latest follower counts,
+        latest headline...), computed nightly for contacts on active
+        lists so they can be returned and sorted on without
+        Elasticsearch.
+    '''
+    contact = models.OneToOneField(
+        Contact, primary_key=True, related_name='social_fields')
+
+    twitter_followers = models.BigIntegerField(null=True, db_index=True)
+    twitter_following = models.BigIntegerField(null=True, db_index=True)
+    twitter_likes = models.BigIntegerField(null=True, db_index=True)
+    twitter_retweets = models.BigIntegerField(null=True, db_index=True)
+    twitter_posts = models.BigIntegerField(null=True, db_index=True)
+
+    instagram_followers = models.BigIntegerField(null=True, db_index=True)
+    instagram_following = models.BigIntegerField(null=True, db_index=True)
+    instagram_likes = models.BigIntegerField(null=True, db_index=True)
+    instagram_comments = models.BigIntegerField(null=True, db_index=True)
+    instagram_posts = models.BigIntegerField(null=True, db_index=True)
+
+    latest_headline = models.TextField(blank=True, default='')
+    latest_headline_published = models.DateTimeField(
+        null=True, db_index=True)
+
+    class Meta:
+        verbose_name_plural = 'contact social fields'
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+# Stdlib imports
+import calendar
+import datetime
+import uuid
+
+# Core Django imports
+from django.core.cache import cache
+from django.db import transaction
+
+# Imports from app
+from tabulae.apps.general.timeseries import (
+    TIMESERIES_METRICS,
+    bucket_points,
+    documents_to_values,
+    get_bucketed_series,
+    get_daily_documents,
+)
+from .models import Contact, SocialMetricsCoverage, SocialMetricsRollup
+
+# Days re-read from Elasticsearch on every refresh, so documents that
+# land late still make it into the rollups
+ROLLUP_REFRESH_DAYS = 2
+# Days read for a username the rollups don't cover yet
+ROLLUP_BACKFILL_DAYS = 90
+# Usernames handled by one refresh task
+ROLLUP_BATCH_SIZE = 500
+# Rollups of a network that hasn't been refreshed for this long are
+# ignored and everything is read from Elasticsearch again
+ROLLUP_STALE_AFTER = 60 * 60 * 3
+
+
+def _refreshed_key(network):
+    return 'rollups:%s:refreshed' % network
+
+
+def _pending_key(network, run_id):
+    return 'rollups:%s:%s:pending' % (network, run_id)
+
+
+def mark_refreshed(network):
+    cache.set(_refreshed_key(network), datetime.datetime.utcnow(), None)
+
+
+def start_refresh(network, batches):
+    '''
+        Starts a refresh run of `batches` batches and returns its id. The
+        network is marked refreshed once every batch of the run is done
+        (see finish_batch); a run that doesn't finish in time is dropped.
+    '''
+    run_id = uuid.uuid4().hex
+    cache.set(_pending_key(network, run_id), batches, ROLLUP_STALE_AFTER)
+    return run_id
+
+
+def finish_batch(network, run_id, batch):
+    '''
+        Counts batch number `batch` of a refresh run as done, once however
+        often it runs. The last one marks the network refreshed. Returns
+        True when it did.
+    '''
+    # Tasks are acked late, so a batch may run twice
+    if not cache.add('%s:%s' % (_pending_key(network, run_id), batch),
+                     True, ROLLUP_STALE_AFTER):
+        return False
+
+    try:
+        pending = cache.decr(_pending_key(network, run_id))
+    except ValueError:
+        # The run expired, or already finished
+        return False
+
+    if pending > 0:
+        return False
+    cache.delete(_pending_key(network, run_id))
+    mark_refreshed(network)
+    return True
+
+
+def is_fresh(network):
+    refreshed = cache.get(_refreshed_key(network))
+    return refreshed is not None and (
+        datetime.datetime.utcnow() - refreshed).total_seconds() < (
+        ROLLUP_STALE_AFTER)
+
+
+def get_tracked_usernames(network):
+    '''
+        Returns every username on `network` a contact points at.
+    '''
+    return list(Contact.objects.filter(**{
+        'is_deleted': False,
+        network + '_invalid': False,
+    }).exclude(**{network: ''}).values_list(
+        network, flat=True).distinct().order_by(network))
+
+
+def get_refresh_days(network, usernames, days=ROLLUP_REFRESH_DAYS):
+    '''
+        Groups usernames by how many days a refresh has to read for them:
+        `days` when their rollups are up to date, enough to close the gap
+        since their last refresh otherwise, and ROLLUP_BACKFILL_DAYS for
+        usernames seen for the first time. Returns {days: [usernames]}.
+    '''
+    today = datetime.date.today()
+    covered_until = dict(SocialMetricsCoverage.objects.filter(
+        network=network).values_list('username', 'covered_until'))
+
+    groups = {}
+    for username in usernames:
+        until = covered_until.get(username)
+        if until is None:
+            needed = ROLLUP_BACKFILL_DAYS
+        else:
+            needed = min(ROLLUP_BACKFILL_DAYS, (today - until).days + 1)
+        groups.setdefault(max(days, needed), []).append(username)
+    return groups
+
+
+def write_coverage(network, usernames, days):
+    '''
+        Records that the last `days` days of `usernames` were just read.
+        Coverage that reaches back to the day before them grows; coverage
+        with a gap in between starts over.
+    '''
+    today = datetime.date.today()
+    start = today - datetime.timedelta(days=days - 1)
+
+    with transaction.atomic():
+        existing = dict((coverage.username, coverage)
+                        for coverage in SocialMetricsCoverage.objects.filter(
+            network=network, username__in=usernames).select_for_update())
+
+        created = []
+        for username in set(usernames):
+            coverage = existing.get(username)
+            if coverage is None:
+                created.append(SocialMetricsCoverage(
+                    network=network, username=username,
+                    covered_from=start, covered_until=today))
+                continue
+
+            if coverage.covered_until >= start - datetime.timedelta(days=1):
+                coverage.covered_from = min(coverage.covered_from, start)
+            else:
+                coverage.covered_from = start
+            coverage.covered_until = max(coverage.covered_until, today)
+            coverage.save()
+
+        SocialMetricsCoverage.objects.bulk_create(created)
+
+
+def _get_columns(network):
+    return [metric.lower() for metric in TIMESERIES_METRICS[network]]
+
+
+def write_rollups(network, documents):
+    '''
+        Writes daily Elasticsearch documents into the rollups of their
+        month, creating the rows that don't exist yet.
+    '''
+    columns = _get_columns(network)
+    months = {}
+    for username, days in documents_to_values(network, documents).items():
+        for date, day_values in days.items():
+            months.setdefault((username, date.replace(day=1)), {})[
+                date.day - 1] = day_values
+
+    if not months:
+        return 0
+
+    with transaction.atomic():
+        rollups = dict(((rollup.username, rollup.month), rollup)
+                       for rollup in SocialMetricsRollup.objects.filter(
+            network=network,
+            username__in=set(username for username, _ in months),
+            month__in=set(month for _, month in months),
+        ).select_for_update())
+
+        created = []
+        for (username, month), days in months.items():
+            rollup = rollups.get((username, month))
+            if rollup is None:
+                rollup = SocialMetricsRollup(
+                    network=network, username=username, month=month)
+
+            for offset, day_values in days.items():
+                for column, value in zip(columns, day_values):
+                    array = getattr(rollup, column)
+                    if len(array) <= offset:
+                        array.extend([None] * (offset + 1 - len(array)))
+                    array[offset] = value
+
+            if rollup.pk is None:
+                created.append(rollup)
+            else:
+                rollup.save(update_fields=columns + ['updated'])
+
+        SocialMetricsRollup.objects.bulk_create(created)
+    return len(months)
+
+
+def read_daily_values(network, usernames, days):
+    '''
+        Reads the last `days` days of every username from the rollups as
+        {username: {date: [values]}}. Only usernames whose coverage goes
+        back to the first of those days are included; when the rollups
+        are stale nothing is read.
+    '''
+    if not usernames or not is_fresh(network):
+        return {}
+
+    today = datetime.date.today()
+    start = today - datetime.timedelta(days=days - 1)
+    covered = list(SocialMetricsCoverage.objects.filter(
+        network=network, username__in=usernames,
+        covered_from__lte=start).values_list('username', flat=True))
+    if not covered:
+        return {}
+
+    rollups = SocialMetricsRollup.objects.filter(
+        network=network, username__in=covered,
+        month__gte=start.replace(day=1), month__lte=today,
+    ).values_list('username', 'month', *_get_columns(network))
+
+    values = dict((username, {}) for username in covered)
+    for rollup in rollups:
+        username, month, arrays = rollup[0], rollup[1], rollup[2:]
+        last_day = calendar.monthrange(month.year, month.month)[1]
+        first = max(start, month)
+        last = min(today, month.replace(day=last_day))
+
+        series = values[username]
+        for offset in xrange(first.day - 1, last.day):
+            day_values = [array[offset] if offset < len(array) else None
+                          for array in arrays]
+            if any(value is not None for value in day_values):
+                series[month + datetime.timedelta(days=offset)] = day_values
+    return values
+
+
+def _get_values(network, usernames, days):
+    values = read_daily_values(network, usernames, days)
+    missing = [username for username in usernames if username not in values]
+    if missing:
+        values.update(documents_to_values(
+            network, get_daily_documents(network, missing, days)))
+    return values
+
+
+def get_series(network, usernames, days, interval):
+    '''
+        The rollup backed version of get_bucketed_series.
+    '''
+    values = read_daily_values(network, usernames, days)
+    missing = [username for username in usernames if username not in values]
+
+    fallback = {}
+    if missing:
+        fallback = dict((series['username'], series)
+                        for series in get_bucketed_series(
+            network, missing, days, interval))
+
+    return [fallback[username] if username in fallback else {
+        'username': username,
+        'interval': interval,
+        'points': bucket_points(network, values[username], interval),
+    } for username in usernames]
+
+
+def get_summed_series(network, usernames, days, interval):
+    '''
+        Adds the daily metrics of every username up, day by day, and
+        buckets the totals by `interval`.
+    '''
+    totals = {}
+    for series in _get_values(network, usernames, days).values():
+        for date, day_values in series.items():
+            total = totals.setdefault(date, [None] * len(day_values))
+            for index, value in enumerate(day_values):
+                if value is not None:
+                    total[index] = (total[index] or 0) + value
+
+    return {
+        'username': None,
+        'interval': interval,
+        'points': bucket_points(network, totals, interval),
+    }
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 # Core Django imports
 from django.contrib.auth import get_user_model
+from django.db.models import Manager, QuerySet, prefetch_related_objects
 
 # Third-party app imports
 from taggit_serializer.serializers import (TagListSerializerField,
@@ -15,16 +16,27 @@ from rest_framework.serializers import (
     BooleanField,
     DateTimeField,
     IntegerField,
+    ListField,
 )
 
 # Imports from app
 from tabulae.apps.general.response import form_response
+from tabulae.apps.general.serializers import (
+    DynamicFieldsModelSerializer,
+    FragmentCacheListSerializer,
+)
+from tabulae.apps.emails.utils import (
+    LAST_CONTACTED_FIELDS,
+    get_last_contacted,
+)
 from tabulae.apps.publications.serializers import PublicationSerializer
 from tabulae.apps.publications.models import Publication
 from tabulae.apps.lists.models import MediaList
 from tabulae.apps.users.serializers import TeamSerializer
-from tabulae.apps.users.models import Client, Team, UserProfile
-from .models import Contact, CustomContactField
+from tabulae.apps.users.models import Client, Team
+from tabulae.apps.users.utils import get_tenant
+from .models import Contact, ContactSocialFields, CustomContactField
+from .social import represent_social_fields
 
 
 class CustomContactFieldSerializer(ModelSerializer):
@@ -44,7 +56,39 @@ class CustomContactFieldSerializer(ModelSerializer):
         fields = ('name', 'value', 'id',)
 
 
-class ContactSerializer(TaggitSerializer, ModelSerializer):
+class ContactListSerializer(FragmentCacheListSerializer):
+    '''
+        Serializes a page of contacts with a fixed number of queries:
+        contacts missing from the fragment cache have every relation
+        `ContactSerializer.to_representation` reads prefetched up front.
+    '''
+
+    prefetch_plan = ('employers', 'past_employers', 'custom_fields', 'tags',)
+
+    @classmethod
+    def prefetch(cls, contacts, lookups=None):
+        if lookups is None:
+            lookups = cls.prefetch_plan
+
+        if isinstance(contacts, Manager):
+            contacts = contacts.all()
+
+        if isinstance(contacts, QuerySet):
+            return contacts.prefetch_related(*lookups)
+
+        contacts = list(contacts)
+        prefetch_related_objects(
+            [contact for contact in contacts if isinstance(contact, Contact)],
+            *lookups)
+        return contacts
+
+    def prepare(self, contacts):
+        # With `?fields=` only the relations behind requested keys load
+        lookups = self.child.get_prefetch_lookups(self.child.allowed)
+        return self.prefetch(contacts, lookups)
+
+
+class ContactSerializer(TaggitSerializer, DynamicFieldsModelSerializer):
 
     firstname = CharField(source='first_name',
                           required=False, allow_blank=True)
@@ -127,6 +171,76 @@ class ContactSerializer(TaggitSerializer, ModelSerializer):
         source='linkedin_updated', required=False, write_only=False)
     linkedin_updated = DateTimeField(required=False, write_only=False)
 
+    fragment_type = 'contacts'
+
+    # Relations are read through `.all()` so that a page prefetched
+    # by ContactListSerializer is served from the prefetch cache.
+    representation = (
+        ('id', 'pk'),
+        ('type', lambda obj: 'contacts'),
+        ('createdby', 'created_by_id'),
+        ('created', 'created'),
+        ('updated', 'updated'),
+
+        ('firstname', 'first_name'),
+        ('lastname', 'last_name'),
+        ('email', 'email'),
+
+        ('employers', lambda obj: [
+            employer.pk for employer in obj.employers.all()]),
+        ('notes', 'notes'),
+        ('pastemployers', lambda obj: [
+            employer.pk for employer in obj.past_employers.all()]),
+
+        ('linkedin', 'linkedin'),
+        ('twitter', 'twitter'),
+        ('instagram', 'instagram'),
+        ('websites', 'websites'),
+        ('blog', 'blog'),
+
+        ('twitterinvalid', 'twitter_invalid'),
+        ('instagraminvalid', 'instagram_invalid'),
+        ('twitterprivate', 'twitter_private'),
+        ('instagramprivate', 'instagram_private'),
+
+        ('location', 'location'),
+        ('phonenumber', 'phone_number'),
+
+        ('customfields', lambda obj: [{
+            'id': custom_field.pk,
+            'created': custom_field.created,
+            'updated': custom_field.updated,
+            'created_by_id': custom_field.created_by_id,
+            'name': custom_field.name,
+            'value': custom_field.value,
+        } for custom_field in obj.custom_fields.all()]),
+
+        ('isoutdated', 'is_outdated'),
+        ('emailbounced', 'email_bounced'),
+
+        ('ismastercontact', 'is_master_contact'),
+        ('isdeleted', 'is_deleted'),
+
+        ('readonly', lambda obj: False),
+
+        ('tags', lambda obj: [{
+            'id': tag.pk,
+            'name': tag.name,
+            'slug': tag.slug,
+        } for tag in obj.tags.all()]),
+
+        ('teamid', 'team_id'),
+        ('clientid', 'client_id'),
+
+        ('linkedinupdated', 'linkedin_updated'),
+    )
+    sparse_prefetch = {
+        'employers': ('employers',),
+        'pastemployers': ('past_employers',),
+        'customfields': ('custom_fields',),
+        'tags': ('tags',),
+    }
+
     def to_representation(self, obj):
         has_data = False
         included = {}
@@ -137,56 +251,7 @@ class ContactSerializer(TaggitSerializer, ModelSerializer):
 
                 obj = obj['data']
 
-        contact = {
-            'id': obj.pk,
-            'type': 'contacts',
-            'createdby': obj.created_by and obj.created_by.pk,
-            'created': obj.created,
-            'updated': obj.updated,
-
-            'firstname': obj.first_name,
-            'lastname': obj.last_name,
-            'email': obj.email,
-
-            'employers': (obj.employers and
-                          obj.employers.values_list('id', flat=True)),
-            'notes': obj.notes,
-            'pastemployers': (obj.past_employers and
-                              obj.past_employers.values_list(
-                                  'id', flat=True)),
-
-            'linkedin': obj.linkedin,
-            'twitter': obj.twitter,
-            'instagram': obj.instagram,
-            'websites': obj.websites,
-            'blog': obj.blog,
-
-            'twitterinvalid': obj.twitter_invalid,
-            'instagraminvalid': obj.instagram_invalid,
-            'twitterprivate': obj.twitter_private,
-            'instagramprivate': obj.instagram_private,
-
-            'location': obj.location,
-            'phonenumber': obj.phone_number,
-
-            'customfields': (obj.custom_fields and
-                             obj.custom_fields.values()),
-
-            'isoutdated': obj.is_outdated,
-            'emailbounced': obj.email_bounced,
-
-            'ismastercontact': obj.is_master_contact,
-            'isdeleted': obj.is_deleted,
-
-            'readonly': False,
-
-            'tags': obj.tags and obj.tags.values(),
-
-            'teamid': obj.team and obj.team.pk,
-            'clientid': obj.client and obj.client.pk,
-
-            'linkedinupdated': obj.linkedin_updated,
-        }
+        contact = self.represent(obj)
 
         if has_data:
             return {
@@ -248,10 +313,9 @@ class ContactSerializer(TaggitSerializer, ModelSerializer):
 
         # Check if user already exists
         if 'email' in data:
-            user_profile = UserProfile.objects.get(user=user)
             try:
-                db_contacts = Contact.objects.filter(email=data['email'],
-                                                     team=user_profile.team)
+                db_contacts = Contact.objects.filter(
+                    email=data['email'], team=get_tenant(request).team)
                 if len(db_contacts) > 0:
                     if list_id:
                         try:
@@ -304,8 +368,7 @@ class ContactSerializer(TaggitSerializer, ModelSerializer):
         if client:
             contact.client = client
 
-        user_profile = UserProfile.objects.get(user=user)
-        contact.team = user_profile.team
+        contact.team = get_tenant(request).team
         contact.created_by = user
         contact.save()
 
@@ -409,8 +472,7 @@ class ContactSerializer(TaggitSerializer, ModelSerializer):
         contact.linkedin_updated = validated_data.get(
             'linkedin_updated', contact.linkedin_updated)
 
-        user_profile = UserProfile.objects.get(user=user)
-        contact.team = user_profile.team
+        contact.team = get_tenant(request).team
         contact.save()
 
         return form_response(contact, {})
@@ -431,3 +493,81 @@ class ContactSerializer(TaggitSerializer, ModelSerializer):
                   'twitterprivate', 'instagraminvalid', 'twitterinvalid',
                   'pastemployers', 'lastname', 'firstname', 'past_employers',
                   'listid',)
+        list_serializer_class = ContactListSerializer
+
+
+class MediaListContactListSerializer(ContactListSerializer):
+    '''
+        Adds each contact's precomputed social fields and last contacted
+        dates to its cached representation, with a fixed number of
+        queries for the whole page.
+    '''
+
+    def get_last_contacted(self, contact_ids):
+        allowed = self.child.allowed
+        request = self.context.get('request')
+        if request is None or (allowed is not None and not (
+                allowed & set(LAST_CONTACTED_FIELDS))):
+            return None
+        return get_last_contacted(get_tenant(request).team, request.user,
+                                  contact_ids)
+
+    def to_representation(self, data):
+        if isinstance(data, Manager):
+            data = data.all()
+        contacts = list(data)
+        representation = super(
+            MediaListContactListSerializer, self).to_representation(contacts)
+
+        contact_ids = [contact.pk for contact in contacts]
+        social_fields = dict(
+            (social.pk, social) for social in
+            ContactSocialFields.objects.filter(pk__in=contact_ids))
+        last_contacted = self.get_last_contacted(contact_ids)
+
+        allowed = self.child.allowed
+        for contact, item in zip(contacts, representation):
+            item.update(represent_social_fields(
+                social_fields.get(contact.pk), allowed))
+
+            if last_contacted is None:
+                continue
+            dates = dict(zip(LAST_CONTACTED_FIELDS,
+                             last_contacted.get(contact.pk, (None, None))))
+            item.update((key, value) for key, value in dates.items()
+                        if allowed is None or key in allowed)
+        return representation
+
+
+class MediaListContactSerializer(ContactSerializer):
+    '''
+        A contact as a row of a media list: the read-only social
+        columns (`twitterfollowers`, `latestheadline`...) come inline.
+    '''
+
+    class Meta(ContactSerializer.Meta):
+        list_serializer_class = MediaListContactListSerializer
+
+
+class ContactBulkUpdateSerializer(ContactSerializer):
+    '''
+        Validates one row of a bulk update without hitting the database.
+        Related ids are returned as plain integers and checked in batch
+        by `bulk_update_contacts`.
+    '''
+
+    employers = ListField(child=IntegerField(), required=False,
+                          allow_null=True)
+
+    pastemployers = ListField(source='past_employers',
+                              child=IntegerField(), required=False,
+                              allow_null=True)
+    past_employers = ListField(child=IntegerField(), required=False,
+                               allow_null=True)
+
+    teamid = IntegerField(source='team', required=False, allow_null=True)
+    team = IntegerField(required=False, allow_null=True)
+
+    clientid = IntegerField(source='client', required=False,
+                            allow_null=True)
+    client = IntegerField(required=False, allow_null=True)
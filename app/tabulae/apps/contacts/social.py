@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+# Stdlib imports
+from collections import OrderedDict
+import datetime
+
+# Core Django imports
+from django.db import transaction
+from django.db.models import F
+
+# Imports from app
+from tabulae.apps.feeds.models import Feed
+from tabulae.apps.general.elastic_search import es
+from tabulae.apps.general.timeseries import (
+    TIMESERIES_METRICS,
+    documents_to_values,
+    get_daily_documents,
+)
+from tabulae.apps.lists.models import MediaList
+from .models import Contact, ContactSocialFields
+
+# Fields-map value of each read-only list column -> ContactSocialFields
+# column, e.g. `twitterfollowers` -> `twitter_followers`
+SOCIAL_FIELDS = OrderedDict(
+    [(network + metric.lower(), network + '_' + metric.lower())
+     for network in ('twitter', 'instagram')
+     for metric in TIMESERIES_METRICS[network]] +
+    [('latestheadline', 'latest_headline')])
+
+# Column each field sorts on; the latest headline sorts by its date
+SOCIAL_FIELD_ORDERING = dict(SOCIAL_FIELDS, latestheadline=(
+    'latest_headline_published'))
+
+# Contacts refreshed by one task
+SOCIAL_FIELDS_BATCH_SIZE = 500
+# Days of timeseries documents looked at for the latest values
+SOCIAL_FIELDS_DAYS = 2
+
+
+def get_listed_contact_ids():
+    '''
+        Returns the ids of every contact on a list that is neither
+        archived nor deleted.
+    '''
+    return list(MediaList.contacts.through.objects.filter(
+        medialist__archived=False, medialist__is_deleted=False,
+    ).values_list('contact_id', flat=True).distinct().order_by(
+        'contact_id'))
+
+
+def get_latest_metrics(network, usernames):
+    '''
+        Returns {lowercased username: [values]} with the most recent
+        daily document of every username.
+    '''
+    documents = get_daily_documents(
+        network, usernames, SOCIAL_FIELDS_DAYS, client=es)
+
+    latest = {}
+    for username, days in documents_to_values(network, documents).items():
+        latest[username.lower()] = days[max(days)]
+    return latest
+
+
+def _parse_published(value):
+    try:
+        return datetime.datetime.strptime(value[:19], '%Y-%m-%dT%H:%M:%S')
+    except (TypeError, ValueError):
+        return None
+
+
+def get_latest_headlines(feed_urls):
+    '''
+        Returns {feed url: (title, published)} with the newest headline of
+        every feed, from a single `_msearch`. Each feed is matched as a
+        phrase, which holds whether data.FeedURL is a keyword or an
+        analyzed field.
+    '''
+    if not feed_urls:
+        return {}
+
+    body = []
+    for feed_url in feed_urls:
+        body.append({
+            'index': 'headlines',
+            'type': 'headline',
+        })
+        body.append({
+            'size': 1,
+            'query': {
+                'bool': {
+                    'filter': {
+                        'match_phrase': {
+                            'data.FeedURL': feed_url,
+                        }
+                    }
+                }
+            },
+            'sort': [{
+                'data.PublishDate': {
+                    'order': 'desc',
+                }
+            }],
+            '_source': ['data.Title', 'data.PublishDate'],
+        })
+
+    es_headlines = es.msearch(body=body)
+
+    headlines = {}
+    for feed_url, es_response in zip(feed_urls,
+                                     es_headlines.get('responses', [])):
+        hits = es_response.get('hits', {}).get('hits', [])
+        if hits:
+            data = hits[0].get('_source', {}).get('data', {})
+            headlines[feed_url] = (
+                data.get('Title', ''),
+                _parse_published(data.get('PublishDate')))
+    return headlines
+
+
+def refresh_social_fields(contact_ids):
+    '''
+        Recomputes the social fields of `contact_ids`: one mget batch per
+        network for the metrics and one search for the headlines.
+    '''
+    contacts = list(Contact.objects.filter(pk__in=contact_ids).values(
+        'pk', 'twitter', 'instagram', 'twitter_invalid',
+        'instagram_invalid'))
+
+    metrics = {}
+    for network in ('twitter', 'instagram'):
+        usernames = sorted(set(
+            contact[network] for contact in contacts
+            if contact[network] and not contact[network + '_invalid']))
+        metrics[network] = get_latest_metrics(
+            network, usernames) if usernames else {}
+
+    feeds = {}
+    for contact_id, feed_url in Feed.objects.filter(
+            contact_id__in=contact_ids, valid_feed=True,
+            running=True).exclude(feed_url='').values_list(
+            'contact_id', 'feed_url'):
+        feeds.setdefault(contact_id, []).append(feed_url)
+    headlines = get_latest_headlines(
+        sorted(set(url for urls in feeds.values() for url in urls)))
+
+    computed = {}
+    for contact in contacts:
+        values = {}
+        for network in ('twitter', 'instagram'):
+            latest = metrics[network].get(contact[network].lower(), [])
+            for index, metric in enumerate(TIMESERIES_METRICS[network]):
+                values[network + '_' + metric.lower()] = (
+                    latest[index] if index < len(latest) else None)
+
+        candidates = [headlines[url] for url in feeds.get(contact['pk'], [])
+                      if url in headlines and headlines[url][1]]
+        newest = max(candidates, key=lambda headline: headline[1]) if (
+            candidates) else None
+        values['latest_headline'] = newest[0] if newest else ''
+        values['latest_headline_published'] = newest[1] if newest else None
+        computed[contact['pk']] = values
+
+    with transaction.atomic():
+        existing = dict(
+            (social_fields.pk, social_fields) for social_fields in
+            ContactSocialFields.objects.filter(
+                pk__in=computed.keys()).select_for_update())
+
+        created = []
+        for contact_id, values in computed.items():
+            social_fields = existing.get(contact_id)
+            if social_fields is None:
+                created.append(ContactSocialFields(
+                    contact_id=contact_id, **values))
+            elif any(getattr(social_fields, column) != value
+                     for column, value in values.items()):
+                for column, value in values.items():
+                    setattr(social_fields, column, value)
+                social_fields.save()
+
+        ContactSocialFields.objects.bulk_create(created)
+    return len(computed)
+
+
+def represent_social_fields(social_fields, allowed=None):
+    '''
+        Returns the fields-map keys of a contact's social fields, or
+        empty values when they haven't been computed yet.
+    '''
+    data = {}
+    for value, column in SOCIAL_FIELDS.items():
+        if allowed is not None and value not in allowed:
+            continue
+        if social_fields is None:
+            data[value] = '' if value == 'latestheadline' else None
+        else:
+            data[value] = getattr(social_fields, column)
+    return data
+
+
+def order_by_social_field(queryset, ordering):
+    '''
+        Orders contacts by a social field given as `?order=`, e.g.
+        `-twitterfollowers`. Contacts without a value come last either
+        way. Returns None when `ordering` isn't a social field.
+    '''
+    descending = ordering.startswith('-')
+    column = SOCIAL_FIELD_ORDERING.get(ordering.lstrip('-'))
+    if column is None:
+        return None
+
+    expression = F('social_fields__' + column)
+    if descending:
+        expression = expression.desc(nulls_last=True)
+    else:
+        expression = expression.asc(nulls_last=True)
+    return queryset.order_by(expression, '-created', '-pk')
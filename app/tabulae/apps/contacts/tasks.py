@@ -4,7 +4,28 @@ from celery import shared_task
 
 # Imports from app
 from tabulae.apps.integrations.full_contact import fc
+from tabulae.apps.general.elastic_search import es
+from tabulae.apps.general.timeseries import (
+    TIMESERIES_METRICS,
+    get_daily_documents,
+)
 from tabulae.apps.contacts.models import Contact
+from tabulae.apps.contacts.rollups import (
+    ROLLUP_BATCH_SIZE,
+    ROLLUP_REFRESH_DAYS,
+    finish_batch,
+    get_refresh_days,
+    get_tracked_usernames,
+    mark_refreshed,
+    start_refresh,
+    write_coverage,
+    write_rollups,
+)
+from tabulae.apps.contacts.social import (
+    SOCIAL_FIELDS_BATCH_SIZE,
+    get_listed_contact_ids,
+    refresh_social_fields,
+)
 
 
 @shared_task
@@ -16,3 +37,76 @@ def enrich_contact(contact_id):
         if fc_data:
             print fc_data
     return True
+
+
+@shared_task
+def refresh_social_rollups(days=ROLLUP_REFRESH_DAYS):
+    '''
+        Queues a rollup refresh for every tracked username, in batches.
+        Usernames without rollups yet, or with a gap since their last
+        refresh, read further back. Runs periodically; call it with a
+        larger `days` to backfill.
+
+        A network only counts as fresh once all of its batches are in:
+        the last batch of the run marks it (no result backend needed).
+    '''
+    for network in TIMESERIES_METRICS:
+        batches = []
+        usernames_by_days = get_refresh_days(
+            network, get_tracked_usernames(network), days)
+        for batch_days, usernames in usernames_by_days.items():
+            # Keep the documents read per task about the same however
+            # far back the batch goes
+            batch_size = max(1, ROLLUP_BATCH_SIZE * ROLLUP_REFRESH_DAYS //
+                             batch_days)
+            for start in xrange(0, len(usernames), batch_size):
+                batches.append((usernames[start:start + batch_size],
+                                batch_days))
+
+        if not batches:
+            mark_refreshed(network)
+            continue
+
+        run_id = start_refresh(network, len(batches))
+        for batch, (usernames, batch_days) in enumerate(batches):
+            refresh_social_rollup_batch.delay(
+                network, usernames, batch_days, run_id, batch)
+    return True
+
+
+@shared_task
+def refresh_social_rollup_batch(network, usernames, days, run_id=None,
+                                batch=0):
+    # Straight to Elasticsearch: these documents are read once
+    documents = get_daily_documents(network, usernames, days, client=es)
+    written = write_rollups(network, documents)
+    write_coverage(network, usernames, days)
+    if run_id is not None:
+        finish_batch(network, run_id, batch)
+    return written
+
+
+@shared_task
+def refresh_listed_social_fields():
+    '''
+        Queues the nightly social fields refresh of every contact on an
+        active list, in batches.
+    '''
+    queue_social_fields_refresh(get_listed_contact_ids())
+    return True
+
+
+def queue_social_fields_refresh(contact_ids):
+    '''
+        Queues a social fields refresh of `contact_ids`, in batches, e.g.
+        for contacts just added to a list, which the nightly refresh
+        hasn't seen yet.
+    '''
+    for start in xrange(0, len(contact_ids), SOCIAL_FIELDS_BATCH_SIZE):
+        refresh_social_fields_batch.delay(
+            contact_ids[start:start + SOCIAL_FIELDS_BATCH_SIZE])
+
+
+@shared_task
+def refresh_social_fields_batch(contact_ids):
+    return refresh_social_fields(contact_ids)
@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+# Stdlib imports
+from collections import OrderedDict
+import datetime
+
+# Core Django imports
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.utils import encoding
+
+# Third-party app imports
+from rest_framework.exceptions import ParseError
+from taggit.models import Tag
+
+# Imports from app
+from tabulae.apps.general.exceptions import format_error
+from tabulae.apps.lists.models import MediaList
+from tabulae.apps.publications.models import Publication
+from tabulae.apps.users.models import Client
+from tabulae.apps.users.utils import get_tenant
+from .models import Contact, CustomContactField
+
+# Columns a bulk update is allowed to write. Mirrors the fields that
+# ContactSerializer.update copies from validated_data.
+BULK_UPDATE_COLUMNS = (
+    'first_name', 'last_name', 'email', 'linkedin', 'twitter',
+    'instagram', 'websites', 'blog', 'twitter_invalid',
+    'instagram_invalid', 'twitter_private', 'instagram_private',
+    'location', 'phone_number', 'email_bounced', 'is_master_contact',
+    'is_deleted',
+)
+
+
+def _row_error(index, detail, field=None):
+    error = format_error(detail, 400)
+    pointer = '/data/%d' % index
+    if field:
+        pointer += '/' + field
+    error['source']['pointer'] = pointer
+    return error
+
+
+def _to_pk(row):
+    if not isinstance(row, dict) or 'id' not in row:
+        return None
+    try:
+        return int(row['id'])
+    except (TypeError, ValueError):
+        return None
+
+
+def _case_update(model, pks_to_values, column):
+    '''
+        Builds `CASE id WHEN ... THEN ... ELSE column END` so every row
+        gets its own value within a single UPDATE statement.
+    '''
+    field = model._meta.get_field(column)
+    whens = [When(pk=pk, then=Value(value, output_field=field))
+             for pk, value in pks_to_values.items()]
+    return Case(*whens, default=F(column), output_field=field)
+
+
+def _validate_rows(request, rows, serializer_class, partial):
+    '''
+        Validates every row of a bulk update without any per-row query.
+        Related ids are checked against one lookup per relation.
+    '''
+    errors = []
+    updates = OrderedDict()
+
+    ids = [_to_pk(row) for row in rows]
+    contacts = Contact.objects.filter(
+        team=get_tenant(request).team,
+        pk__in=[pk for pk in ids if pk is not None]).in_bulk()
+
+    valid = []
+    seen = set()
+    publication_ids = set()
+    client_ids = set()
+    for index, row in enumerate(rows):
+        if ids[index] is None:
+            errors.append(_row_error(index, 'Missing contact id.'))
+            continue
+
+        # One row per contact: a later row would silently overwrite it
+        if ids[index] in seen:
+            errors.append(_row_error(index, 'Duplicate contact id.', 'id'))
+            continue
+        seen.add(ids[index])
+
+        contact = contacts.get(ids[index])
+        if contact is None:
+            errors.append(_row_error(index, 'Invalid ID.'))
+            continue
+
+        serializer = serializer_class(
+            contact, data=row, partial=partial,
+            context={'request': request})
+        if not serializer.is_valid():
+            for field, messages in serializer.errors.items():
+                for message in messages:
+                    errors.append(_row_error(
+                        index, encoding.force_text(message), field))
+            continue
+
+        validated_data = serializer.validated_data
+        publication_ids.update(validated_data.get('employers') or [])
+        publication_ids.update(validated_data.get('past_employers') or [])
+        if validated_data.get('client'):
+            client_ids.add(validated_data['client'])
+        valid.append((index, contact, validated_data))
+
+    existing_publications = set(Publication.objects.filter(
+        pk__in=publication_ids).values_list('pk', flat=True))
+    existing_clients = set(Client.objects.filter(
+        pk__in=client_ids).values_list('pk', flat=True))
+
+    for index, contact, validated_data in valid:
+        missing = (
+            set(validated_data.get('employers') or []) |
+            set(validated_data.get('past_employers') or [])
+        ) - existing_publications
+        if missing:
+            errors.append(_row_error(
+                index, 'Invalid publication ID.', 'employers'))
+            continue
+
+        client = validated_data.get('client')
+        if client and client not in existing_clients:
+            errors.append(_row_error(index, 'Invalid client ID.', 'client'))
+            continue
+
+        updates[contact.pk] = validated_data
+
+    return updates, errors
+
+
+def _write_m2m(through, source, target, updates, key):
+    contact_ids = [pk for pk, data in updates.items() if key in data]
+    if not contact_ids:
+        return
+
+    source_column = source + '_id'
+    target_column = target + '_id'
+    through.objects.filter(**{source_column + '__in': contact_ids}).delete()
+    through.objects.bulk_create([
+        through(**{source_column: pk, target_column: target_id})
+        for pk in contact_ids
+        for target_id in set(updates[pk][key] or [])
+    ])
+
+
+def _add_tags(updates):
+    # Links every contact to its tags with one bulk insert, skipping the
+    # links that exist. Only tag names never used before are created one
+    # by one, so taggit gives them unique slugs.
+    names = set(name for data in updates.values()
+                for name in data.get('tags') or [])
+    if not names:
+        return
+
+    tags = dict(Tag.objects.filter(name__in=names).values_list('name', 'pk'))
+    for name in names.difference(tags):
+        tags[name] = Tag.objects.create(name=name).pk
+
+    through = Contact.tags.through
+    content_type = ContentType.objects.get_for_model(Contact)
+    linked = set(through.objects.filter(
+        content_type=content_type, object_id__in=updates.keys(),
+        tag_id__in=tags.values()).values_list('object_id', 'tag_id'))
+
+    through.objects.bulk_create([
+        through(content_type=content_type, object_id=pk, tag_id=tag_id)
+        for pk, data in updates.items()
+        for tag_id in set(tags[name] for name in data.get('tags') or [])
+        if (pk, tag_id) not in linked])
+
+
+def _write_custom_fields(user, updates, now):
+    existing = {}
+    new_fields = []
+    for pk, data in updates.items():
+        for custom_field in data.get('custom_fields') or []:
+            if 'id' in custom_field:
+                existing[custom_field['id']] = custom_field
+            else:
+                new_fields.append((pk, CustomContactField(
+                    created_by=user, **custom_field)))
+
+    if existing:
+        # Only custom fields that already belong to one of the contacts
+        # being updated can be changed.
+        through = Contact.custom_fields.through
+        allowed = set(through.objects.filter(
+            contact_id__in=updates.keys(),
+            customcontactfield_id__in=existing.keys(),
+        ).values_list('customcontactfield_id', flat=True))
+
+        columns = {}
+        for pk, custom_field in existing.items():
+            if pk not in allowed:
+                continue
+            for column in ('name', 'value'):
+                if column in custom_field:
+                    columns.setdefault(column, {})[pk] = custom_field[column]
+
+        if columns:
+            assignments = dict(
+                (column, _case_update(CustomContactField, values, column))
+                for column, values in columns.items())
+            assignments['updated'] = now
+            CustomContactField.objects.filter(pk__in=allowed).update(
+                **assignments)
+
+    if new_fields:
+        created = CustomContactField.objects.bulk_create(
+            [custom_field for pk, custom_field in new_fields])
+        through = Contact.custom_fields.through
+        through.objects.bulk_create([
+            through(contact_id=pk, customcontactfield_id=custom_field.pk)
+            for (pk, _), custom_field in zip(new_fields, created)
+        ])
+
+
+def bulk_update_contacts(request, rows, serializer_class, partial=False):
+    '''
+        Applies a list of partial contact objects (each with an `id`) in
+        a fixed number of statements: one team scoped fetch, batched
+        reference checks and one multi-row UPDATE per touched table.
+
+        Returns the updated contacts, in request order, and a list of
+        per-row errors. A contact can only appear in one row.
+    '''
+    updates, errors = _validate_rows(
+        request, rows, serializer_class, partial)
+    if not updates:
+        return [], errors
+
+    tenant = get_tenant(request)
+    now = datetime.datetime.now()
+
+    columns = {}
+    for pk, data in updates.items():
+        for column in BULK_UPDATE_COLUMNS:
+            if column in data:
+                columns.setdefault(column, {})[pk] = data[column]
+        if 'client' in data:
+            columns.setdefault('client', {})[pk] = data['client']
+
+    values = dict((column, _case_update(Contact, pks_to_values, column))
+                  for column, pks_to_values in columns.items())
+
+    # Match what Contact.save() would have written.
+    values['team'] = tenant.team
+    values['updated'] = now
+    values['linkedin_updated'] = now
+
+    with transaction.atomic():
+        Contact.objects.filter(pk__in=updates.keys()).update(**values)
+
+        _write_m2m(Contact.employers.through, 'contact', 'publication',
+                   updates, 'employers')
+        _write_m2m(Contact.past_employers.through, 'contact', 'publication',
+                   updates, 'past_employers')
+        _write_custom_fields(request.user, updates, now)
+        _add_tags(updates)
+
+    # In the order the rows were given
+    contacts = Contact.objects.filter(pk__in=updates.keys()).in_bulk()
+    return [contacts[pk] for pk in updates], errors
+
+
+def get_team_contacts(request, contact_ids):
+    '''
+        Fetches the contacts for a list of ids in one team scoped query.
+        Ids that are malformed or belong to another team are dropped.
+    '''
+    pks = []
+    for contact_id in contact_ids:
+        try:
+            pks.append(int(contact_id))
+        except (TypeError, ValueError):
+            continue
+
+    if not pks:
+        return []
+
+    return list(Contact.objects.filter(
+        team=get_tenant(request).team, pk__in=pks).order_by('-created'))
+
+
+def get_list_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ParseError('List ids must be numbers.')
+
+
+def get_team_media_lists(request, list_ids):
+    return MediaList.objects.filter(
+        team=get_tenant(request).team, pk__in=list_ids).in_bulk()
+
+
+def touch_media_lists(media_lists):
+    # The through table writes skip MediaList.save(), so bump `updated`
+    # for all of them with one statement instead, and on the instances
+    # the response is built from.
+    now = datetime.datetime.now()
+    MediaList.objects.filter(
+        pk__in=[media_list.pk for media_list in media_lists]).update(
+        updated=now)
+    for media_list in media_lists:
+        media_list.updated = now
@@ -1,36 +1,73 @@
 # -*- coding: utf-8 -*-
 # Core Django imports
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 
 # Third-party app imports
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.decorators import list_route, detail_route
 from rest_framework.filters import OrderingFilter, SearchFilter
-from rest_framework.exceptions import NotAuthenticated, ParseError
+from rest_framework.exceptions import (
+    NotAuthenticated,
+    NotFound,
+    ParseError,
+)
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.status import HTTP_201_CREATED
 from rest_framework.response import Response as RFREsponse
 
 # Imports from app
 from tabulae.apps.general.viewset import NewsAIModelViewSet
-from tabulae.apps.general.pagination import GlobalPagination, get_pagination
-from tabulae.apps.general.response import Response, BulkResponse
-from tabulae.apps.general.elastic_search import es, format_es_response
+from tabulae.apps.general.fanout import FanOut, timed
+from tabulae.apps.general.pagination import (
+    GlobalPagination, get_es_after_cursor, paginate_es_query)
+from tabulae.apps.general.response import (
+    Response, BulkResponse, StreamingBulkResponse)
+from tabulae.apps.general.elastic_search import (
+    cached_es, normalize_hits)
 from tabulae.apps.general.permissions import IsAdminOrIsSelf
+from tabulae.apps.general.timeseries import get_days
 from tabulae.apps.emails.models import Email
 from tabulae.apps.emails.serializers import EmailSerializer
 from tabulae.apps.feeds.serializers import FeedSerializer
-from tabulae.apps.publications.models import Publication
 from tabulae.apps.publications.serializers import PublicationSerializer
+from tabulae.apps.publications.utils import resolve_publication_ids
 from tabulae.apps.lists.models import MediaList
-from tabulae.apps.lists.serializers import MediaListSerializer
+from tabulae.apps.lists.serializers import (
+    MediaListSerializer,
+    MediaListSummarySerializer,
+)
 from tabulae.apps.feeds.models import Feed
-from tabulae.apps.users.models import UserProfile
+from tabulae.apps.users.utils import get_tenant
 from .models import Contact
-from .serializers import ContactSerializer
+from .serializers import (
+    ContactBulkUpdateSerializer,
+    ContactListSerializer,
+    ContactSerializer,
+)
+from .utils import (
+    bulk_update_contacts,
+    get_list_id,
+    get_team_contacts,
+    get_team_media_lists,
+    touch_media_lists,
+)
 from .permissions import ContactPermission
 
+# Days of a contact's timeseries returned when `?days=` isn't given; the
+# Elasticsearch search used to return its default of ten hits
+CONTACT_TIMESERIES_DAYS = 10
+
+# Emails and lists shown on a contact's dashboard
+DASHBOARD_PAGE_SIZE = 20
+
+# Index holding the profiles of each network
+SOCIAL_PROFILE_INDEXES = {
+    'twitter': 'tweets',
+    'instagram': 'instagrams',
+}
+
 
 class ContactViewSet(NewsAIModelViewSet):
     '''
@@ -40,6 +77,7 @@ class ContactViewSet(NewsAIModelViewSet):
     serializer_class = ContactSerializer
     permission_classes = (ContactPermission,)
     pagination_serializer_class = GlobalPagination
+    pagination_mode = 'cursor'
     filter_backends = (DjangoFilterBackend, OrderingFilter, SearchFilter,)
     paginate_by_param = 'limit'
     ordering_fields = '__all__'
@@ -47,20 +85,15 @@ class ContactViewSet(NewsAIModelViewSet):
     search_fields = ('first_name', 'last_name', 'email',)
 
     def get_contact_by_pk(self, request, pk):
-        # Switch to team__pk=request.user.team.pk
-        user_profile = UserProfile.objects.get(user=request.user)
-        queryset = Contact.objects.filter(team=user_profile.team)
+        queryset = Contact.objects.filter(team=get_tenant(request).team)
         contact = get_object_or_404(queryset, pk=pk)
         return contact
 
     def get_contact_included(self, contact):
         included = []
 
-        publications = []
-        if contact.employers.count() > 0:
-            publications += list(contact.employers.all())
-        if contact.past_employers.count() > 0:
-            publications += list(contact.past_employers.all())
+        publications = (list(contact.employers.all()) +
+                        list(contact.past_employers.all()))
 
         if len(publications) > 0:
             pub_serializer = PublicationSerializer(
@@ -87,18 +120,17 @@ class ContactViewSet(NewsAIModelViewSet):
             serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
 
-        serializer = self.get_serializer(queryset, many=True)
-        return BulkResponse(serializer.data, {},
-                            len(serializer.data), len(serializer.data))
+        return StreamingBulkResponse(
+            queryset, self.get_serializer_class(),
+            self.get_serializer_context())
 
     def get_queryset(self,):
         if self.request.user and self.request.user.is_authenticated():
-            user_profile = UserProfile.objects.get(user=self.request.user)
-            return (
-                Contact.objects.filter(
-                    team=user_profile.team).order_by(
-                    '-created')).prefetch_related(
-                'custom_fields')
+            tenant = get_tenant(self.request)
+            # ContactListSerializer prefetches relations for the
+            # contacts that miss the fragment cache.
+            return Contact.objects.filter(
+                team=tenant.team).order_by('-created')
         raise NotAuthenticated()
 
     def get_serializer(self, *args, **kwargs):
@@ -114,26 +146,17 @@ class ContactViewSet(NewsAIModelViewSet):
         '''
             parameters: array of contact objects
         '''
-        serializers = []
-        included = []
-        for contact in request.data:
-            if 'id' in contact:
-                partial = kwargs.pop('partial', False)
-                instance = self.get_contact_by_pk(request, contact['id'])
-                serializer = self.get_serializer(
-                    instance, data=contact, partial=partial)
-                serializer.is_valid(raise_exception=True)
-                self.perform_update(serializer)
-
-                if getattr(instance, '_prefetched_objects_cache', None):
-                    # If 'prefetch_related' has been applied to a queryset, we need to
-                    # forcibly invalidate the prefetch cache on the instance.
-                    instance._prefetched_objects_cache = {}
+        if not isinstance(request.data, list):
+            raise ParseError()
 
-                serializers.append(serializer.data['data'])
+        partial = kwargs.pop('partial', False)
+        contacts, errors = bulk_update_contacts(
+            request, request.data, ContactBulkUpdateSerializer,
+            partial=partial)
 
-        return BulkResponse(serializers, included, len(serializers),
-                            len(serializers))
+        serializer = ContactSerializer(contacts, many=True)
+        return BulkResponse(serializer.data, [], len(serializer.data),
+                            len(serializer.data), errors=errors)
 
     def update(self, request, pk=None, partial=None, *args, **kwargs):
         '''
@@ -165,33 +188,26 @@ class ContactViewSet(NewsAIModelViewSet):
         included = []
         if ('contacts' in request.data and 'fromList' in request.data
                 and 'toList' in request.data):
-
-            try:
-                from_list = MediaList.objects.get(pk=request.data['fromList'])
-                to_list = MediaList.objects.get(pk=request.data['toList'])
-
-                for contact_id in request.data['contacts']:
-                    try:
-                        contact = Contact.objects.get(pk=contact_id)
-                        from_list.contacts.remove(contact)
-                        to_list.contacts.add(contact)
-
-                        # Add contacts to the list we're going to
-                        # return back to user.
-                        contacts.append(contact)
-                    except Contact.DoesNotExist:
-                        continue
-
-                from_list.save()
-                from_list_serializer = MediaListSerializer(from_list)
-                included.append(from_list_serializer.data)
-
-                to_list.save()
-                to_list_serializer = MediaListSerializer(to_list)
-                included.append(to_list_serializer.data)
-
-            except MediaList.DoesNotExist:
-                pass
+            from_list_id = get_list_id(request.data['fromList'])
+            to_list_id = get_list_id(request.data['toList'])
+            media_lists = get_team_media_lists(
+                request, [from_list_id, to_list_id])
+            from_list = media_lists.get(from_list_id)
+            to_list = media_lists.get(to_list_id)
+
+            if from_list and to_list:
+                contacts = get_team_contacts(
+                    request, request.data['contacts'])
+                contact_ids = [contact.pk for contact in contacts]
+
+                with transaction.atomic():
+                    from_list.contacts.remove(*contact_ids)
+                    to_list.contacts.add(*contact_ids)
+                    touch_media_lists([from_list, to_list])
+
+                serializer = MediaListSummarySerializer(
+                    [from_list, to_list], many=True)
+                included = serializer.data
 
         serializer = ContactSerializer(contacts, many=True)
         return BulkResponse(serializer.data, included, len(serializer.data),
@@ -208,26 +224,20 @@ class ContactViewSet(NewsAIModelViewSet):
         included = []
         if ('contacts' in request.data and
                 'listid' in request.data):
-            try:
-                media_list = MediaList.objects.get(pk=request.data['listid'])
-
-                for contact_id in request.data['contacts']:
-                    try:
-                        # Add moved contact to media list
-                        contact = Contact.objects.get(pk=contact_id)
-                        media_list.contacts.add(contact)
-
-                        # Add contacts to the list we're going to
-                        # return back to user.
-                        contacts.append(contact)
-                    except Contact.DoesNotExist:
-                        continue
-
-                media_list.save()
-                media_list_serializer = MediaListSerializer(media_list)
-                included.append(media_list_serializer.data)
-            except MediaList.DoesNotExist:
-                pass
+            list_id = get_list_id(request.data['listid'])
+            media_list = get_team_media_lists(request, [list_id]).get(list_id)
+
+            if media_list:
+                contacts = get_team_contacts(
+                    request, request.data['contacts'])
+
+                with transaction.atomic():
+                    media_list.contacts.add(
+                        *[contact.pk for contact in contacts])
+                    touch_media_lists([media_list])
+
+                serializer = MediaListSummarySerializer(media_list)
+                included.append(serializer.data)
 
         serializer = ContactSerializer(contacts, many=True)
         return BulkResponse(serializer.data, included, len(serializer.data),
@@ -244,24 +254,20 @@ class ContactViewSet(NewsAIModelViewSet):
         included = []
         if ('contacts' in request.data and
                 'listid' in request.data):
-            media_list = MediaList.objects.get(pk=request.data['listid'])
-            for contact_id in request.data['contacts']:
-                # Remove moved contact from media list
-                try:
-                    contact = Contact.objects.get(pk=contact_id)
+            list_id = get_list_id(request.data['listid'])
+            media_list = get_team_media_lists(request, [list_id]).get(list_id)
+            if not media_list:
+                raise NotFound()
 
-                    # Remove current contact from media_list
-                    media_list.contacts.remove(contact)
+            contacts = get_team_contacts(request, request.data['contacts'])
 
-                    # Add contacts to the list we're going to
-                    # return back to user.
-                    contacts.append(contact)
-                except Contact.DoesNotExist:
-                    continue
+            with transaction.atomic():
+                media_list.contacts.remove(
+                    *[contact.pk for contact in contacts])
+                touch_media_lists([media_list])
 
-            media_list.save()
-            media_list_serializer = MediaListSerializer(media_list)
-            included.append(media_list_serializer.data)
+            serializer = MediaListSummarySerializer(media_list)
+            included.append(serializer.data)
 
         serializer = ContactSerializer(contacts, many=True)
         return BulkResponse(serializer.data, included, len(serializer.data),
@@ -276,6 +282,7 @@ class ContactViewSet(NewsAIModelViewSet):
         # Response to user
         feed = []
         total_feed = 0
+        after = ''
 
         # ES attributes
         should = []
@@ -309,10 +316,7 @@ class ContactViewSet(NewsAIModelViewSet):
                 })
 
         if len(should) > 0:
-            limit, offset = get_pagination(request)
             query = {
-                'size': limit,
-                'from': offset,
                 'query': {
                     'bool': {
                         'should': should
@@ -326,27 +330,24 @@ class ContactViewSet(NewsAIModelViewSet):
                 }]
             }
 
-            es_feeds = es.search(
+            paginate_es_query(query, request)
+            es_feeds = cached_es.search(
                 index='feeds', doc_type='feed', body=query)
+            after = get_es_after_cursor(es_feeds, query)
 
             if 'hits' in es_feeds and 'total' in es_feeds['hits']:
                 total_feed = es_feeds['hits']['total']
 
             if 'hits' in es_feeds and 'hits' in es_feeds['hits']:
-                for es_feed in es_feeds['hits']['hits']:
-                    if ('_source' in es_feed and
-                            'data' in es_feed['_source']):
-                        es_feed = format_es_response(es_feed)
+                feed = normalize_hits(es_feeds['hits']['hits'])
 
-                        # we want the format to be 'tweets', 'instagrams',
-                        # and 'headlines'
-                        es_feed['_source']['data']['type'] = es_feed[
-                            '_source']['data']['type'].lower() + 's'
-
-                        feed.append(es_feed['_source']['data'])
+                # we want the format to be 'tweets', 'instagrams',
+                # and 'headlines'
+                for item in feed:
+                    item['type'] = item['type'].lower() + 's'
 
         return BulkResponse(feed, {}, len(feed),
-                            total_feed)
+                            total_feed, after=after)
 
     # GET /contacts/<id>/headlines (External)
     @detail_route(methods=['get'], url_path='headlines',
@@ -360,12 +361,10 @@ class ContactViewSet(NewsAIModelViewSet):
         # Response to user
         headlines = []
         total_headlines = 0
+        after = ''
 
         if len(feeds) > 0:
-            limit, offset = get_pagination(request)
             query = {
-                'size': limit,
-                'from': offset,
                 'query': {
                     'bool': {
                         'should': []
@@ -387,37 +386,27 @@ class ContactViewSet(NewsAIModelViewSet):
                         }
                     })
 
-            es_headlines = es.search(
+            paginate_es_query(query, request)
+            es_headlines = cached_es.search(
                 index='headlines', doc_type='headline', body=query)
+            after = get_es_after_cursor(es_headlines, query)
 
             if 'hits' in es_headlines and 'total' in es_headlines['hits']:
                 total_headlines = es_headlines['hits']['total']
 
             if 'hits' in es_headlines and 'hits' in es_headlines['hits']:
-                for es_headline in es_headlines['hits']['hits']:
-                    if ('_source' in es_headline and
-                            'data' in es_headline['_source']):
-                        es_headline = format_es_response(es_headline)
-                        headlines.append(es_headline['_source']['data'])
+                headlines = normalize_hits(es_headlines['hits']['hits'])
 
         return BulkResponse(headlines, {}, len(headlines),
-                            total_headlines)
-
-    # GET /contacts/<id>/tweets (External)
-    @detail_route(methods=['get'], url_path='tweets',
-                  permission_classes=[IsAuthenticated, IsAdminOrIsSelf])
-    def tweets(self, request, pk=None):
-        contact = self.get_contact_by_pk(request, pk)
+                            total_headlines, after=after)
 
-        # Response to user
+    def search_tweets(self, request, contact):
         tweets = []
         total_tweets = 0
+        after = ''
 
         if contact.twitter != '':
-            limit, offset = get_pagination(request)
             query = {
-                'size': limit,
-                'from': offset,
                 'query': {
                     'bool': {
                         'should': [{
@@ -436,72 +425,81 @@ class ContactViewSet(NewsAIModelViewSet):
                 }],
             }
 
-            es_tweets = es.search(
+            paginate_es_query(query, request)
+            es_tweets = cached_es.search(
                 index='tweets', doc_type='tweet', body=query)
+            after = get_es_after_cursor(es_tweets, query)
 
             if 'hits' in es_tweets and 'total' in es_tweets['hits']:
                 total_tweets = es_tweets['hits']['total']
 
             if 'hits' in es_tweets and 'hits' in es_tweets['hits']:
-                for es_tweet in es_tweets['hits']['hits']:
-                    if ('_source' in es_tweet and
-                            'data' in es_tweet['_source']):
-                        es_tweet = format_es_response(es_tweet)
-                        es_tweet['type'] = 'tweets'
-                        tweets.append(es_tweet['_source']['data'])
+                tweets = normalize_hits(es_tweets['hits']['hits'])
 
-        return BulkResponse(tweets, {}, len(tweets),
-                            total_tweets)
+        return tweets, total_tweets, after
 
-    # GET /contacts/<id>/twitterprofile (External)
-    @detail_route(methods=['get'], url_path='twitterprofile',
-                  permission_classes=[IsAdminOrIsSelf])
-    def twitter_profile(self, request, pk=None):
+    # GET /contacts/<id>/tweets (External)
+    @detail_route(methods=['get'], url_path='tweets',
+                  permission_classes=[IsAuthenticated, IsAdminOrIsSelf])
+    def tweets(self, request, pk=None):
         contact = self.get_contact_by_pk(request, pk)
+        tweets, total_tweets, after = self.search_tweets(request, contact)
+        return BulkResponse(tweets, {}, len(tweets),
+                            total_tweets, after=after)
 
-        # Response to user
-        twitter_profile = {}
+    def get_social_profile(self, contact, network):
+        profile = {}
+        username = getattr(contact, network)
 
-        if contact.twitter != '':
+        if username != '':
             query = {
                 'query': {
                     'bool': {
                         'must': [{
                             'term': {
-                                'data.Username': contact.twitter
+                                'data.Username': username
                             }
                         }]
                     }
                 }
             }
 
-            es_twitter_profile = es.search(
-                index='tweets', doc_type='user', body=query)
-            if ('hits' in es_twitter_profile and
-                    'hits' in es_twitter_profile['hits']):
-                if len(es_twitter_profile['hits']['hits']) > 0:
-                    twitter_profile = es_twitter_profile[
-                        'hits']['hits'][0]['_source']['data']
+            es_profile = cached_es.search(
+                index=SOCIAL_PROFILE_INDEXES[network], doc_type='user',
+                body=query)
+            if 'hits' in es_profile and 'hits' in es_profile['hits']:
+                if len(es_profile['hits']['hits']) > 0:
+                    profile = es_profile['hits']['hits'][0]['_source']['data']
 
-        return Response(twitter_profile, {})
+        return profile
 
-    # GET /contacts/<id>/twittertimeseries (External)
-    @detail_route(methods=['get'], url_path='twittertimeseries',
-                  permission_classes=[IsAuthenticated, IsAdminOrIsSelf])
-    def twitter_timeseries(self, request, pk=None):
+    # GET /contacts/<id>/twitterprofile (External)
+    @detail_route(methods=['get'], url_path='twitterprofile',
+                  permission_classes=[IsAdminOrIsSelf])
+    def twitter_profile(self, request, pk=None):
         contact = self.get_contact_by_pk(request, pk)
+        return Response(self.get_social_profile(contact, 'twitter'), {})
+
+    def search_timeseries(self, request, contact, network):
+        '''
+            The last `?days=` daily documents of the contact, as they are
+            in Elasticsearch. (The social rollups only keep the metrics.)
+        '''
+        username = getattr(contact, network)
 
         # Response to user
-        twitter_timeseries = []
-        total_twitter_timeseries = 0
+        timeseries = []
+        total_timeseries = 0
 
-        if contact.twitter != '':
+        if username != '':
+            days = get_days(request.GET.get('days'), CONTACT_TIMESERIES_DAYS)
             query = {
+                'size': days,
                 'query': {
                     'bool': {
                         'must': [{
                             'term': {
-                                'data.Username': contact.twitter
+                                'data.Username': username
                             }
                         }]
                     }
@@ -514,34 +512,39 @@ class ContactViewSet(NewsAIModelViewSet):
                 }]
             }
 
-            es_twitter_timeseries = es.search(
-                index='timeseries', doc_type='twitter', body=query)
+            es_timeseries = cached_es.search(
+                index='timeseries', doc_type=network, body=query)
 
-            if ('hits' in es_twitter_timeseries and
-                    'total' in es_twitter_timeseries['hits']):
-                total_twitter_timeseries = es_twitter_timeseries[
-                    'hits']['total']
+            if ('hits' in es_timeseries and
+                    'total' in es_timeseries['hits']):
+                total_timeseries = es_timeseries['hits']['total']
 
-            if ('hits' in es_twitter_timeseries and
-                    'hits' in es_twitter_timeseries['hits']):
-                for ts in es_twitter_timeseries['hits']['hits']:
+            if ('hits' in es_timeseries and
+                    'hits' in es_timeseries['hits']):
+                for ts in es_timeseries['hits']['hits']:
                     if ('_source' in ts and 'data' in ts['_source']):
-                        twitter_timeseries.append(ts['_source']['data'])
+                        timeseries.append(ts['_source']['data'])
 
-        return BulkResponse(twitter_timeseries, {}, len(twitter_timeseries),
-                            total_twitter_timeseries)
+        return timeseries, total_timeseries
 
-    # GET /contacts/<id>/instagrams (External)
-    @detail_route(methods=['get'], url_path='instagrams',
-                  permission_classes=[IsAuthenticated, IsAdminOrIsSelf])
-    def instagrams(self, request, pk=None):
+    def get_timeseries(self, request, pk, network):
         contact = self.get_contact_by_pk(request, pk)
+        timeseries, total_timeseries = self.search_timeseries(
+            request, contact, network)
+        return BulkResponse(timeseries, {}, len(timeseries),
+                            total_timeseries)
+
+    # GET /contacts/<id>/twittertimeseries (External)
+    @detail_route(methods=['get'], url_path='twittertimeseries',
+                  permission_classes=[IsAuthenticated, IsAdminOrIsSelf])
+    def twitter_timeseries(self, request, pk=None):
+        return self.get_timeseries(request, pk, 'twitter')
+
+    def search_instagrams(self, request, contact):
         instagram_posts = []
+        after = ''
         if contact.instagram != '':
-            limit, offset = get_pagination(request)
             query = {
-                'size': limit,
-                'from': offset,
                 'query': {
                     'bool': {
                         'should': [{
@@ -560,95 +563,51 @@ class ContactViewSet(NewsAIModelViewSet):
                 }]
             }
 
-            es_instagrams = es.search(
+            paginate_es_query(query, request)
+            es_instagrams = cached_es.search(
                 index='instagrams', doc_type='instagram', body=query)
+            after = get_es_after_cursor(es_instagrams, query)
             if 'hits' in es_instagrams and 'hits' in es_instagrams['hits']:
-                for es_instagram in es_instagrams['hits']['hits']:
-                    if ('_source' in es_instagram and
-                            'data' in es_instagram['_source']):
-                        es_instagram = format_es_response(es_instagram)
-                        es_instagram['type'] = 'instagrams'
-                        instagram_posts.append(es_instagram['_source']['data'])
+                instagram_posts = normalize_hits(
+                    es_instagrams['hits']['hits'])
 
+        return instagram_posts, len(instagram_posts), after
+
+    # GET /contacts/<id>/instagrams (External)
+    @detail_route(methods=['get'], url_path='instagrams',
+                  permission_classes=[IsAuthenticated, IsAdminOrIsSelf])
+    def instagrams(self, request, pk=None):
+        contact = self.get_contact_by_pk(request, pk)
+        instagram_posts, total, after = self.search_instagrams(
+            request, contact)
         return BulkResponse(instagram_posts, {}, len(instagram_posts),
-                            len(instagram_posts))
+                            total, after=after)
 
     # GET /contacts/<id>/instagramprofile (External)
     @detail_route(methods=['get'], url_path='instagramprofile',
                   permission_classes=[IsAuthenticated, IsAdminOrIsSelf])
     def instagram_profile(self, request, pk=None):
         contact = self.get_contact_by_pk(request, pk)
-        instagram_profile = {}
-        if contact.instagram != '':
-            query = {
-                'query': {
-                    'bool': {
-                        'must': [{
-                            'term': {
-                                'data.Username': contact.instagram
-                            }
-                        }]
-                    }
-                }
-            }
-
-            es_instagram_profile = es.search(
-                index='instagrams', doc_type='user', body=query)
-            if ('hits' in es_instagram_profile and
-                    'hits' in es_instagram_profile['hits']):
-                if len(es_instagram_profile['hits']['hits']) > 0:
-                    instagram_profile = es_instagram_profile[
-                        'hits']['hits'][0]['_source']['data']
-
-        return Response(instagram_profile, {})
+        return Response(self.get_social_profile(contact, 'instagram'), {})
 
     # GET /contacts/<id>/instagramtimeseries (External)
     @detail_route(methods=['get'], url_path='instagramtimeseries',
                   permission_classes=[IsAuthenticated, IsAdminOrIsSelf])
     def instagram_timeseries(self, request, pk=None):
-        contact = self.get_contact_by_pk(request, pk)
-
-        # Response to user
-        instagram_timeseries = []
-        total_instagram_timeseries = 0
-
-        if contact.instagram != '':
-            query = {
-                'query': {
-                    'bool': {
-                        'must': [{
-                            'term': {
-                                'data.Username': contact.instagram
-                            }
-                        }]
-                    }
-                },
-                'sort': [{
-                    'data.CreatedAt': {
-                        'order': 'desc',
-                        'mode': 'avg'
-                    }
-                }]
-            }
+        return self.get_timeseries(request, pk, 'instagram')
 
-            es_instagram_timeseries = es.search(
-                index='timeseries', doc_type='instagram', body=query)
-
-            if ('hits' in es_instagram_timeseries and
-                    'total' in es_instagram_timeseries['hits']):
-                total_instagram_timeseries = es_instagram_timeseries[
-                    'hits']['total']
-
-            if ('hits' in es_instagram_timeseries and
-                    'hits' in es_instagram_timeseries['hits']):
-                for ts in es_instagram_timeseries['hits']['hits']:
-                    if ('_source' in ts and 'data' in ts['_source']):
-                        # ts = format_es_response(ts)
-                        instagram_timeseries.append(ts['_source']['data'])
+    def get_contact_emails(self, request, contact):
+        return Email.objects.filter(
+            team=get_tenant(request).team,
+            to=contact.email,
+            is_sent=True,
+            delivered=True
+        ).order_by('-created')
 
-        return BulkResponse(instagram_timeseries, {},
-                            len(instagram_timeseries),
-                            total_instagram_timeseries)
+    def get_contact_lists(self, request, contact):
+        return MediaList.objects.filter(
+            contacts=contact, team=get_tenant(request).team,
+            archived=False).order_by('-created')
 
     # GET /contacts/<id>/feeds (External)
     @detail_route(methods=['get'], url_path='feeds',
@@ -667,13 +626,7 @@ class ContactViewSet(NewsAIModelViewSet):
                   permission_classes=[IsAuthenticated, IsAdminOrIsSelf])
     def emails(self, request, pk=None):
         contact = self.get_contact_by_pk(request, pk)
-        user_profile = UserProfile.objects.get(user=request.user)
-        queryset = Email.objects.filter(
-            team=user_profile.team,
-            to=contact.email,
-            is_sent=True,
-            delivered=True
-        ).order_by('-created')
+        queryset = self.get_contact_emails(request, contact)
 
         page = self.paginate_queryset(queryset)
         if page is not None:
@@ -689,19 +642,88 @@ class ContactViewSet(NewsAIModelViewSet):
                   permission_classes=[IsAuthenticated, IsAdminOrIsSelf])
     def lists(self, request, pk=None):
         contact = self.get_contact_by_pk(request, pk)
-        user_profile = UserProfile.objects.get(user=request.user)
-        queryset = MediaList.objects.filter(
-            contacts=contact, team=user_profile.team,
-            archived=False).order_by('-created')
+        queryset = self.get_contact_lists(request, contact)
 
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = MediaListSerializer(page, many=True)
             return self.get_paginated_response(serializer.data)
 
-        serializer = MediaListSerializer(queryset, many=True)
-        return BulkResponse(serializer.data, {},
-                            len(serializer.data), len(serializer.data))
+        return StreamingBulkResponse(
+            queryset, MediaListSerializer, self.get_serializer_context())
+
+    # GET /contacts/<id>/dashboard (External)
+    @detail_route(methods=['get'], url_path='dashboard',
+                  permission_classes=[IsAuthenticated, IsAdminOrIsSelf])
+    def dashboard(self, request, pk=None):
+        '''
+            Everything the contact profile shows, in one response. The
+            Elasticsearch sections run concurrently while the database
+            ones are read. `meta.timings` has the milliseconds each
+            section took; sections that failed are null and listed in
+            `meta.errors`.
+        '''
+        timings = {}
+        contact = timed(timings, 'lookup', lambda: get_object_or_404(
+            ContactListSerializer.prefetch(Contact.objects.filter(
+                team=get_tenant(request).team)), pk=pk))
+
+        searches = FanOut({
+            'tweets': lambda: self.search_tweets(request, contact),
+            'instagrams': lambda: self.search_instagrams(request, contact),
+            'twitterprofile': lambda: self.get_social_profile(
+                contact, 'twitter'),
+            'instagramprofile': lambda: self.get_social_profile(
+                contact, 'instagram'),
+            'twittertimeseries': lambda: self.search_timeseries(
+                request, contact, 'twitter'),
+            'instagramtimeseries': lambda: self.search_timeseries(
+                request, contact, 'instagram'),
+        })
+
+        dashboard = {
+            'contact': timed(timings, 'contact', lambda: ContactSerializer(
+                contact).data),
+            'feeds': timed(timings, 'feeds', lambda: FeedSerializer(
+                Feed.objects.filter(contact=contact), many=True).data),
+            'emails': timed(timings, 'emails', lambda: EmailSerializer(
+                self.get_contact_emails(request, contact)[
+                    :DASHBOARD_PAGE_SIZE], many=True).data),
+            'lists': timed(timings, 'lists', lambda: MediaListSerializer(
+                self.get_contact_lists(request, contact)[
+                    :DASHBOARD_PAGE_SIZE], many=True).data),
+        }
+        included = timed(timings, 'included',
+                         lambda: self.get_contact_included(contact))
+
+        results = searches.wait()
+        for name in ('tweets', 'instagrams'):
+            if name in results:
+                hits, total, after = results[name]
+                results[name] = {
+                    'data': hits,
+                    'total': total,
+                    'after': after,
+                }
+        for name in ('twittertimeseries', 'instagramtimeseries'):
+            if name in results:
+                timeseries, total = results[name]
+                results[name] = {
+                    'data': timeseries,
+                    'total': total,
+                }
+
+        for name in ('tweets', 'instagrams', 'twitterprofile',
+                     'instagramprofile', 'twittertimeseries',
+                     'instagramtimeseries'):
+            dashboard[name] = results.get(name)
+        timings.update(searches.timings)
+
+        return Response(dashboard, included, meta={
+            'timings': timings,
+            'errors': dict((name, str(error))
+                           for name, error in searches.errors.items()),
+        })
 
     # GET /contacts/<id>/enrich (External)
     @detail_route(methods=['get'], url_path='enrich',
@@ -743,13 +765,11 @@ class ContactViewSet(NewsAIModelViewSet):
     def add_employers(self, request, pk=None):
         contact = self.get_contact_by_pk(request, pk)
         if 'employers' in request.data:
-            for employer_id in request.data['employers']:
-                try:
-                    publication = Publication.objects.get(pk=employer_id)
-                    contact.employers.add(publication)
-                    contact.save()
-                except Publication.DoesNotExist:
-                    continue
+            publication_ids = resolve_publication_ids(
+                request.data['employers'])
+            if publication_ids:
+                contact.employers.add(*publication_ids)
+                contact.save()
 
             serializer = ContactSerializer(contact)
             return Response(serializer.data, {})
@@ -761,13 +781,11 @@ class ContactViewSet(NewsAIModelViewSet):
     def remove_employers(self, request, pk=None):
         contact = self.get_contact_by_pk(request, pk)
         if 'employers' in request.data:
-            for employer_id in request.data['employers']:
-                try:
-                    publication = Publication.objects.get(pk=employer_id)
-                    contact.employers.remove(publication)
-                    contact.save()
-                except Publication.DoesNotExist:
-                    continue
+            publication_ids = resolve_publication_ids(
+                request.data['employers'])
+            if publication_ids:
+                contact.employers.remove(*publication_ids)
+                contact.save()
 
             serializer = ContactSerializer(contact)
             return Response(serializer.data, {})
@@ -779,13 +797,11 @@ class ContactViewSet(NewsAIModelViewSet):
     def add_past_employers(self, request, pk=None):
         contact = self.get_contact_by_pk(request, pk)
         if 'employers' in request.data:
-            for employer_id in request.data['employers']:
-                try:
-                    publication = Publication.objects.get(pk=employer_id)
-                    contact.past_employers.add(publication)
-                    contact.save()
-                except Publication.DoesNotExist:
-                    continue
+            publication_ids = resolve_publication_ids(
+                request.data['employers'])
+            if publication_ids:
+                contact.past_employers.add(*publication_ids)
+                contact.save()
 
             serializer = ContactSerializer(contact)
             return Response(serializer.data, {})
@@ -797,13 +813,11 @@ class ContactViewSet(NewsAIModelViewSet):
     def remove_past_employers(self, request, pk=None):
         contact = self.get_contact_by_pk(request, pk)
         if 'employers' in request.data:
-            for employer_id in request.data['employers']:
-                try:
-                    publication = Publication.objects.get(pk=employer_id)
-                    contact.past_employers.remove(publication)
-                    contact.save()
-                except Publication.DoesNotExist:
-                    continue
+            publication_ids = resolve_publication_ids(
+                request.data['employers'])
+            if publication_ids:
+                contact.past_employers.remove(*publication_ids)
+                contact.save()
 
             serializer = ContactSerializer(contact)
             return Response(serializer.data, {})
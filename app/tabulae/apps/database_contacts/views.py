@@ -10,7 +10,8 @@ from rest_framework.filters import OrderingFilter
 
 # Imports from app
 from tabulae.apps.general.viewset import NewsAIModelViewSet
-from tabulae.apps.general.response import Response, BulkResponse
+from tabulae.apps.general.response import (
+	Response, BulkResponse, StreamingBulkResponse)
 from tabulae.apps.general.permissions import IsAdminOrIsSelf
 from .models import DatabaseContact
 from .permissions import DatabaseContactPermission
@@ -56,9 +57,9 @@ class DatabaseContactViewSet(NewsAIModelViewSet):
 			serializer = self.get_serializer(page, many=True)
 			return self.get_paginated_response(serializer.data)
 
-		serializer = self.get_serializer(queryset, many=True)
-		return BulkResponse(serializer.data, {},
-							len(serializer.data), len(serializer.data))
+		return StreamingBulkResponse(
+			queryset, self.get_serializer_class(),
+			self.get_serializer_context())
 
 	def get_queryset(self,):
 		if self.request.user and self.request.user.is_authenticated():
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+# Core Django imports
+from django.core.management.base import BaseCommand
+
+# Imports from app
+from tabulae.apps.emails.models import Email
+from tabulae.apps.emails.utils import record_last_contacted
+
+
+class Command(BaseCommand):
+    help = ('Fills the last contacted index from the emails already '
+            'delivered. Safe to run again: dates only move forward.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        emails = Email.objects.filter(
+            is_sent=True, delivered=True, cancel=False).only(
+            'pk', 'team', 'contact', 'to', 'send_at', 'created').order_by('pk')
+
+        last_pk = 0
+        total = 0
+        while True:
+            batch = list(emails.filter(pk__gt=last_pk)[:options['batch']])
+            if not batch:
+                break
+
+            record_last_contacted(batch, sent_at_creation=True)
+            last_pk = batch[-1].pk
+            total += len(batch)
+
+        self.stdout.write('%d emails recorded' % total)
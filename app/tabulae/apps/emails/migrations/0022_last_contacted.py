@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.6 on 2017-11-20 17:05
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('contacts', '0009_contactsocialfields'),
+        ('publications', '0003_auto_20171030_2130'),
+        ('users', '0030_auto_20171116_0007'),
+        ('emails', '0021_campaign_replies'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContactLastContacted',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('last_contacted', models.DateTimeField(db_index=True)),
+                ('contact', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contacts.Contact')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='users.Team')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PublicationLastContacted',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('updated', models.DateTimeField(auto_now=True)),
+                ('last_contacted', models.DateTimeField(db_index=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('publication', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='publications.Publication')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='users.Team')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='publicationlastcontacted',
+            unique_together=set([('team', 'publication')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='contactlastcontacted',
+            unique_together=set([('team', 'contact')]),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.6 on 2017-11-21 10:12
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('users', '0030_auto_20171116_0007'),
+        ('emails', '0022_last_contacted'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='contactlastcontacted',
+            name='team',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='users.Team'),
+        ),
+        migrations.AlterField(
+            model_name='publicationlastcontacted',
+            name='team',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='users.Team'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='publicationlastcontacted',
+            unique_together=set([('team', 'publication'), ('created_by', 'publication')]),
+        ),
+        migrations.AlterUniqueTogether(
+            name='contactlastcontacted',
+            unique_together=set([('team', 'contact'), ('created_by', 'contact')]),
+        ),
+    ]
@@ -231,3 +231,35 @@ class Email(BaseModel):
         user_profile = UserProfile.objects.get(user=self.created_by)
         return self.send_nylas_email(
             user_profile.external_email_access_token)
+
+
+class ContactLastContacted(BaseModel):
+    '''
+        When a team last emailed a contact, kept up to date as emails
+        are sent and delivered instead of being scanned from Email.
+        Users without a team have rows of their own, keyed on
+        `created_by` with no team.
+    '''
+    team = models.ForeignKey('users.Team', related_name='+', null=True,
+                             blank=True)
+    contact = models.ForeignKey('contacts.Contact', related_name='+')
+    last_contacted = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = (('team', 'contact',), ('created_by', 'contact',),)
+
+
+class PublicationLastContacted(BaseModel):
+    '''
+        When a team (or a user without one) last emailed anyone employed
+        by a publication.
+    '''
+    team = models.ForeignKey('users.Team', related_name='+', null=True,
+                             blank=True)
+    publication = models.ForeignKey(
+        'publications.Publication', related_name='+')
+    last_contacted = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = (('team', 'publication',),
+                           ('created_by', 'publication',),)
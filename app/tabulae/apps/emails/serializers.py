@@ -16,7 +16,8 @@ from tabulae.apps.lists.models import MediaList
 from tabulae.apps.templates.models import Template
 from tabulae.apps.contacts.models import Contact
 from tabulae.apps.files.models import File
-from tabulae.apps.users.models import Client, Team, UserProfile
+from tabulae.apps.users.models import Client, Team
+from tabulae.apps.users.utils import get_user_profile
 from .models import Email, Campaign
 
 
@@ -73,7 +74,7 @@ class CampaignSerializer(ModelSerializer):
         model = Campaign
 
 
-class EmailSerializer(ModelSerializer):
+class EmailSerializer(DynamicFieldsModelSerializer):
 
     list_in = PrimaryKeyRelatedField(
         queryset=MediaList.objects.all(),
@@ -196,73 +197,78 @@ class EmailSerializer(ModelSerializer):
         write_only=False,
         allow_null=True)
 
-    def to_representation(self, obj):
-        has_data = False
-        included = {}
-        if isinstance(obj, dict):
-            if 'data' in obj and 'included' in obj:
-                has_data = True
-                included = obj['included']
+    representation = (
+        ('id', 'pk'),
+        ('type', lambda obj: 'emails'),
+        ('createdby', 'created_by_id'),
+        ('created', 'created'),
+        ('updated', 'updated'),
 
-                obj = obj['data']
+        ('method', 'method'),
 
-        email = {
-            'id': obj.pk,
-            'type': 'emails',
-            'createdby': obj.created_by and obj.created_by.pk,
-            'created': obj.created,
-            'updated': obj.updated,
+        ('listid', 'list_in_id'),
+        ('contactid', 'contact_id'),
+        ('clientid', 'client_id'),
+        ('templateid', 'template_id'),
 
-            'method': obj.method,
+        ('fromemail', 'from_email'),
 
-            'listid': obj.list_in and obj.list_in.pk,
-            'contactid': obj.contact and obj.contact.pk,
-            'clientid': obj.client and obj.client.pk,
-            'templateid': obj.template and obj.template.pk,
+        ('campaign', 'campaign_id'),
 
-            'fromemail': obj.from_email,
+        ('sender', 'sender'),
+        ('to', 'to'),
+        ('subject', 'subject'),
+        ('baseSubject', 'base_subject'),
+        ('body', 'body'),
 
-            'campaign': obj.campaign and obj.campaign.pk,
+        ('cc', 'CC'),
+        ('bcc', 'BCC'),
 
-            'sender': obj.sender,
-            'to': obj.to,
-            'subject': obj.subject,
-            'baseSubject': obj.base_subject,
-            'body': obj.body,
+        ('firstname', 'first_name'),
+        ('lastname', 'last_name'),
 
-            'cc': obj.CC,
-            'bcc': obj.BCC,
+        ('sendat', 'send_at'),
 
-            'firstname': obj.first_name,
-            'lastname': obj.last_name,
+        ('sendgridid', 'sendgrid_id'),
 
-            'sendat': obj.send_at,
+        ('nylasid', 'nylas_id'),
+        ('nylasthreadid', 'nylas_thread_id'),
 
-            'sendgridid': obj.sendgrid_id,
+        ('teamid', 'team_id'),
 
-            'nylasid': obj.nylas_id,
-            'nylasthreadid': obj.nylas_thread_id,
+        ('attachments', lambda obj: [
+            attachment.pk for attachment in obj.attachments.all()]),
 
-            'teamid': obj.team and obj.team.pk,
+        ('delivered', 'delivered'),
+        ('bouncedreason', 'bounced_reasons'),
+        ('bounced', 'bounced'),
+        ('clicked', 'clicked'),
+        ('opened', 'opened'),
+        ('spam', 'spam'),
+        ('cancel', 'cancel'),
+        ('dropped', 'dropped'),
 
-            'attachments': obj.attachments and obj.attachments.values_list(
-                    'id', flat=True),
+        ('sendgridopened', 'sendgrid_opened'),
+        ('sendgridclicked', 'sendgrid_clicked'),
 
-            'delivered': obj.delivered,
-            'bouncedreason': obj.bounced_reasons,
-            'bounced': obj.bounced,
-            'clicked': obj.clicked,
-            'opened': obj.opened,
-            'spam': obj.spam,
-            'cancel': obj.cancel,
-            'dropped': obj.dropped,
-
-            'sendgridopened': obj.sendgrid_opened,
-            'sendgridclicked': obj.sendgrid_clicked,
-
-            'archived': obj.archived,
-            'issent': obj.is_sent,
-        }
+        ('archived', 'archived'),
+        ('issent', 'is_sent'),
+    )
+    sparse_prefetch = {
+        'attachments': ('attachments',),
+    }
+
+    def to_representation(self, obj):
+        has_data = False
+        included = {}
+        if isinstance(obj, dict):
+            if 'data' in obj and 'included' in obj:
+                has_data = True
+                included = obj['included']
+
+                obj = obj['data']
+
+        email = self.represent(obj)
 
         if has_data:
             return {
@@ -315,15 +321,12 @@ class EmailSerializer(ModelSerializer):
         if len(attachments) > 0:
             email.attachments.set(attachments)
 
-        user = None
         request = self.context.get('request')
-        if request and hasattr(request, 'user'):
-            user = request.user
 
-        user_profile = UserProfile.objects.get(user=user)
+        user_profile = get_user_profile(request)
         email.method = user_profile.get_user_email_provider()
         email.team = user_profile.team
-        email.created_by = user
+        email.created_by = request.user
         email.save()
 
         return email
@@ -406,12 +409,9 @@ class EmailSerializer(ModelSerializer):
         email.is_sent = validated_data.get(
             'is_sent', email.is_sent)
 
-        user = None
         request = self.context.get('request')
-        if request and hasattr(request, 'user'):
-            user = request.user
 
-        user_profile = UserProfile.objects.get(user=user)
+        user_profile = get_user_profile(request)
         email.method = user_profile.get_user_email_provider()
         email.team = user_profile.team
         email.save()
@@ -8,6 +8,7 @@ from celery import shared_task
 
 # Imports from app
 from tabulae.apps.emails.models import Email
+from tabulae.apps.emails.utils import record_last_contacted
 
 
 @shared_task
@@ -19,6 +20,7 @@ def send_sendgrid(email_id):
 
         if response._status_code == 202:
             email.save()
+            record_last_contacted([email])
             return True
         else:
             raise Exception(response)
@@ -33,6 +35,7 @@ def send_gmail(email_id):
 
         if response:
             email.save()
+            record_last_contacted([email])
             return True
     return False
 
@@ -46,6 +49,7 @@ def send_outlook(email_id):
 
         if response:
             email.save()
+            record_last_contacted([email])
             return True
     return False
 
@@ -59,5 +63,6 @@ def send_smtp(email_id):
 
         if response:
             email.save()
+            record_last_contacted([email])
             return True
     return False
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+# Stdlib imports
+import datetime
+
+# Core Django imports
+from django.db import connection
+from django.db.models import DateTimeField, F, Max, OuterRef, Subquery
+from django.db.models.functions import Lower
+
+# Imports from app
+from tabulae.apps.contacts.models import Contact
+from .models import ContactLastContacted, PublicationLastContacted
+
+# `?order=` keys of the last contacted columns
+LAST_CONTACTED_FIELDS = ('lastcontacted', 'publicationlastcontacted',)
+
+
+def _get_owner(team, user):
+    # Rows belong to the team, or to the user when they have none
+    if team is not None:
+        return {'team': team}
+    return {'team': None, 'created_by': user}
+
+
+def _upsert_last_contacted(model, column, owner, owner_id, contacted):
+    # One statement per team (or teamless user), whatever the number of
+    # rows, and safe against concurrent senders: a date only ever moves
+    # forward. `owner` is the column the rows are keyed on.
+    if not contacted:
+        return
+
+    table = model._meta.db_table
+    ids = sorted(contacted)
+    now = datetime.datetime.now()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'INSERT INTO {table} (created, updated, {owner}, {column}, '
+            'last_contacted) '
+            'SELECT %s, %s, %s, contacted.id, contacted.last_contacted '
+            'FROM unnest(%s::integer[], %s::timestamp[]) '
+            'AS contacted (id, last_contacted) '
+            'ON CONFLICT ({owner}, {column}) DO UPDATE SET '
+            'last_contacted = EXCLUDED.last_contacted, '
+            'updated = EXCLUDED.updated '
+            'WHERE {table}.last_contacted < EXCLUDED.last_contacted'.format(
+                table=table, owner=owner, column=column),
+            [now, now, owner_id, ids, [contacted[pk] for pk in ids]])
+
+
+def _get_contacted_at(email, now, sent_at_creation):
+    if email.send_at is not None and email.send_at < now:
+        return email.send_at
+    if sent_at_creation:
+        return email.created
+    return now
+
+
+def record_last_contacted(emails, include_scheduled=True,
+                          sent_at_creation=False):
+    '''
+        Moves the last contacted dates of the contacts `emails` went to,
+        and of their publications, forward. Contacts are the email's own
+        plus the team's contacts with that address; emails sent without
+        a team count for their sender and the sender's own contacts.
+
+        Emails count as sent now, or at `send_at` once it has passed.
+        With `include_scheduled=False` emails set to go out later are
+        skipped, and `sent_at_creation` dates past emails by `created`.
+    '''
+    now = datetime.datetime.now()
+
+    owners = {}
+    for email in emails:
+        if not include_scheduled and email.send_at is not None and (
+                email.send_at > now):
+            continue
+        if email.team_id is not None:
+            owner = ('team_id', email.team_id)
+        elif email.created_by_id is not None:
+            owner = ('created_by_id', email.created_by_id)
+        else:
+            continue
+        owners.setdefault(owner, []).append(email)
+
+    for (owner, owner_id), team_emails in owners.items():
+        by_address = {}
+        contacted = {}
+        for email in team_emails:
+            contacted_at = _get_contacted_at(
+                email, now, sent_at_creation)
+            if email.contact_id is not None:
+                contacted[email.contact_id] = max(
+                    contacted.get(email.contact_id, contacted_at),
+                    contacted_at)
+            if email.to:
+                address = email.to.lower()
+                by_address[address] = max(
+                    by_address.get(address, contacted_at), contacted_at)
+
+        # Addresses are stored as typed; compare them lowercased
+        for contact_id, address in Contact.objects.annotate(
+                email_lower=Lower('email')).filter(**{
+                    owner: owner_id,
+                    'email_lower__in': by_address.keys(),
+                }).values_list('pk', 'email_lower'):
+            contacted_at = by_address.get(address)
+            if contacted_at is not None:
+                contacted[contact_id] = max(
+                    contacted.get(contact_id, contacted_at), contacted_at)
+
+        publications = {}
+        for contact_id, publication_id in (
+                Contact.employers.through.objects.filter(
+                    contact_id__in=contacted.keys()).values_list(
+                    'contact_id', 'publication_id')):
+            publications[publication_id] = max(
+                publications.get(publication_id, contacted[contact_id]),
+                contacted[contact_id])
+
+        _upsert_last_contacted(
+            ContactLastContacted, 'contact_id', owner, owner_id, contacted)
+        _upsert_last_contacted(
+            PublicationLastContacted, 'publication_id', owner, owner_id,
+            publications)
+
+
+def get_last_contacted(team, user, contact_ids):
+    '''
+        Returns {contact id: (last contacted, publication last contacted)}
+        for `contact_ids`, as seen by `team` (or `user` when it has none),
+        in three queries whatever their number. Publication last
+        contacted is the latest of the contact's current employers.
+    '''
+    owner = _get_owner(team, user)
+    last_contacted = dict(ContactLastContacted.objects.filter(
+        contact_id__in=contact_ids, **owner).values_list(
+        'contact_id', 'last_contacted'))
+
+    employers = list(Contact.employers.through.objects.filter(
+        contact_id__in=contact_ids).values_list(
+        'contact_id', 'publication_id'))
+    publications = dict(PublicationLastContacted.objects.filter(
+        publication_id__in=set(
+            publication_id for _, publication_id in employers),
+        **owner).values_list('publication_id', 'last_contacted'))
+
+    publication_last_contacted = {}
+    for contact_id, publication_id in employers:
+        contacted_at = publications.get(publication_id)
+        if contacted_at is not None:
+            publication_last_contacted[contact_id] = max(
+                publication_last_contacted.get(contact_id, contacted_at),
+                contacted_at)
+
+    return dict((contact_id, (
+        last_contacted.get(contact_id),
+        publication_last_contacted.get(contact_id),
+    )) for contact_id in contact_ids)
+
+
+def get_last_contacted_updated(team, user):
+    '''
+        When any of the team's (or teamless user's) last contacted dates
+        last moved, for validators of responses that include them.
+    '''
+    owner = _get_owner(team, user)
+    updated = [model.objects.filter(**owner).aggregate(
+        updated=Max('updated'))['updated']
+        for model in (ContactLastContacted, PublicationLastContacted)]
+    return max(updated) if any(updated) else None
+
+
+def order_by_last_contacted(queryset, ordering, team, user):
+    '''
+        Orders contacts by `lastcontacted` or `publicationlastcontacted`
+        given as `?order=`, never contacted last. Returns None for any
+        other ordering.
+    '''
+    descending = ordering.startswith('-')
+    field = ordering.lstrip('-')
+    if field not in LAST_CONTACTED_FIELDS:
+        return None
+
+    owner = _get_owner(team, user)
+    if field == 'lastcontacted':
+        contacted = ContactLastContacted.objects.filter(
+            contact_id=OuterRef('pk'), **owner).values('last_contacted')
+    else:
+        publication_contacted = PublicationLastContacted.objects.filter(
+            publication_id=OuterRef('publication_id'), **owner).values(
+            'last_contacted')
+        contacted = Contact.employers.through.objects.filter(
+            contact_id=OuterRef('pk')).annotate(
+            contacted=Subquery(publication_contacted[:1],
+                               output_field=DateTimeField())).exclude(
+            contacted=None).order_by('-contacted').values('contacted')
+
+    queryset = queryset.annotate(
+        last_contacted_order=Subquery(
+            contacted[:1], output_field=DateTimeField()))
+    expression = F('last_contacted_order')
+    if descending:
+        expression = expression.desc(nulls_last=True)
+    else:
+        expression = expression.asc(nulls_last=True)
+    return queryset.order_by(expression, '-created', '-pk')
@@ -22,9 +22,10 @@ from rest_framework.parsers import (
 
 # Imports from app
 from tabulae.apps.general.viewset import NewsAIModelViewSet
-from tabulae.apps.general.response import Response, BulkResponse
+from tabulae.apps.general.response import (
+    Response, BulkResponse, StreamingBulkResponse)
 from tabulae.apps.general.permissions import IsAdminOrIsSelf
-from tabulae.apps.users.models import UserProfile
+from tabulae.apps.users.utils import get_tenant
 from tabulae.apps.files.models import File, EmailImage
 from tabulae.apps.files.serializers import EmailImageSerializer, FileSerializer
 from .filters import FilterBetweenField
@@ -32,6 +33,7 @@ from .models import Email, Campaign
 from .serializers import EmailSerializer, CampaignSerializer
 from .permissions import EmailPermission
 from .tasks import send_sendgrid, send_gmail, send_outlook, send_smtp
+from .utils import record_last_contacted
 
 
 class EmailViewSet(NewsAIModelViewSet):
@@ -42,6 +44,7 @@ class EmailViewSet(NewsAIModelViewSet):
     queryset = Email.objects.all()
     serializer_class = EmailSerializer
     permission_classes = (EmailPermission,)
+    pagination_mode = 'cursor'
     filter_backends = (DjangoFilterBackend, OrderingFilter,
                        SearchFilter, FilterBetweenField)
     paginate_by_param = 'limit'
@@ -69,6 +72,9 @@ class EmailViewSet(NewsAIModelViewSet):
                 send_smtp.apply_async(
                     args=[email.pk], queue='emails',)
 
+        # Scheduled emails count once they are delivered
+        record_last_contacted(emails, include_scheduled=False)
+
     def _emails_to_campaign(self, emails):
         campaign = None
         if len(emails) > 0:
@@ -151,9 +157,9 @@ class EmailViewSet(NewsAIModelViewSet):
             serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
 
-        serializer = self.get_serializer(queryset, many=True)
-        return BulkResponse(serializer.data, {},
-                            len(serializer.data), len(serializer.data))
+        return StreamingBulkResponse(
+            queryset, self.get_serializer_class(),
+            self.get_serializer_context())
 
     def get_queryset(self):
         if self.request.user and self.request.user.is_authenticated():
@@ -177,9 +183,8 @@ class EmailViewSet(NewsAIModelViewSet):
                 permission_classes=[IsAdminOrIsSelf])
     def team(self, request):
         if self.request.user and self.request.user.is_authenticated():
-            user_profile = UserProfile.objects.get(user=request.user)
             emails = Email.objects.filter(
-                team=user_profile.team, archived=False
+                team=get_tenant(request).team, archived=False
             ).filter(~Q(created_by=self.request.user))
 
             page = self.paginate_queryset(emails)
@@ -187,9 +192,9 @@ class EmailViewSet(NewsAIModelViewSet):
                 serializer = self.get_serializer(page, many=True)
                 return self.get_paginated_response(serializer.data)
 
-            serializer = self.get_serializer(emails, many=True)
-            return BulkResponse(serializer.data, {},
-                                len(serializer.data), len(serializer.data))
+            return StreamingBulkResponse(
+                emails, self.get_serializer_class(),
+                self.get_serializer_context())
         raise NotAuthenticated()
 
     # GET /emails/<id> if id == 'scheduled' (External)
@@ -208,9 +213,9 @@ class EmailViewSet(NewsAIModelViewSet):
                 serializer = self.get_serializer(page, many=True)
                 return self.get_paginated_response(serializer.data)
 
-            serializer = self.get_serializer(emails, many=True)
-            return BulkResponse(serializer.data, {},
-                                len(serializer.data), len(serializer.data))
+            return StreamingBulkResponse(
+                emails, self.get_serializer_class(),
+                self.get_serializer_context())
         raise NotAuthenticated()
 
     # GET /emails/<id> if id == 'archived' (External)
@@ -227,9 +232,9 @@ class EmailViewSet(NewsAIModelViewSet):
                 serializer = self.get_serializer(page, many=True)
                 return self.get_paginated_response(serializer.data)
 
-            serializer = self.get_serializer(emails, many=True)
-            return BulkResponse(serializer.data, {},
-                                len(serializer.data), len(serializer.data))
+            return StreamingBulkResponse(
+                emails, self.get_serializer_class(),
+                self.get_serializer_context())
         raise NotAuthenticated()
 
     # GET /emails/<id> if id == 'cancelscheduled' (External)
@@ -260,7 +265,6 @@ class EmailViewSet(NewsAIModelViewSet):
                 permission_classes=[IsAdminOrIsSelf])
     def sent(self, request):
         if self.request.user and self.request.user.is_authenticated():
-            user_profile = UserProfile.objects.get(user=request.user)
             emails = Email.objects.filter(created_by=request.user,
                                           archived=False,
                                           is_sent=True,
@@ -272,9 +276,9 @@ class EmailViewSet(NewsAIModelViewSet):
                 serializer = self.get_serializer(page, many=True)
                 return self.get_paginated_response(serializer.data)
 
-            serializer = self.get_serializer(emails, many=True)
-            return BulkResponse(serializer.data, {},
-                                len(serializer.data), len(serializer.data))
+            return StreamingBulkResponse(
+                emails, self.get_serializer_class(),
+                self.get_serializer_context())
         raise NotAuthenticated()
 
     # GET /emails/<id> if id == 'stats' (External)
@@ -4,7 +4,6 @@ from django.contrib.auth import get_user_model
 
 # Third-party app imports
 from rest_framework.serializers import (
-    ModelSerializer,
     URLField,
     BooleanField,
     PrimaryKeyRelatedField,
@@ -12,6 +11,7 @@ from rest_framework.serializers import (
 
 # Imports from app
 from tabulae.apps.contacts.serializers import ContactSerializer
+from tabulae.apps.general.serializers import DynamicFieldsModelSerializer
 from tabulae.apps.contacts.models import Contact
 from tabulae.apps.lists.serializers import MediaListSerializer
 from tabulae.apps.lists.models import MediaList
@@ -20,7 +20,7 @@ from tabulae.apps.publications.models import Publication
 from .models import Feed
 
 
-class FeedSerializer(ModelSerializer):
+class FeedSerializer(DynamicFieldsModelSerializer):
 
     url = URLField(source='feed_url', required=False)
     feed_url = URLField(required=False)
@@ -53,6 +53,20 @@ class FeedSerializer(ModelSerializer):
 
     running = BooleanField(required=False)
 
+    representation = (
+        ('id', 'pk'),
+        ('type', lambda obj: 'feeds'),
+        ('createdby', 'created_by_id'),
+        ('created', 'created'),
+        ('updated', 'updated'),
+
+        ('url', 'feed_url'),
+        ('contactid', 'contact_id'),
+        ('publicationid', 'publication_id'),
+        ('validfeed', 'valid_feed'),
+        ('running', 'running'),
+    )
+
     def to_representation(self, obj):
         has_data = False
         included = {}
@@ -63,19 +77,7 @@ class FeedSerializer(ModelSerializer):
 
                 obj = obj['data']
 
-        feed = {
-            'id': obj.pk,
-            'type': 'feeds',
-            'createdby': obj.created_by and obj.created_by.pk,
-            'created': obj.created,
-            'updated': obj.updated,
-
-            'url': obj.feed_url,
-            'contactid': obj.contact and obj.contact.pk,
-            'publicationid': obj.publication and obj.publication.pk,
-            'validfeed': obj.valid_feed,
-            'running': obj.running,
-        }
+        feed = self.represent(obj)
 
         if has_data:
             return {
@@ -16,7 +16,7 @@ from rest_framework.exceptions import NotAuthenticated
 
 # Imports from app
 from tabulae.apps.general.viewset import NewsAIModelViewSet
-from tabulae.apps.general.response import Response, BulkResponse
+from tabulae.apps.general.response import Response, StreamingBulkResponse
 from tabulae.apps.general.elastic_search import es
 from tabulae.apps.general.permissions import IsAdminOrIsSelf
 from tabulae.apps.users.models import UserProfile
@@ -56,9 +56,9 @@ class FeedViewSet(NewsAIModelViewSet):
             serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
 
-        serializer = self.get_serializer(queryset, many=True)
-        return BulkResponse(serializer.data, {},
-                            len(serializer.data), len(serializer.data))
+        return StreamingBulkResponse(
+            queryset, self.get_serializer_class(),
+            self.get_serializer_context())
 
     def get_queryset(self,):
         if self.request.user and self.request.user.is_authenticated():
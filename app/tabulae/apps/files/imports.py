@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+# Stdlib imports
+import datetime
+from itertools import islice
+
+# Core Django imports
+from django.db import DatabaseError, transaction
+from django.db.models import F, Q
+from django.utils import encoding
+
+# Imports from app
+from tabulae.apps.contacts.models import Contact, CustomContactField
+from tabulae.apps.lists.models import CustomFieldsMap, MediaList
+from tabulae.apps.publications.utils import resolve_publication_names
+from .models import File
+
+# Rows parsed and written per transaction
+IMPORT_CHUNK_SIZE = 500
+# Rows from the top of a sheet sampled for the header preview
+HEADER_SAMPLE_ROWS = 15
+
+# File.import_status of a background import
+IMPORT_QUEUED = 'queued'
+IMPORT_RUNNING = 'running'
+IMPORT_DONE = 'done'
+IMPORT_FAILED = 'failed'
+
+# A run of the import task gets more time than the other tasks; when it
+# runs out it queues the next one
+IMPORT_SOFT_TIME_LIMIT = 60 * 10
+IMPORT_TIME_LIMIT = 60 * 11
+# A queued or running import that hasn't committed anything for this
+# long is taken to be dead (its task killed, or never queued), and
+# another one may claim the file
+IMPORT_STALE_AFTER = datetime.timedelta(seconds=IMPORT_TIME_LIMIT + 60 * 5)
+
+# Columns that map to a Contact attribute; every other column (except
+# `ignore_column`) becomes a custom field
+CONTACT_COLUMNS = {
+    'firstname': 'first_name',
+    'lastname': 'last_name',
+    'email': 'email',
+    'notes': 'notes',
+    'linkedin': 'linkedin',
+    'twitter': 'twitter',
+    'instagram': 'instagram',
+    'blog': 'blog',
+    'location': 'location',
+    'phonenumber': 'phone_number',
+}
+EMPLOYER_COLUMNS = ('employers', 'pastemployers',)
+
+
+def is_custom_field(column):
+    return column not in CONTACT_COLUMNS and column not in (
+        EMPLOYER_COLUMNS + ('website', 'ignore_column',))
+
+
+def cell_value(cell):
+    value = getattr(cell, 'value', None)
+    if value is None:
+        return ''
+    return encoding.force_text(value).strip()
+
+
+def iter_row_values(ws):
+    '''
+        Streams the rows of a read-only worksheet as lists of stripped
+        strings, one row in memory at a time. (openpyxl 2.4 has no
+        `values_only`, so the values are read off the cells here.)
+    '''
+    for row in ws.iter_rows():
+        yield [cell_value(cell) for cell in row]
+
+
+def find_first_row(rows):
+    '''
+        Skips the empty rows a sheet may start with. Returns the number
+        of columns of the first row that has any, and an iterator over
+        the rows from that one on.
+    '''
+    for row in rows:
+        if len(row) > 0:
+            return len(row), _prepend(row, rows)
+    return 0, iter(())
+
+
+def _prepend(row, rows):
+    yield row
+    for next_row in rows:
+        yield next_row
+
+
+def sniff_headers(rows):
+    '''
+        Returns the header preview of a sheet's rows (value lists): one
+        {'rows': [...]} per column with its first values. Reads no
+        further than HEADER_SAMPLE_ROWS rows however long the sheet is.
+    '''
+    number_of_columns, rows = find_first_row(
+        islice(rows, HEADER_SAMPLE_ROWS))
+
+    headers = [{'rows': []} for _ in xrange(number_of_columns)]
+    for row in rows:
+        for i, value in enumerate(row[:number_of_columns]):
+            headers[i]['rows'].append(value)
+    return headers
+
+
+def claim_import(file):
+    '''
+        Marks a file's import queued, unless another one is queued or
+        running and still alive. Returns whether the file was claimed.
+    '''
+    now = datetime.datetime.now()
+    claimed = File.objects.filter(pk=file.pk).filter(
+        ~Q(import_status__in=(IMPORT_QUEUED, IMPORT_RUNNING)) |
+        Q(import_heartbeat__isnull=True) |
+        Q(import_heartbeat__lt=now - IMPORT_STALE_AFTER),
+    ).update(import_status=IMPORT_QUEUED, import_heartbeat=now)
+    if claimed:
+        file.import_status = IMPORT_QUEUED
+        file.import_heartbeat = now
+    return bool(claimed)
+
+
+def release_import(file, error):
+    '''
+        Marks a file's import failed, which lets the next one claim it.
+    '''
+    file.import_status = IMPORT_FAILED
+    file.import_error = error
+    File.objects.filter(pk=file.pk).update(
+        import_status=IMPORT_FAILED, import_error=error)
+
+
+def chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ContactImporter(object):
+    '''
+        Imports spreadsheet rows as contacts of a media list, following
+        `file.order`, a fixed number of rows at a time.
+
+        Every chunk costs the same few statements whatever its content:
+        one lookup and at most one insert for the employers it names
+        (none for the ones that exist), bulk inserts for the
+        contacts and their custom fields, and one bulk insert per
+        through table (custom fields, employers, past employers and the
+        list's contacts).
+    '''
+
+    def __init__(self, file, media_list, user, team,
+                 chunk_size=IMPORT_CHUNK_SIZE):
+        self.file = file
+        self.media_list = media_list
+        self.user = user
+        self.team = team
+        self.chunk_size = chunk_size
+
+    def parse_row(self, values):
+        contact = Contact(created_by=self.user, team=self.team)
+        custom_fields = []
+        employers = {
+            'employers': [],
+            'pastemployers': [],
+        }
+
+        for column, value in zip(self.file.order, values):
+            if column == 'ignore_column':
+                continue
+
+            if column in CONTACT_COLUMNS:
+                setattr(contact, CONTACT_COLUMNS[column], value)
+            elif column == 'website':
+                if value != '':
+                    contact.websites = [value]
+            elif column in EMPLOYER_COLUMNS:
+                if value != '':
+                    employers[column].append(value)
+            else:
+                custom_fields.append(CustomContactField(
+                    name=column, value=value, created_by=self.user))
+
+        return (contact, custom_fields, employers['employers'],
+                employers['pastemployers'])
+
+    def write_rows(self, parsed, publications):
+        '''
+            Writes parsed rows and returns the contacts created.
+        '''
+        with transaction.atomic():
+            contacts = Contact.objects.bulk_create(
+                [contact for contact, _, _, _ in parsed])
+            custom_fields = CustomContactField.objects.bulk_create(
+                [custom_field for _, fields, _, _ in parsed
+                 for custom_field in fields])
+
+            custom_field_links = []
+            employer_links = []
+            past_employer_links = []
+            media_list_links = []
+
+            custom_fields = iter(custom_fields)
+            for contact, (_, fields, employers, past_employers) in zip(
+                    contacts, parsed):
+                for _ in fields:
+                    custom_field_links.append(Contact.custom_fields.through(
+                        contact_id=contact.pk,
+                        customcontactfield_id=next(custom_fields).pk))
+                for publication_id in set(
+                        publications[name] for name in employers):
+                    employer_links.append(Contact.employers.through(
+                        contact_id=contact.pk,
+                        publication_id=publication_id))
+                for publication_id in set(
+                        publications[name] for name in past_employers):
+                    past_employer_links.append(
+                        Contact.past_employers.through(
+                            contact_id=contact.pk,
+                            publication_id=publication_id))
+                media_list_links.append(MediaList.contacts.through(
+                    medialist_id=self.media_list.pk, contact_id=contact.pk))
+
+            Contact.custom_fields.through.objects.bulk_create(
+                custom_field_links)
+            Contact.employers.through.objects.bulk_create(employer_links)
+            Contact.past_employers.through.objects.bulk_create(
+                past_employer_links)
+            MediaList.contacts.through.objects.bulk_create(media_list_links)
+
+        return contacts
+
+    def import_chunk(self, index, rows):
+        '''
+            Writes chunk number `index` and records it on the file in the
+            same transaction, so a chunk is either imported and counted or
+            neither. When the chunk can't be written as a whole its rows
+            are written one by one and the ones that fail are skipped. A
+            chunk already committed, by this run or a concurrent one, is
+            not written again.
+        '''
+        parsed = [self.parse_row(values) for values in rows]
+        publications = resolve_publication_names(set(
+            name for _, _, employers, past_employers in parsed
+            for name in employers + past_employers), user=self.user)
+
+        failed = 0
+        with transaction.atomic():
+            # Whoever holds the file's row owns the chunk; one another
+            # run committed already is skipped
+            last_chunk = File.objects.select_for_update().filter(
+                pk=self.file.pk).values_list('last_chunk', flat=True)[0]
+            if last_chunk is not None and last_chunk >= index:
+                self.file.last_chunk = last_chunk
+                return 0
+
+            try:
+                self.write_rows(parsed, publications)
+            except DatabaseError:
+                # Parsed again: the failed insert may have set primary keys
+                for values in rows:
+                    try:
+                        self.write_rows([self.parse_row(values)],
+                                        publications)
+                    except DatabaseError:
+                        failed += 1
+
+            File.objects.filter(pk=self.file.pk).update(
+                last_chunk=index,
+                rows_done=F('rows_done') + len(parsed) - failed,
+                rows_failed=F('rows_failed') + failed,
+                import_heartbeat=datetime.datetime.now())
+
+        self.file.last_chunk = index
+        self.file.rows_done += len(parsed) - failed
+        self.file.rows_failed += failed
+        return len(parsed) - failed
+
+    def reset(self):
+        '''
+            Starts the import over: the list loses its contacts and the
+            file its progress.
+        '''
+        with transaction.atomic():
+            self.media_list.contacts.clear()
+            File.objects.filter(pk=self.file.pk).update(
+                imported=False, last_chunk=None, rows_done=0, rows_failed=0,
+                import_error='')
+        self.file.imported = False
+        self.file.last_chunk = None
+        self.file.rows_done = 0
+        self.file.rows_failed = 0
+        self.file.import_error = ''
+
+    def get_next_chunk(self):
+        if self.file.last_chunk is None:
+            return 0
+        return self.file.last_chunk + 1
+
+    def run(self, rows, first_chunk=0):
+        '''
+            Imports the rows of `rows` (an iterator of value lists that
+            starts at chunk `first_chunk`) from the chunk after the file's
+            last committed one, and returns how many contacts were
+            created.
+        '''
+        start = self.get_next_chunk()
+
+        imported = 0
+        for index, chunk in enumerate(chunks(rows, self.chunk_size),
+                                      first_chunk):
+            if index >= start:
+                imported += self.import_chunk(index, chunk)
+        return imported
+
+    def finish(self):
+        '''
+            Adds the custom field columns to the list and marks the file
+            imported, once every chunk is in.
+        '''
+        with transaction.atomic():
+            # Only one run adds the columns
+            file = File.objects.select_for_update().get(pk=self.file.pk)
+            if file.imported:
+                return
+
+            if file.rows_done > 0:
+                for i, header in enumerate(self.file.order):
+                    if is_custom_field(header):
+                        custom_field = CustomFieldsMap()
+                        custom_field.name = self.file.header_names[i]
+                        custom_field.value = header
+                        custom_field.custom_field = True
+                        custom_field.hidden = False
+                        custom_field.save()
+
+                        self.media_list.fields_map.add(custom_field)
+
+                self.media_list.save()
+
+            self.file.imported = True
+            self.file.import_status = IMPORT_DONE
+            self.file.save(update_fields=['imported', 'import_status',
+                                          'updated'])
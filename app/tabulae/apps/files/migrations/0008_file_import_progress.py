@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.6 on 2017-11-09 14:12
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0007_file_content_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='file',
+            name='import_status',
+            field=models.TextField(blank=True, default=b''),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='import_error',
+            field=models.TextField(blank=True, default=b''),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='rows_done',
+            field=models.IntegerField(blank=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='rows_failed',
+            field=models.IntegerField(blank=True, default=0),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='last_chunk',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
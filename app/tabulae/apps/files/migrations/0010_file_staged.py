@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.6 on 2017-11-10 11:05
+from __future__ import unicode_literals
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+import storages.backends.s3boto
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0009_file_header_rows'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='file',
+            name='staged',
+            field=models.FileField(blank=True, null=True, storage=storages.backends.s3boto.S3BotoStorage(acl=b'private'), upload_to=b'media_lists/staged/%Y/%m/%d'),
+        ),
+        migrations.AddField(
+            model_name='file',
+            name='sheet_names',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.TextField(), blank=True, default=list, size=None),
+        ),
+    ]
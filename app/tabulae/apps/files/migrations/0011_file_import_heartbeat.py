@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.6 on 2017-11-10 14:32
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('files', '0010_file_staged'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='file',
+            name='import_heartbeat',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
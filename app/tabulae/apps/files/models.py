@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 # Core Django imports
-from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.fields import ArrayField, JSONField
 from django.db import models
 
 # Third-party app imports
@@ -35,14 +35,35 @@ class File(BaseModel):
         upload_to='media_lists/%Y/%m/%d',
     )
 
+    # The upload parsed once into msgpack row blocks
+    staged = models.FileField(
+        null=True,
+        blank=True,
+        storage=protected_storage,
+        upload_to='media_lists/staged/%Y/%m/%d',
+    )
+    sheet_names = ArrayField(models.TextField(), blank=True, default=list)
+
     header_names = ArrayField(models.CharField(
         max_length=200), blank=True, default=list)
     order = ArrayField(models.CharField(
         max_length=200), blank=True, default=list)
+    # Header preview of the first rows, read once
+    header_rows = JSONField(blank=True, null=True)
 
     imported = models.BooleanField(blank=False, default=False)
     file_exists = models.BooleanField(blank=False, default=False)
 
+    # Progress of the background import into the file's media list
+    import_status = models.TextField(blank=True, default='')
+    import_error = models.TextField(blank=True, default='')
+    rows_done = models.IntegerField(blank=True, default=0)
+    rows_failed = models.IntegerField(blank=True, default=0)
+    last_chunk = models.IntegerField(blank=True, null=True)
+    # When the import last showed signs of life; a claim older than
+    # IMPORT_STALE_AFTER can be taken over
+    import_heartbeat = models.DateTimeField(blank=True, null=True)
+
 
 class EmailImage(BaseModel):
     original_name = models.TextField(blank=False, default='')
@@ -35,7 +35,10 @@ class FileSerializer(ModelSerializer):
             'order': obj.order,
             'imported': obj.imported,
             'fileexists': obj.file_exists,
-            'contenttype': obj.content_type
+            'contenttype': obj.content_type,
+            'importstatus': obj.import_status,
+            'rowsdone': obj.rows_done,
+            'rowsfailed': obj.rows_failed,
         }
 
         if has_data:
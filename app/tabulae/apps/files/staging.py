@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+# Stdlib imports
+import tempfile
+
+# Core Django imports
+from django.core.cache import cache
+from django.core.files import File as DjangoFile
+
+# Third-party app imports
+from openpyxl import load_workbook
+import msgpack
+
+# Imports from app
+from .imports import (
+    IMPORT_CHUNK_SIZE,
+    chunks,
+    find_first_row,
+    iter_row_values,
+    sniff_headers,
+)
+from .models import File
+
+# Rows per msgpack block of a staged sheet; one block is one import chunk
+STAGE_BLOCK_SIZE = IMPORT_CHUNK_SIZE
+
+# Staging reads the whole sheet in one go, so it gets more time than the
+# other tasks
+STAGE_SOFT_TIME_LIMIT = 60 * 10
+STAGE_TIME_LIMIT = 60 * 11
+
+
+def _staging_lock_key(file):
+    return 'files:%s:staging' % file.pk
+
+
+def stage_file(file):
+    '''
+        Parses an uploaded workbook once and stores its active sheet next
+        to it as a stream of msgpack row blocks, from its first non-empty
+        row on, with every value already a stripped string. The sheet
+        names and the header preview are kept on the file.
+
+        Only one process stages a file at a time; returns False when
+        another one already is.
+    '''
+    lock_key = _staging_lock_key(file)
+    if not cache.add(lock_key, True, STAGE_TIME_LIMIT):
+        return False
+
+    try:
+        if File.objects.filter(pk=file.pk).exclude(staged=None).exclude(
+                staged='').exists():
+            return True
+
+        wb = load_workbook(file.file, read_only=True)
+        _, rows = find_first_row(iter_row_values(wb.active))
+
+        packer = msgpack.Packer(encoding='utf-8', use_bin_type=True)
+        header_rows = []
+        with tempfile.TemporaryFile() as staged:
+            for index, block in enumerate(chunks(rows, STAGE_BLOCK_SIZE)):
+                if index == 0:
+                    header_rows = sniff_headers(iter(block))
+                staged.write(packer.pack(block))
+            staged.seek(0)
+
+            file.staged.save(file.file_name + '.msgpack',
+                             DjangoFile(staged), save=False)
+
+        file.sheet_names = wb.get_sheet_names()
+        file.header_rows = header_rows
+        File.objects.filter(pk=file.pk).update(
+            staged=file.staged.name, sheet_names=file.sheet_names,
+            header_rows=file.header_rows)
+        return True
+    finally:
+        cache.delete(lock_key)
+
+
+def get_header_rows(file):
+    '''
+        Returns the header preview of a file. Until the file is staged it
+        comes from the first rows of the workbook, read once and kept on
+        the file.
+    '''
+    if file.header_rows is None:
+        wb = load_workbook(file.file, read_only=True)
+        file.header_rows = sniff_headers(iter_row_values(wb.active))
+        File.objects.filter(pk=file.pk).update(header_rows=file.header_rows)
+    return file.header_rows
+
+
+def get_sheet_names(file):
+    if file.staged:
+        return file.sheet_names
+    # The sheet names come from the workbook's index, without its rows
+    return load_workbook(file.file, read_only=True).get_sheet_names()
+
+
+def iter_staged_rows(file, first_block=0):
+    '''
+        Streams the rows of a staged file one block at a time, from block
+        `first_block` on. The blocks before it are skipped unread.
+    '''
+    file.staged.open('rb')
+    try:
+        unpacker = msgpack.Unpacker(file.staged, encoding='utf-8')
+        for _ in xrange(first_block):
+            unpacker.skip()
+        for block in unpacker:
+            for row in block:
+                yield row
+    except msgpack.OutOfData:
+        # Fewer blocks than `first_block`: nothing left to read
+        return
+    finally:
+        file.staged.close()
+
+
+def iter_file_rows(file, first_chunk=0):
+    '''
+        Streams the rows of a file from its staged copy, or straight from
+        the workbook while it isn't staged yet. Returns the rows and the
+        import chunk they start at: a staged copy starts at `first_chunk`
+        (one block is one chunk), the workbook always at its first row.
+    '''
+    if file.staged:
+        return iter_staged_rows(file, first_chunk), first_chunk
+
+    wb = load_workbook(file.file, read_only=True)
+    _, rows = find_first_row(iter_row_values(wb.active))
+    return rows, 0
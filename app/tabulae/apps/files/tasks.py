@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+# Stdlib imports
+import datetime
+
+# Third-party app imports
+from celery import shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+
+# Imports from app
+from tabulae.apps.contacts.tasks import queue_social_fields_refresh
+from tabulae.apps.lists.models import MediaList
+from tabulae.apps.users.utils import TenantContext
+from .imports import (
+    IMPORT_DONE,
+    IMPORT_RUNNING,
+    IMPORT_SOFT_TIME_LIMIT,
+    IMPORT_TIME_LIMIT,
+    ContactImporter,
+    release_import,
+)
+from .models import File
+from .staging import (
+    STAGE_SOFT_TIME_LIMIT,
+    STAGE_TIME_LIMIT,
+    iter_file_rows,
+    stage_file,
+)
+
+
+@shared_task(soft_time_limit=STAGE_SOFT_TIME_LIMIT,
+             time_limit=STAGE_TIME_LIMIT)
+def stage_uploaded_file(file_id):
+    file = File.objects.get(pk=file_id)
+    if not file.staged:
+        stage_file(file)
+    return True
+
+
+@shared_task(soft_time_limit=IMPORT_SOFT_TIME_LIMIT,
+             time_limit=IMPORT_TIME_LIMIT)
+def import_file(file_id):
+    '''
+        Imports a file into its media list from the chunk after the last
+        committed one. When the task runs out of time, or its worker goes
+        away (tasks are acked late), it picks up where it stopped.
+
+        A staged file resumes without reading the chunks already in; one
+        that isn't is staged before the next run, so every run gets
+        further than the last.
+    '''
+    file = File.objects.get(pk=file_id)
+    if file.imported or file.import_status == IMPORT_DONE:
+        return True
+
+    media_list = MediaList.objects.get(file=file)
+    importer = ContactImporter(file, media_list, file.created_by,
+                               TenantContext(user=file.created_by).team)
+
+    File.objects.filter(pk=file.pk).update(
+        import_status=IMPORT_RUNNING,
+        import_heartbeat=datetime.datetime.now())
+    try:
+        # Files not staged yet are read from the workbook; the import
+        # never stages them itself
+        rows, first_chunk = iter_file_rows(file, importer.get_next_chunk())
+        importer.run(rows, first_chunk)
+    except SoftTimeLimitExceeded:
+        if file.staged:
+            import_file.delay(file_id)
+        else:
+            (stage_uploaded_file.si(file_id) |
+             import_file.si(file_id)).delay()
+        return False
+    except Exception as e:
+        release_import(file, unicode(e))
+        raise
+
+    importer.finish()
+    # The list's social columns get filled without waiting for the night
+    queue_social_fields_refresh(list(media_list.contacts.values_list(
+        'pk', flat=True)))
+    return True
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+# Stdlib imports
+from io import BytesIO
+import json
+import logging
+
+# Core Django imports
+from django.core.handlers.wsgi import WSGIRequest
+from django.http import Http404
+from django.urls import Resolver404, resolve
+from django.utils import encoding
+from django.utils.six.moves.urllib.parse import urlsplit, urlunsplit
+
+# Third-party app imports
+from rest_framework.exceptions import ParseError
+from rest_framework.views import APIView
+
+# Imports from app
+from tabulae.apps.users.models import UserProfile
+from tabulae.apps.users.utils import get_tenant
+from .fanout import FanOut
+from .response import BulkResponse
+
+logger = logging.getLogger(__name__)
+
+# Sub-requests accepted in one batch
+MAX_BATCH_SIZE = 25
+
+# Only routes of the v1 API router can be called from a batch
+BATCH_NAMESPACE = 'v1'
+BATCH_PREFIX = '/api/v1/'
+
+READ_ONLY_METHODS = ('GET', 'HEAD', 'OPTIONS',)
+BATCH_METHODS = READ_ONLY_METHODS + ('POST', 'PUT', 'PATCH', 'DELETE',)
+
+# Headers of the batch request that don't apply to its sub-requests
+SKIPPED_HEADERS = ('HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE',
+                   'HTTP_CONTENT_MD5',)
+
+
+def _error(status, detail):
+    return {
+        'status': status,
+        'headers': {},
+        'body': {
+            'errors': [{
+                'status': str(status),
+                'detail': detail,
+            }]
+        },
+    }
+
+
+class BatchView(APIView):
+    '''
+        POST /api/v1/batch with a list of sub-requests:
+
+            [{"method": "GET", "path": "/api/v1/contacts/1/tweets"},
+             {"method": "PATCH", "path": "/api/v1/lists/2",
+              "body": {"name": "..."}}]
+
+        Every sub-request is resolved against the API router and runs
+        with the batch's user and tenant, skipping the middleware and
+        authentication it would otherwise pay for. Runs of consecutive
+        read-only sub-requests execute in parallel; writes run one at a
+        time, in order, and the reads after a write see it.
+
+        The response holds one {status, headers, body} per sub-request,
+        in the order they were given.
+    '''
+
+    def post(self, request):
+        sub_requests = request.data
+        if not isinstance(sub_requests, list) or not sub_requests:
+            raise ParseError('Expected a list of sub-requests.')
+        if len(sub_requests) > MAX_BATCH_SIZE:
+            raise ParseError('A batch holds at most %d sub-requests.' % (
+                MAX_BATCH_SIZE))
+
+        # Resolve the team once for every sub-request
+        tenant = get_tenant(request)
+        try:
+            tenant.user_profile
+        except UserProfile.DoesNotExist:
+            pass
+
+        responses = [None] * len(sub_requests)
+        reads = {}
+        for index, sub_request in enumerate(sub_requests):
+            method = self.get_method(sub_request)
+            if method in READ_ONLY_METHODS:
+                reads[index] = sub_request
+                continue
+
+            self.run_reads(request, reads, responses)
+            reads = {}
+            responses[index] = self.dispatch_sub_request(request, sub_request)
+        self.run_reads(request, reads, responses)
+
+        return BulkResponse(responses, {}, len(responses), len(responses))
+
+    def get_method(self, sub_request):
+        if not isinstance(sub_request, dict):
+            return None
+        return str(sub_request.get('method', 'GET')).upper()
+
+    def run_reads(self, request, reads, responses):
+        if not reads:
+            return
+        if len(reads) == 1:
+            index, sub_request = reads.popitem()
+            responses[index] = self.dispatch_sub_request(request, sub_request)
+            return
+
+        # Each read closes the database connection of its thread
+        fan_out = FanOut(dict(
+            (index, lambda sub_request=sub_request: self.dispatch_sub_request(
+                request, sub_request))
+            for index, sub_request in reads.items()))
+        results = fan_out.wait()
+        for index in reads:
+            if index in results:
+                responses[index] = results[index]
+            else:
+                responses[index] = _error(500, 'Server error.')
+
+    def build_sub_request(self, request, method, path, body):
+        url = urlsplit(path)
+
+        content = b''
+        if body is not None:
+            content = encoding.force_bytes(json.dumps(body))
+
+        environ = dict((key, value) for key, value in request.META.items()
+                       if key not in SKIPPED_HEADERS)
+        environ.update({
+            'REQUEST_METHOD': method,
+            'PATH_INFO': url.path,
+            'QUERY_STRING': url.query,
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(content)),
+            'wsgi.input': BytesIO(content),
+        })
+
+        sub_request = WSGIRequest(environ)
+        sub_request.user = request.user
+        sub_request.tenant = get_tenant(request)
+        sub_request._dont_enforce_csrf_checks = True
+        # DRF takes these over its authentication classes
+        sub_request._force_auth_user = request.user
+        sub_request._force_auth_token = request.auth
+        return sub_request
+
+    def dispatch_sub_request(self, request, sub_request):
+        method = self.get_method(sub_request)
+        if method not in BATCH_METHODS:
+            return _error(400, 'Invalid method.')
+
+        path = sub_request.get('path')
+        if not path or not isinstance(path, basestring):
+            return _error(400, 'Invalid path.')
+        if not path.startswith('/'):
+            path = BATCH_PREFIX + path
+
+        url = urlsplit(path)
+        if not url.path.endswith('/'):
+            # The router's routes all end with a slash; there's no
+            # APPEND_SLASH redirect to follow in here.
+            path = urlunsplit(('', '', url.path + '/', url.query, ''))
+
+        try:
+            match = resolve(urlsplit(path).path)
+        except Resolver404:
+            return _error(404, 'Not found.')
+        if match.namespace != BATCH_NAMESPACE:
+            return _error(404, 'Not found.')
+
+        try:
+            response = match.func(
+                self.build_sub_request(
+                    request, method, path, sub_request.get('body')),
+                *match.args, **match.kwargs)
+        except Http404:
+            return _error(404, 'Not found.')
+        except Exception:
+            # Like an unhandled error in its own request: a 500 for this
+            # sub-request only. Sub-requests skip Django's handler, so
+            # the error is logged here.
+            logger.exception('Batch sub-request failed: %s %s', method,
+                             path)
+            return _error(500, 'Server error.')
+
+        if hasattr(response, 'render') and callable(response.render):
+            response.render()
+
+        if response.streaming:
+            content = b''.join(response.streaming_content)
+        else:
+            content = response.content
+
+        body = None
+        if content:
+            try:
+                body = json.loads(encoding.force_text(content))
+            except ValueError:
+                body = encoding.force_text(content)
+
+        headers = {}
+        for header in ('ETag', 'Location', 'Last-Modified'):
+            if response.has_header(header):
+                headers[header] = response[header]
+
+        return {
+            'status': response.status_code,
+            'headers': headers,
+            'body': body,
+        }
@@ -1,7 +1,14 @@
 # -*- coding: utf-8 -*-
 # Stdlib imports
-import datetime
+import hashlib
+import json
 import os
+import threading
+import time
+
+# Core Django imports
+from django.core.cache import cache as default_cache
+from django.utils import encoding
 
 # Third-party app imports
 import certifi
@@ -20,29 +27,184 @@ es = Elasticsearch(
     ca_certs=certifi.where(),
 )
 
+# Seconds a result stays fresh, per index. The indexes are rewritten by
+# the crawlers every few minutes at most.
+ES_CACHE_TTLS = {
+    'feeds': 120,
+    'tweets': 120,
+    'headlines': 300,
+    'instagrams': 300,
+    'timeseries': 900,
+}
+ES_CACHE_DEFAULT_TTL = 60
+
+# How long past its TTL a result is still served while it is refreshed
+ES_CACHE_STALE_TTL = 600
+
+
+def _start_thread(target):
+    thread = threading.Thread(target=target)
+    thread.daemon = True
+    thread.start()
+
+
+class CachedElasticsearch(object):
+    '''
+        Read-through cache in front of an Elasticsearch client. `search`,
+        `msearch` and `mget` are cached by method, index, doc_type and the
+        normalized query body; everything else goes to the client as is.
+
+        Results older than their index's TTL are still returned for
+        `stale_ttl` seconds while one background refresh fetches a new
+        copy. `stats` counts hits, stale hits and misses.
+
+        The client, cache, clock and the way refreshes are started can
+        all be swapped for in-memory stand-ins.
+    '''
+
+    def __init__(self, client, cache=default_cache, ttls=None,
+                 default_ttl=ES_CACHE_DEFAULT_TTL,
+                 stale_ttl=ES_CACHE_STALE_TTL, clock=time.time,
+                 spawn=_start_thread):
+        self.client = client
+        self.cache = cache
+        self.ttls = ES_CACHE_TTLS if ttls is None else ttls
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        self.clock = clock
+        self.spawn = spawn
+        self.stats = {
+            'hits': 0,
+            'stale': 0,
+            'misses': 0,
+        }
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def search(self, index=None, doc_type=None, body=None, **params):
+        params.update(index=index, doc_type=doc_type, body=body)
+        return self._read('search', [index], params)
+
+    def msearch(self, body=None, **params):
+        params['body'] = body
+        indexes = [header.get('index', params.get('index'))
+                   for header in body[::2]]
+        return self._read('msearch', indexes, params)
+
+    def mget(self, body=None, index=None, doc_type=None, **params):
+        params.update(index=index, doc_type=doc_type, body=body)
+        indexes = [doc.get('_index', index) for doc in body.get('docs', [])]
+        return self._read('mget', indexes or [index], params)
+
+    def get_key(self, method, params):
+        normalized = json.dumps(params, sort_keys=True,
+                                separators=(',', ':'), default=str)
+        return 'es:%s:%s' % (method, hashlib.md5(
+            encoding.force_bytes(normalized)).hexdigest())
+
+    def get_ttl(self, indexes):
+        return min(self.ttls.get(index, self.default_ttl)
+                   for index in indexes)
+
+    def _read(self, method, indexes, params):
+        key = self.get_key(method, params)
 
-def format_es_response(es_response):
-    if 'CreatedAt' in es_response['_source']['data']:
-        if 'T' in es_response['_source']['data']['CreatedAt']:
-            now = datetime.datetime.strptime(
-                es_response['_source']['data']['CreatedAt'],
-                '%Y-%m-%dT%H:%M:%S'
-            )
+        entry = self.cache.get(key)
+        if entry is None:
+            self.stats['misses'] += 1
+            return self._fetch(method, key, indexes, params)
 
-            es_response['_source']['data'][
-                'CreatedAt'] = int(now.strftime('%s'))
+        fresh_until, result = entry
+        if self.clock() < fresh_until:
+            self.stats['hits'] += 1
         else:
-            now = datetime.datetime.strptime(
-                es_response['_source']['data']['CreatedAt'],
-                '%Y-%m-%d'
-            )
+            self.stats['stale'] += 1
+            self._revalidate(method, key, indexes, params)
+        return result
+
+    def _fetch(self, method, key, indexes, params):
+        result = getattr(self.client, method)(**params)
+
+        # Don't keep partial msearch results around
+        if any('error' in response
+               for response in result.get('responses', [])):
+            return result
+
+        ttl = self.get_ttl(indexes)
+        self.cache.set(key, (self.clock() + ttl, result),
+                       ttl + self.stale_ttl)
+        return result
+
+    def _revalidate(self, method, key, indexes, params):
+        # Only one worker refreshes a given result
+        lock = key + ':refresh'
+        if not self.cache.add(lock, 1, self.default_ttl):
+            return
+
+        def refresh():
+            try:
+                self._fetch(method, key, indexes, params)
+            finally:
+                self.cache.delete(lock)
+
+        self.spawn(refresh)
+
+
+cached_es = CachedElasticsearch(es)
+
+
+def iso_to_epoch(value):
+    '''
+        Turns `YYYY-MM-DD` or `YYYY-MM-DDTHH:MM:SS` into seconds since the
+        epoch in local time, like strftime('%s') did, by slicing the
+        string instead of going through strptime.
+    '''
+    if value[10:11] == 'T':
+        fields = (int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                  int(value[11:13]), int(value[14:16]), int(value[17:19]))
+    else:
+        fields = (int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                  0, 0, 0)
+    return int(time.mktime(fields + (0, 0, -1)))
+
+
+# Lowercased keys for each shape of `data` seen so far, so a page of
+# tweets lowercases its keys once rather than once per hit.
+_KEY_MAPS = {}
+KEY_MAPS_MAX_SIZE = 256
+
+
+def _get_key_map(keys):
+    key_map = _KEY_MAPS.get(keys)
+    if key_map is None:
+        if len(_KEY_MAPS) >= KEY_MAPS_MAX_SIZE:
+            _KEY_MAPS.clear()
+        key_map = tuple((key, key.lower()) for key in keys)
+        _KEY_MAPS[keys] = key_map
+    return key_map
+
+
+def normalize_hits(hits):
+    '''
+        Normalizes a whole `hits.hits` array: the keys of each hit's
+        `data` are lowercased and `CreatedAt` becomes an epoch. Returns
+        the normalized `data` of every hit that has one; the hits
+        themselves are left alone.
+    '''
+    normalized = []
+    for hit in hits:
+        source = hit.get('_source')
+        if not source or 'data' not in source:
+            continue
 
-            es_response['_source']['data'][
-                'CreatedAt'] = int(now.strftime('%s'))
+        data = source['data']
+        item = dict((lowered, data[key])
+                    for key, lowered in _get_key_map(tuple(data)))
 
-    for key in es_response['_source']['data']:
-        new_key = key.lower()
-        es_response['_source']['data'][
-            new_key] = es_response['_source']['data'].pop(key)
+        created_at = item.get('createdat')
+        if isinstance(created_at, basestring):
+            item['createdat'] = iso_to_epoch(created_at)
 
-    return es_response
+        normalized.append(item)
+    return normalized
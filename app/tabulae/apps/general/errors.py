@@ -7,3 +7,4 @@ detail_to_title['400'] = 'The query parameters or POST parameters are invalid.'
 detail_to_title['401'] = 'Please login.'
 detail_to_title['403'] = 'Invalid permissions.'
 detail_to_title['404'] = 'Invalid ID.'
+detail_to_title['409'] = 'The resource is in use.'
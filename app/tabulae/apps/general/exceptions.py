@@ -83,3 +83,9 @@ def exception_handler(exc, context):
         return response
 
     return format_errors(response, context, exc)
+
+
+class Conflict(exceptions.APIException):
+    status_code = 409
+    default_detail = 'The resource is busy, try again later.'
+    default_code = 'conflict'
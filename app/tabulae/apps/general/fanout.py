@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+# Stdlib imports
+import threading
+import time
+
+# Core Django imports
+from django.db import connections
+
+
+def timed(timings, name, call):
+    '''
+        Runs `call` and records how long it took, in milliseconds, as
+        `timings[name]`.
+    '''
+    start = time.time()
+    try:
+        return call()
+    finally:
+        timings[name] = int((time.time() - start) * 1000)
+
+
+class FanOut(object):
+    '''
+        Starts every callable of `calls` (a dict of name -> callable) on
+        its own thread right away, so the caller can do other work until
+        `wait()`. The threads are greenlets when gevent has patched the
+        process, as manage.py does.
+
+        `wait()` returns {name: result}. `errors` has the exception of
+        every callable that raised, which doesn't stop the others, and
+        `timings` the milliseconds each took.
+    '''
+
+    def __init__(self, calls):
+        self.results = {}
+        self.errors = {}
+        self.timings = {}
+
+        self.threads = []
+        for name, call in calls.items():
+            thread = threading.Thread(target=self.run, args=(name, call))
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def run(self, name, call):
+        try:
+            self.results[name] = timed(self.timings, name, call)
+        except Exception as error:
+            self.errors[name] = error
+        finally:
+            # Connections are per thread; don't leave this one's open
+            for connection in connections.all():
+                connection.close()
+
+    def wait(self):
+        for thread in self.threads:
+            thread.join()
+        return self.results
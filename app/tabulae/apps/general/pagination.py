@@ -1,7 +1,37 @@
 # -*- coding: utf-8 -*-
+# Stdlib imports
+import base64
+import datetime
+import hashlib
+import json
+
+# Core Django imports
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Q
+from django.utils import encoding
+
 # Third-party app imports
+from rest_framework.exceptions import NotFound, ParseError
 from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+CURSOR_DATE_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+# `?order=` values cursors are keyed on; any other sort pages by offset
+CURSOR_ORDERINGS = ('', '-created', '-created,-pk')
+
+# Ways summary.total can be computed, picked with `?total=` or the
+# viewset's `pagination_total`.
+TOTAL_EXACT = 'exact'
+TOTAL_APPROXIMATE = 'approximate'
+TOTAL_NONE = 'none'
+TOTAL_MODES = (TOTAL_EXACT, TOTAL_APPROXIMATE, TOTAL_NONE)
+
+# How long an approximate total is reused for the same query
+APPROXIMATE_COUNT_TIMEOUT = 60
 
 
 def get_pagination(request):
@@ -11,27 +41,288 @@ def get_pagination(request):
     return (limit, offset)
 
 
+def get_search_after(request):
+    '''
+        Decodes `?cursor=` (a previous page's `paging.cursors.after`) into
+        Elasticsearch `search_after` values.
+    '''
+    cursor = request.GET.get('cursor')
+    if not cursor:
+        return None
+
+    try:
+        search_after = json.loads(encoding.force_text(
+            base64.urlsafe_b64decode(encoding.force_bytes(cursor))))
+    except (TypeError, ValueError):
+        raise NotFound('Invalid cursor.')
+
+    if not isinstance(search_after, list):
+        raise NotFound('Invalid cursor.')
+    return search_after
+
+
+def paginate_es_query(query, request):
+    '''
+        Sets the page of an Elasticsearch query body. With `?cursor=` the
+        page resumes with `search_after`, so deep pages cost the same as
+        the first one; otherwise `?offset=` is still honoured.
+    '''
+    limit, offset = get_pagination(request)
+    try:
+        query['size'] = int(limit)
+    except (TypeError, ValueError):
+        query['size'] = 20
+    if query['size'] < 1:
+        raise ParseError('limit must be a positive number.')
+
+    try:
+        offset = max(int(offset), 0)
+    except (TypeError, ValueError):
+        offset = 0
+
+    # search_after needs a total order: break ties on the document id
+    query['sort'] = query.get('sort', []) + [{'_uid': 'desc'}]
+
+    search_after = get_search_after(request)
+    if search_after is None:
+        query['from'] = offset
+    else:
+        query.pop('from', None)
+        query['search_after'] = search_after
+    return query
+
+
+def get_es_after_cursor(es_response, query):
+    '''
+        Returns the cursor of the page after `es_response`, or '' when
+        it was the last one.
+    '''
+    hits = es_response.get('hits', {}).get('hits', [])
+    if not hits or len(hits) < query['size'] or 'sort' not in hits[-1]:
+        return ''
+    return encoding.force_text(base64.urlsafe_b64encode(
+        encoding.force_bytes(json.dumps(hits[-1]['sort']))))
+
+
+def estimate_count(queryset):
+    '''
+        Returns the planner's row estimate for a queryset instead of
+        running COUNT(*), cached per query for a short while. Falls back
+        to an exact count on databases other than Postgres.
+    '''
+    sql, params = queryset.query.sql_with_params()
+    cache_key = 'approximate-count:' + hashlib.md5(
+        encoding.force_bytes(sql + repr(params))).hexdigest()
+
+    count = cache.get(cache_key)
+    if count is not None:
+        return count
+
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        count = queryset.count()
+    else:
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+            if not isinstance(plan, list):
+                plan = json.loads(plan)
+            count = int(plan[0]['Plan']['Plan Rows'])
+
+    cache.set(cache_key, count, APPROXIMATE_COUNT_TIMEOUT)
+    return count
+
+
+def encode_cursor(obj):
+    position = '%s|%s' % (obj.created.strftime(CURSOR_DATE_FORMAT), obj.pk)
+    return encoding.force_text(
+        base64.urlsafe_b64encode(encoding.force_bytes(position)))
+
+
+def decode_cursor(cursor):
+    try:
+        position = encoding.force_text(
+            base64.urlsafe_b64decode(encoding.force_bytes(cursor)))
+        created, pk = position.split('|')
+        return (datetime.datetime.strptime(created, CURSOR_DATE_FORMAT),
+                int(pk))
+    except (TypeError, ValueError):
+        raise NotFound('Invalid cursor.')
+
+
 class GlobalPagination(LimitOffsetPagination):
+    '''
+        Limit/offset pagination by default. Viewsets that set
+        `pagination_mode = 'cursor'` offer keyset pagination on
+        (created, id) as well, which skips both the OFFSET scan and the
+        COUNT(*). Clients opt in with `?paging=cursor` on the first page
+        and then follow `?cursor=`; everyone else, and any request with
+        a custom `?order=`, keeps getting offset pages.
+
+        `summary.total` is exact by default. `?total=approximate` (or
+        `pagination_total = 'approximate'` on the viewset) returns a
+        planner estimate flagged with `summary.approximate`, and
+        `?total=none` skips the count and returns a null total.
+
+        `?limit=all` turns pagination off for the request.
+    '''
+    cursor_query_param = 'cursor'
+    paging_query_param = 'paging'
+    direction_query_param = 'direction'
+    total_query_param = 'total'
+
+    def get_limit(self, request):
+        # `?limit=all` opts out of pagination; the viewsets then stream
+        # the whole queryset with StreamingBulkResponse.
+        if request.query_params.get(self.limit_query_param) == 'all':
+            return None
+        return super(GlobalPagination, self).get_limit(request)
+
+    def get_total_mode(self, request, view):
+        if self.cursor_mode:
+            default = TOTAL_NONE
+        else:
+            default = getattr(view, 'pagination_total', TOTAL_EXACT)
+
+        total_mode = request.query_params.get(self.total_query_param, default)
+        if total_mode not in TOTAL_MODES:
+            return default
+        return total_mode
+
+    def get_total(self, queryset):
+        if self.total_mode == TOTAL_EXACT:
+            return self.get_count(queryset)
+        elif self.total_mode == TOTAL_APPROXIMATE:
+            return estimate_count(queryset)
+        return None
+
+    def use_cursor(self, request, view):
+        if getattr(view, 'pagination_mode', 'offset') != 'cursor':
+            return False
+        if self.offset_query_param in request.query_params:
+            return False
+        if request.query_params.get(
+                api_settings.ORDERING_PARAM, '') not in CURSOR_ORDERINGS:
+            return False
+        return (self.cursor_query_param in request.query_params or
+                request.query_params.get(self.paging_query_param) == 'cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.use_cursor(request, view)
+        self.total_mode = self.get_total_mode(request, view)
+        if not self.cursor_mode:
+            if self.total_mode == TOTAL_EXACT:
+                return super(GlobalPagination, self).paginate_queryset(
+                    queryset, request, view)
+            return self.paginate_queryset_without_count(queryset, request)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.count = self.get_total(queryset)
+        cursor = request.query_params.get(self.cursor_query_param)
+        backwards = (cursor and request.query_params.get(
+            self.direction_query_param) == 'before')
+
+        if cursor:
+            created, pk = decode_cursor(cursor)
+            if backwards:
+                queryset = queryset.filter(
+                    Q(created__gt=created) | Q(created=created, pk__gt=pk))
+            else:
+                queryset = queryset.filter(
+                    Q(created__lt=created) | Q(created=created, pk__lt=pk))
+
+        if backwards:
+            queryset = queryset.order_by('created', 'pk')
+        else:
+            queryset = queryset.order_by('-created', '-pk')
+
+        # Fetch one extra row to know if there is another page
+        page = list(queryset[:self.limit + 1])
+        has_more = len(page) > self.limit
+        page = page[:self.limit]
+
+        if backwards:
+            page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, bool(cursor)
+
+        self.page = page
+        return page
+
+    def paginate_queryset_without_count(self, queryset, request):
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.offset = self.get_offset(request)
+        self.count = self.get_total(queryset)
+
+        # Fetch one extra row to know if there is another page
+        page = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(page) > self.limit
+        return page[:self.limit]
+
+    def get_cursor_link(self, cursor, direction):
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.offset_query_param)
+        url = replace_query_param(url, self.cursor_query_param, cursor)
+        return replace_query_param(
+            url, self.direction_query_param, direction)
+
+    def get_cursors(self):
+        if not getattr(self, 'cursor_mode', False) or not self.page:
+            return '', ''
+        return encode_cursor(self.page[0]), encode_cursor(self.page[-1])
+
+    def get_next_link(self):
+        if not getattr(self, 'cursor_mode', False):
+            if self.total_mode == TOTAL_EXACT:
+                return super(GlobalPagination, self).get_next_link()
+            if not self.has_next:
+                return None
+            url = self.request.build_absolute_uri()
+            url = replace_query_param(url, self.limit_query_param, self.limit)
+            return replace_query_param(
+                url, self.offset_query_param, self.offset + self.limit)
+        if not self.has_next or not self.page:
+            return None
+        return self.get_cursor_link(encode_cursor(self.page[-1]), 'after')
+
+    def get_previous_link(self):
+        if not getattr(self, 'cursor_mode', False):
+            return super(GlobalPagination, self).get_previous_link()
+        if not self.has_previous or not self.page:
+            return None
+        return self.get_cursor_link(encode_cursor(self.page[0]), 'before')
+
+    def get_summary(self):
+        summary = {
+            'total': self.count,
+        }
+        if self.total_mode == TOTAL_APPROXIMATE:
+            summary['approximate'] = True
+        return summary
 
     def get_paginated_response(self, data, included=[]):
-        current_count = self.get_limit(self.request)
-        total = self.count
-        if total < current_count:
-            current_count = total
+        before, after = self.get_cursors()
 
         return Response({
             'paging': {
                 'next': self.get_next_link(),
                 'previous': self.get_previous_link(),
                 'cursors': {
-                    'before': '',
-                        'after': '',
-                        },
+                    'before': before,
+                    'after': after,
+                },
             },
             'count': len(data),
-            'summary': {
-                'total': total,
-            },
+            'summary': self.get_summary(),
             'data': data,
             'included': included,
         })
@@ -1,24 +1,44 @@
 # -*- coding: utf-8 -*-
+# Stdlib imports
+import hashlib
+import json
+
+# Core Django imports
+from django.db.models import QuerySet, prefetch_related_objects
+from django.http import HttpResponseNotModified, StreamingHttpResponse
+from django.utils import encoding
+
 # Third-party app imports
 from rest_framework.response import Response as django_response
+from rest_framework.utils.encoders import JSONEncoder
 
+# Rows serialized and flushed to the client at a time when streaming
+STREAM_CHUNK_SIZE = 500
 
-def form_response(data, included):
-    return {
+
+def form_response(data, included, meta=None):
+    response = {
         'data': data,
         'included': included
     }
 
+    # Composite responses describe how they were put together
+    if meta is not None:
+        response['meta'] = meta
+
+    return response
 
-def form_bulk_response(data, included, count, total):
-    return {
+
+def form_bulk_response(data, included, count, total, errors=None,
+                       after=''):
+    response = {
         'count': count,
         'data': data,
         'included': included,
         'paging': {
             'cursors': {
                 'before': '',
-                'after': ''
+                'after': after
             },
             'next': ''
         },
@@ -27,12 +47,109 @@ def form_bulk_response(data, included, count, total):
         }
     }
 
+    # Only bulk writes report per-row errors alongside the data
+    if errors is not None:
+        response['errors'] = errors
+
+    return response
+
 
-def Response(data, included):
-    return django_response(form_response(data, included))
+def Response(data, included, meta=None):
+    return django_response(form_response(data, included, meta=meta))
 
 
-def BulkResponse(data, included, count, total, status=None, headers=None):
-    return django_response(form_bulk_response(data, included, count, total),
+def BulkResponse(data, included, count, total, status=None, headers=None,
+                 errors=None, after=''):
+    return django_response(form_bulk_response(data, included, count, total,
+                                              errors=errors, after=after),
                            status=status,
                            headers=headers)
+
+
+def _dumps(data):
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False,
+                      separators=(',', ':'))
+
+
+def _iter_chunks(queryset, chunk_size):
+    if not isinstance(queryset, QuerySet):
+        queryset = list(queryset)
+        for start in range(0, len(queryset), chunk_size):
+            yield queryset[start:start + chunk_size]
+        return
+
+    # iterator() uses a server side cursor and skips prefetch_related,
+    # so the queryset's own lookups are applied to every chunk instead.
+    prefetch_lookups = queryset._prefetch_related_lookups
+    chunk = []
+    for obj in queryset.iterator():
+        chunk.append(obj)
+        if len(chunk) == chunk_size:
+            prefetch_related_objects(chunk, *prefetch_lookups)
+            yield chunk
+            chunk = []
+
+    if chunk:
+        prefetch_related_objects(chunk, *prefetch_lookups)
+        yield chunk
+
+
+def _stream_bulk_response(queryset, serializer_class, context, chunk_size):
+    count = 0
+    yield '{"data":['
+    for chunk in _iter_chunks(queryset, chunk_size):
+        data = serializer_class(chunk, many=True, context=context).data
+        for item in data:
+            yield (',' if count else '') + _dumps(item)
+            count += 1
+
+    envelope = form_bulk_response([], [], count, count)
+    del envelope['data']
+    yield '],' + _dumps(envelope)[1:]
+
+
+def StreamingBulkResponse(queryset, serializer_class, context=None,
+                          chunk_size=STREAM_CHUNK_SIZE):
+    '''
+        Same envelope as BulkResponse, but the queryset is read and
+        serialized `chunk_size` rows at a time and written out as it
+        goes, so unpaginated lists never sit in memory as a whole.
+    '''
+    return StreamingHttpResponse(
+        _stream_bulk_response(queryset, serializer_class, context or {},
+                              chunk_size),
+        content_type='application/json')
+
+
+def get_etag(*validators):
+    '''
+        Builds a strong ETag out of cheap validators such as a row's
+        `updated`, a max(updated) and a row count.
+    '''
+    value = '|'.join(encoding.force_text(validator)
+                     for validator in validators)
+    return '"%s"' % hashlib.md5(encoding.force_bytes(value)).hexdigest()
+
+
+def not_modified(request, etag):
+    '''
+        Returns a 304 when `If-None-Match` already has `etag`, so the
+        caller can return before serializing anything. Returns None
+        otherwise.
+    '''
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if not if_none_match:
+        return None
+
+    etags = [value.strip() for value in if_none_match.split(',')]
+    if '*' not in etags and etag not in etags and 'W/' + etag not in etags:
+        return None
+
+    response = HttpResponseNotModified()
+    response['ETag'] = etag
+    return response
+
+
+def with_etag(response, etag):
+    response['ETag'] = etag
+    return response
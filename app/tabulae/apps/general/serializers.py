@@ -1,26 +1,169 @@
 # -*- coding: utf-8 -*-
+# Core Django imports
+from django.core.cache import cache
+from django.db.models import Manager, Model
+
 # Third-party app imports
-from rest_framework.serializers import ModelSerializer
+from rest_framework.serializers import ListSerializer, ModelSerializer
 
 # Imports from app
 from .response import form_bulk_response
 
+# Bump when a cached representation changes shape
+FRAGMENT_VERSION = 1
+# Keys carry `updated`, so old fragments are never read again; the
+# timeout only bounds how long they take up memory.
+FRAGMENT_TIMEOUT = 60 * 60 * 24
+
+
+def get_requested_fields(request):
+    '''
+        Parses `?fields=id,email` into a set of output keys. Returns None
+        when the client didn't ask for a subset.
+    '''
+    if request is None:
+        return None
+
+    fields = request.GET.get('fields')
+    if not fields:
+        return None
+    return set(field.strip() for field in fields.split(',') if field.strip())
+
+
+def get_fragment_key(fragment_type, obj):
+    return 'fragment:%d:%s:%s:%s' % (
+        FRAGMENT_VERSION, fragment_type, obj.pk, obj.updated.isoformat())
+
+
+class FragmentCacheListSerializer(ListSerializer):
+    '''
+        Serializes a page of objects from a fragment cache keyed on
+        (type, pk, updated). Cached objects come back with one multi-get
+        and only the misses go through the child serializer; they are
+        written back with one multi-set.
+
+        The child sets `fragment_type`. Subclasses can override
+        `prepare` to load what the misses need (prefetches and so on).
+    '''
+
+    def use_fragment_cache(self):
+        # Sparse fieldsets produce a different dict for the same row
+        return getattr(self.child, 'allowed', None) is None
+
+    def prepare(self, objs):
+        return objs
+
+    def to_representation(self, data):
+        if isinstance(data, Manager):
+            data = data.all()
+        objs = list(data)
+
+        keys = [None] * len(objs)
+        if self.use_fragment_cache():
+            keys = [get_fragment_key(self.child.fragment_type, obj)
+                    if isinstance(obj, Model) and obj.updated else None
+                    for obj in objs]
+        cached = {}
+        if any(keys):
+            cached = cache.get_many([key for key in keys if key])
+
+        misses = [obj for obj, key in zip(objs, keys) if key not in cached]
+        rendered = dict((id(obj), self.child.to_representation(obj))
+                        for obj in self.prepare(misses))
+
+        fresh = {}
+        representation = []
+        for obj, key in zip(objs, keys):
+            if key in cached:
+                representation.append(cached[key])
+                continue
+
+            representation.append(rendered[id(obj)])
+            if key:
+                fresh[key] = rendered[id(obj)]
+
+        if fresh:
+            cache.set_many(fresh, FRAGMENT_TIMEOUT)
+        return representation
+
 
 class DynamicFieldsModelSerializer(ModelSerializer):
-    """
-    A ModelSerializer that takes an additional `fields` argument that
-    controls which fields should be displayed.
-    """
+    '''
+        A ModelSerializer whose output can be narrowed with `?fields=`.
+
+        Subclasses describe their output in `representation` as
+        (key, source) pairs, where the source is a model attribute name or
+        a callable taking the object. Callables list the columns and
+        relations they read in `sparse_columns` and `sparse_prefetch`, so
+        `sparse_queryset` can load only what the requested keys need.
+    '''
+    representation = ()
+    sparse_columns = {}
+    sparse_prefetch = {}
+
+    # Returned whatever `?fields=` asks for
+    sparse_always = ('id', 'type',)
+    # Always loaded; keyset pagination reads `created` off every row
+    sparse_always_columns = ('created',)
 
     def __init__(self, *args, **kwargs):
-        # Instantiate the superclass normally
         super(DynamicFieldsModelSerializer, self).__init__(*args, **kwargs)
-        fields = self.context['request'].query_params.get('fields')
-        if fields:
-            fields = fields.split(',')
-            # Drop any fields that are not specified in the `fields` argument.
-            allowed = set(fields)
-            self.allowed = allowed
+        self.allowed = get_requested_fields(self.context.get('request'))
+
+    @classmethod
+    def get_wanted_keys(cls, allowed):
+        return [key for key, source in cls.representation
+                if allowed is None or key in allowed or
+                key in cls.sparse_always]
+
+    @classmethod
+    def get_prefetch_lookups(cls, allowed):
+        lookups = []
+        for key in cls.get_wanted_keys(allowed):
+            for lookup in cls.sparse_prefetch.get(key, ()):
+                if lookup not in lookups:
+                    lookups.append(lookup)
+        return lookups
+
+    @classmethod
+    def get_columns(cls, allowed):
+        opts = cls.Meta.model._meta
+        sources = dict(cls.representation)
+
+        names = set(cls.sparse_always_columns)
+        for key in cls.get_wanted_keys(allowed):
+            if callable(sources[key]):
+                names.update(cls.sparse_columns.get(key, ()))
+            elif sources[key] != 'pk':
+                names.add(sources[key])
+
+        # Sources may use attnames (`team_id`); only() wants field names
+        columns = set([opts.pk.name])
+        for name in names:
+            columns.add(opts.get_field(name).name)
+        return columns
+
+    @classmethod
+    def sparse_queryset(cls, queryset, request):
+        allowed = get_requested_fields(request)
+        if allowed is None or queryset.model is not cls.Meta.model:
+            return queryset
+
+        return queryset.only(*cls.get_columns(allowed)).prefetch_related(
+            None).prefetch_related(*cls.get_prefetch_lookups(allowed))
+
+    def represent(self, obj):
+        data = {}
+        for key, source in self.representation:
+            if (self.allowed is not None and key not in self.allowed and
+                    key not in self.sparse_always):
+                continue
+
+            if callable(source):
+                data[key] = source(obj)
+            else:
+                data[key] = getattr(obj, source)
+        return data
 
 # Source:
 # http://stackoverflow.com/questions/23643204/django-rest-framework-dynamically-return-subset-of-fields
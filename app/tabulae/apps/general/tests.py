@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+# Core Django imports
+from django.test import SimpleTestCase
+
+# Imports from app
+from .elastic_search import CachedElasticsearch
+
+
+class FakeCache(object):
+    '''
+        The parts of the Django cache API CachedElasticsearch uses, in a
+        dict. Timeouts are recorded but never expire anything.
+    '''
+
+    def __init__(self):
+        self.data = {}
+        self.timeouts = {}
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def set(self, key, value, timeout=None):
+        self.data[key] = value
+        self.timeouts[key] = timeout
+
+    def add(self, key, value, timeout=None):
+        if key in self.data:
+            return False
+        self.set(key, value, timeout)
+        return True
+
+    def delete(self, key):
+        self.data.pop(key, None)
+        self.timeouts.pop(key, None)
+
+
+class FakeClient(object):
+    '''
+        Answers every call with a new numbered result and records it.
+    '''
+
+    def __init__(self):
+        self.calls = []
+
+    def _answer(self, method, params):
+        self.calls.append((method, params))
+        return {'hits': {'total': len(self.calls)}}
+
+    def search(self, **params):
+        return self._answer('search', params)
+
+    def mget(self, **params):
+        return self._answer('mget', params)
+
+    def msearch(self, **params):
+        self.calls.append(('msearch', params))
+        return {'responses': [{'hits': {'total': len(self.calls)}}
+                              for _ in params['body'][::2]]}
+
+    def info(self):
+        return 'info'
+
+
+class CachedElasticsearchTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        self.client = FakeClient()
+        self.cache = FakeCache()
+        self.spawned = []
+        self.es = CachedElasticsearch(
+            self.client, cache=self.cache, ttls={'tweets': 60},
+            default_ttl=30, stale_ttl=600, clock=lambda: self.now,
+            spawn=self.spawned.append)
+
+    def search(self, index='tweets', body=None):
+        return self.es.search(index=index, doc_type='tweet',
+                              body=body or {'query': {'match_all': {}}})
+
+    def test_miss_then_hit(self):
+        first = self.search()
+        second = self.search()
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.client.calls), 1)
+        self.assertEqual(self.es.stats,
+                         {'hits': 1, 'stale': 0, 'misses': 1})
+
+    def test_key_ignores_body_key_order(self):
+        self.search(body={'size': 10, 'from': 0})
+        self.search(body={'from': 0, 'size': 10})
+
+        self.assertEqual(len(self.client.calls), 1)
+
+    def test_ttl_per_index(self):
+        self.search(index='tweets')
+        self.search(index='headlines')
+
+        entries = sorted(self.cache.data.values())
+        self.assertEqual([fresh_until for fresh_until, _ in entries],
+                         [self.now + 30, self.now + 60])
+        self.assertEqual(sorted(self.cache.timeouts.values()),
+                         [30 + 600, 60 + 600])
+
+    def test_stale_result_is_served_while_revalidating(self):
+        first = self.search()
+        self.now += 61
+
+        stale = self.search()
+        self.assertEqual(stale, first)
+        self.assertEqual(len(self.client.calls), 1)
+        self.assertEqual(len(self.spawned), 1)
+        self.assertEqual(self.es.stats,
+                         {'hits': 0, 'stale': 1, 'misses': 1})
+
+        self.spawned[0]()
+        fresh = self.search()
+        self.assertEqual(len(self.client.calls), 2)
+        self.assertNotEqual(fresh, first)
+        self.assertEqual(self.es.stats,
+                         {'hits': 1, 'stale': 1, 'misses': 1})
+
+    def test_one_revalidation_at_a_time(self):
+        self.search()
+        self.now += 61
+
+        self.search()
+        self.search()
+        self.assertEqual(len(self.spawned), 1)
+
+        self.spawned[0]()
+        self.now += 61
+        self.search()
+        self.assertEqual(len(self.spawned), 2)
+
+    def test_msearch_uses_shortest_ttl(self):
+        self.es.msearch(body=[{'index': 'tweets'}, {},
+                              {'index': 'headlines'}, {}])
+
+        (fresh_until, _), = self.cache.data.values()
+        self.assertEqual(fresh_until, self.now + 30)
+
+    def test_msearch_errors_are_not_cached(self):
+        self.client.msearch = lambda **params: {
+            'responses': [{'error': 'boom'}]}
+
+        self.es.msearch(body=[{'index': 'tweets'}, {}])
+        self.assertEqual(self.cache.data, {})
+        self.assertEqual(self.es.stats,
+                         {'hits': 0, 'stale': 0, 'misses': 1})
+
+    def test_other_methods_go_to_the_client(self):
+        self.assertEqual(self.es.info(), 'info')
+        self.assertEqual(self.cache.data, {})
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+# Stdlib imports
+import datetime
+
+# Imports from app
+from .elastic_search import cached_es
+
+# Metrics kept in the `timeseries` index for each network
+TIMESERIES_METRICS = {
+    'twitter': ('Followers', 'Following', 'Likes', 'Retweets', 'Posts',),
+    'instagram': ('Followers', 'Following', 'Likes', 'Comments', 'Posts',),
+}
+
+# Buckets a series can be downsampled to
+TIMESERIES_INTERVALS = ('day', 'week', 'month',)
+
+# Daily documents fetched per mget
+MGET_BATCH_SIZE = 1000
+
+DEFAULT_DAYS = 7
+
+
+def get_days(value, default=DEFAULT_DAYS):
+    try:
+        days = int(value)
+    except (TypeError, ValueError):
+        days = 0
+    return days if days > 0 else default
+
+
+def get_bucket(date, interval):
+    '''
+        Returns the first day of the `interval` bucket `date` falls in,
+        with weeks starting on Monday like Elasticsearch's.
+    '''
+    if interval == 'week':
+        return date - datetime.timedelta(days=date.weekday())
+    elif interval == 'month':
+        return date.replace(day=1)
+    return date
+
+
+def get_usernames(contacts, contact_ids, network):
+    '''
+        Resolves contact ids to usernames on `network` in one query, in
+        the order the ids were given. `contacts` is the queryset the ids
+        are allowed to come from.
+    '''
+    pks = []
+    for contact_id in contact_ids:
+        try:
+            pks.append(int(contact_id))
+        except (TypeError, ValueError):
+            continue
+
+    usernames = dict(contacts.filter(pk__in=pks).values_list('pk', network))
+    return [usernames[pk] for pk in pks if usernames.get(pk)]
+
+
+def get_daily_documents(network, usernames, days, client=cached_es):
+    '''
+        Returns the raw daily documents of every username for the last
+        `days` days, newest first, fetching at most MGET_BATCH_SIZE ids
+        per request.
+    '''
+    today = datetime.date.today()
+    dates = [(today - datetime.timedelta(days=i)).strftime('%Y-%m-%d')
+             for i in xrange(days)]
+    ids = [username + '-' + date for username in usernames for date in dates]
+
+    documents = []
+    for start in xrange(0, len(ids), MGET_BATCH_SIZE):
+        es_timeseries = client.mget(
+            index='timeseries', doc_type=network,
+            body={'ids': ids[start:start + MGET_BATCH_SIZE]})
+
+        for ts in es_timeseries.get('docs', []):
+            if (ts.get('found') and '_source' in ts and
+                    'data' in ts['_source']):
+                documents.append(ts['_source']['data'])
+    return documents
+
+
+def _parse_date(value):
+    try:
+        return datetime.datetime.strptime(value[:10], '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_value(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def documents_to_values(network, documents):
+    '''
+        Turns daily Elasticsearch documents into {username: {date:
+        [values]}}, values in TIMESERIES_METRICS order.
+    '''
+    metrics = TIMESERIES_METRICS[network]
+    values = {}
+    for document in documents:
+        date = _parse_date(document.get('CreatedAt'))
+        if not document.get('Username') or date is None:
+            continue
+        values.setdefault(document['Username'], {})[date] = [
+            _parse_value(document.get(metric)) for metric in metrics]
+    return values
+
+
+def bucket_points(network, series, interval):
+    '''
+        Buckets a {date: [values]} series by `interval`, keeping the
+        highest value of every metric within each bucket, i.e. where the
+        counter stood at the end of it.
+    '''
+    buckets = {}
+    for date, day_values in series.items():
+        bucket = buckets.setdefault(get_bucket(date, interval),
+                                    [None] * len(day_values))
+        for index, value in enumerate(day_values):
+            if value is not None and (bucket[index] is None or
+                                      value > bucket[index]):
+                bucket[index] = value
+
+    columns = [metric.lower() for metric in TIMESERIES_METRICS[network]]
+    return [dict([('date', date.strftime('%Y-%m-%d'))] + zip(
+        columns, buckets[date])) for date in sorted(buckets)]
+
+
+def get_bucketed_series(network, usernames, days, interval):
+    '''
+        Returns one series per username, bucketed by `interval`. The
+        daily documents are fetched by id, in batches, like
+        get_daily_documents does, and bucketed here: no aggregation
+        relies on how data.Username or data.CreatedAt are mapped.
+        Usernames match their documents whatever their case.
+    '''
+    values = {}
+    for username, series in documents_to_values(
+            network, get_daily_documents(network, usernames, days)).items():
+        values.setdefault(username.lower(), {}).update(series)
+
+    return [{
+        'username': username,
+        'interval': interval,
+        'points': bucket_points(
+            network, values.get(username.lower(), {}), interval),
+    } for username in usernames]
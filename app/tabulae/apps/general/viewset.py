@@ -5,10 +5,22 @@ from rest_framework.status import HTTP_201_CREATED
 
 # Imports from app
 from .response import Response, BulkResponse
+from .serializers import DynamicFieldsModelSerializer
 
 
 class NewsAIModelViewSet(ModelViewSet):
 
+    def filter_queryset(self, queryset):
+        queryset = super(NewsAIModelViewSet, self).filter_queryset(queryset)
+
+        # Narrow the columns and prefetches to what `?fields=` asks for.
+        # Writes keep full rows so save() doesn't skip deferred fields.
+        serializer_class = self.get_serializer_class()
+        if (self.request.method == 'GET' and
+                issubclass(serializer_class, DynamicFieldsModelSerializer)):
+            queryset = serializer_class.sparse_queryset(queryset, self.request)
+        return queryset
+
     def get_paginated_response(self, data, included=[]):
         assert self.paginator is not None
         return self.paginator.get_paginated_response(data, included)
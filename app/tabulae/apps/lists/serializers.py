@@ -18,12 +18,19 @@ from rest_framework.serializers import CharField
 
 # Imports from app
 from tabulae.apps.general.response import form_response
-from tabulae.apps.users.models import Client, UserProfile
+from tabulae.apps.general.serializers import (
+    DynamicFieldsModelSerializer,
+    FragmentCacheListSerializer,
+)
+from tabulae.apps.users.models import Client
+from tabulae.apps.users.utils import get_tenant
 from .models import MediaList, CustomFieldsMap
 
 
 class CustomFieldsMapSerializer(ModelSerializer):
 
+    fragment_type = 'fields-map'
+
     id = IntegerField(required=False)
 
     customfield = BooleanField(source='custom_field', required=False)
@@ -89,7 +96,7 @@ class CustomFieldsMapSerializer(ModelSerializer):
         custom_fields_map = {
             'id': obj.pk,
             'type': 'fields-map',
-            'createdby': obj.created_by and obj.created_by.pk,
+            'createdby': obj.created_by_id,
             'created': obj.created,
             'updated': obj.updated,
 
@@ -109,9 +116,36 @@ class CustomFieldsMapSerializer(ModelSerializer):
         model = CustomFieldsMap
         fields = ('name', 'value', 'custom_field', 'hidden', 'id',
                   'customfield',)
+        list_serializer_class = FragmentCacheListSerializer
+
+
+class MediaListSummarySerializer(ModelSerializer):
+    '''
+        Column-only representation of a media list, for responses that
+        just need to tell the client which lists changed.
+    '''
+
+    def to_representation(self, obj):
+        return {
+            'id': obj.pk,
+            'type': 'lists',
+            'createdby': obj.created_by_id,
+            'created': obj.created,
+            'updated': obj.updated,
+
+            'name': obj.name,
+            'client': obj.client_name,
+            'teamid': obj.team_id,
+            'archived': obj.archived,
+            'isdeleted': obj.is_deleted,
+        }
+
+    class Meta:
+        model = MediaList
+        fields = ('name',)
 
 
-class MediaListSerializer(TaggitSerializer, ModelSerializer):
+class MediaListSerializer(TaggitSerializer, DynamicFieldsModelSerializer):
     tags = TagListSerializerField(required=False)
 
     # These two are to properly serialize the fields_maps.
@@ -127,6 +161,32 @@ class MediaListSerializer(TaggitSerializer, ModelSerializer):
         source='client_name', required=False)
     client_name = CharField(required=False)
 
+    representation = (
+        ('id', 'pk'),
+        ('type', lambda obj: 'lists'),
+        ('createdby', 'created_by_id'),
+        ('created', 'created'),
+        ('updated', 'updated'),
+
+        ('name', 'name'),
+        ('client', 'client_name'),
+        ('clients', lambda obj: obj.clients.values_list('id', flat=True)),
+
+        ('contacts', lambda obj: obj.contacts.values_list('id', flat=True)),
+        ('fieldsmap', lambda obj: CustomFieldsMapSerializer(
+            obj.fields_map, many=True).data),
+        ('tags', lambda obj: obj.tags.values_list('name', flat=True)),
+
+        ('fileupload', 'file_id'),
+        ('teamid', 'team_id'),
+
+        ('readonly', lambda obj: False),
+        ('publiclist', 'public_list'),
+        ('archived', 'archived'),
+        ('subscribed', 'subscribed'),
+        ('isdeleted', 'is_deleted'),
+    )
+
     def to_representation(self, obj):
         has_data = False
         included = {}
@@ -137,34 +197,7 @@ class MediaListSerializer(TaggitSerializer, ModelSerializer):
 
                 obj = obj['data']
 
-        media_list = {
-            'id': obj.pk,
-            'type': 'lists',
-            'createdby': obj.created_by and obj.created_by.pk,
-            'created': obj.created,
-            'updated': obj.updated,
-
-            'name': obj.name,
-            'client': obj.client_name,
-            'clients': (obj.clients and
-                        obj.clients.values_list('id', flat=True)),
-
-            'contacts': (obj.contacts and
-                         obj.contacts.values_list('id', flat=True)),
-            'fieldsmap': (obj.fields_map and
-                          CustomFieldsMapSerializer(
-                              obj.fields_map, many=True).data),
-            'tags': (obj.tags and obj.tags.values_list('name', flat=True)),
-
-            'fileupload': obj.file and obj.file.pk,
-            'teamid': obj.team and obj.team.pk,
-
-            'readonly': False,
-            'publiclist': obj.public_list,
-            'archived': obj.archived,
-            'subscribed': obj.subscribed,
-            'isdeleted': obj.is_deleted,
-        }
+        media_list = self.represent(obj)
 
         if has_data:
             return {
@@ -383,8 +416,7 @@ class MediaListSerializer(TaggitSerializer, ModelSerializer):
             for tag in tags:
                 media_list.tags.add(tag)
 
-        user_profile = UserProfile.objects.get(user=user)
-        media_list.team = user_profile.team
+        media_list.team = get_tenant(request).team
         media_list.created_by = user
         media_list.save()
 
@@ -461,8 +493,7 @@ class MediaListSerializer(TaggitSerializer, ModelSerializer):
         media_list.is_deleted = validated_data.get(
             'is_deleted', media_list.is_deleted)
 
-        user_profile = UserProfile.objects.get(user=user)
-        media_list.team = user_profile.team
+        media_list.team = get_tenant(request).team
 
         media_list.save()
 
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+# Stdlib imports
+import logging
+
+# Imports from app
+from tabulae.apps.feeds.models import Feed
+from tabulae.apps.general.elastic_search import cached_es
+from tabulae.apps.general.pagination import (
+    get_es_after_cursor, paginate_es_query)
+from .models import MediaList
+
+logger = logging.getLogger(__name__)
+
+# Index, doc type, source fields and sort of each feed a list exposes
+FEED_SEARCHES = {
+    'feed': {
+        'index': 'feeds',
+        'doc_type': 'feed',
+        'sources': ('twitter', 'instagram', 'feed_urls',),
+        'sort': 'data.CreatedAt',
+    },
+    'tweets': {
+        'index': 'tweets',
+        'doc_type': 'tweet',
+        'sources': ('twitter',),
+        'sort': 'data.CreatedAt',
+    },
+    'headlines': {
+        'index': 'headlines',
+        'doc_type': 'headline',
+        'sources': ('feed_urls',),
+        'sort': 'data.PublishDate',
+        # data.FeedURL may be analyzed in this index, where an exact
+        # `terms` filter would match nothing
+        'match_sources': ('feed_urls',),
+    },
+}
+
+# ES field each source is matched against
+FEED_SOURCE_FIELDS = {
+    'twitter': 'data.Username',
+    'instagram': 'data.InstagramUsername',
+    'feed_urls': 'data.FeedURL',
+}
+
+# `should` clauses per search, under Elasticsearch's default
+# indices.query.bool.max_clause_count of 1024. Lists with more go out as
+# several searches whose hits are merged.
+MAX_SHOULD_CLAUSES = 1000
+
+
+class MediaListFeedQuery(object):
+    '''
+        Builds the Elasticsearch queries behind a list's feed, tweets and
+        headlines.
+
+        The usernames and feed URLs of every contact come from two set
+        based queries, whatever the size of the list, and each source
+        becomes a single `terms` filter rather than a `should` clause per
+        contact. Headline feed URLs, which may be an analyzed field, are
+        still matched one phrase per URL, split over several searches
+        when there are more than MAX_SHOULD_CLAUSES of them. Every search
+        goes to Elasticsearch in one `_msearch`.
+    '''
+
+    def __init__(self, media_list):
+        contact_ids = MediaList.contacts.through.objects.filter(
+            medialist=media_list).values('contact_id')
+
+        twitter = set()
+        instagram = set()
+        for username, instagram_username in (
+                media_list.contacts.values_list('twitter', 'instagram')):
+            if username:
+                twitter.add(username)
+            if instagram_username:
+                instagram.add(instagram_username)
+
+        feed_urls = set(Feed.objects.filter(
+            contact_id__in=contact_ids, valid_feed=True,
+            running=True).exclude(feed_url='').values_list(
+            'feed_url', flat=True))
+
+        self.sources = {
+            'twitter': sorted(twitter),
+            'instagram': sorted(instagram),
+            'feed_urls': sorted(feed_urls),
+        }
+
+    def get_filters(self, kind):
+        filters = []
+        match_sources = FEED_SEARCHES[kind].get('match_sources', ())
+        for source in FEED_SEARCHES[kind]['sources']:
+            if not self.sources[source]:
+                continue
+            field = FEED_SOURCE_FIELDS[source]
+            if source in match_sources:
+                filters.extend({
+                    'match_phrase': {
+                        field: value,
+                    }
+                } for value in self.sources[source])
+            else:
+                filters.append({
+                    'terms': {
+                        field: self.sources[source],
+                    }
+                })
+        return filters
+
+    def get_filter_groups(self, kind):
+        '''
+            Splits the filters of a feed into groups of at most
+            MAX_SHOULD_CLAUSES, one search each.
+        '''
+        filters = self.get_filters(kind)
+        return [filters[start:start + MAX_SHOULD_CLAUSES]
+                for start in xrange(0, len(filters), MAX_SHOULD_CLAUSES)]
+
+    def get_bodies(self, kind, request=None):
+        '''
+            Returns the query bodies for a feed (none when the list has
+            nothing to match it against), and the size and offset of the
+            page. The page comes from `request`'s limit and offset or
+            cursor when given.
+
+            When the feed takes several searches each one reads from the
+            first hit to the end of the page, and search() merges them and
+            skips the offset.
+        '''
+        groups = self.get_filter_groups(kind)
+        bodies = []
+        size = 20
+        offset = 0
+        for filters in groups:
+            query = {
+                'size': 20,
+                'from': 0,
+                'query': {
+                    'bool': {
+                        'filter': {
+                            'bool': {
+                                'should': filters,
+                                'minimum_should_match': 1,
+                            }
+                        }
+                    }
+                },
+                'sort': [{
+                    FEED_SEARCHES[kind]['sort']: {
+                        'order': 'desc',
+                        'mode': 'avg'
+                    }
+                }]
+            }
+
+            if request is not None:
+                paginate_es_query(query, request)
+            size = query['size']
+            if len(groups) > 1 and query.get('from'):
+                offset = int(query['from'])
+                query['size'] += offset
+                query['from'] = 0
+            bodies.append(query)
+        return bodies, size, offset
+
+    def merge_responses(self, es_responses, size, offset=0):
+        '''
+            Merges the responses of a feed's searches into one, keeping
+            the `size` hits after `offset` in sort order.
+        '''
+        if len(es_responses) == 1:
+            return es_responses[0]
+
+        hits = []
+        total = 0
+        for es_response in es_responses:
+            hits.extend(es_response['hits'].get('hits', []))
+            total += es_response['hits'].get('total', 0)
+        hits.sort(key=lambda hit: hit.get('sort', []), reverse=True)
+        return {
+            'hits': {
+                'total': total,
+                'hits': hits[offset:offset + size],
+            }
+        }
+
+    def search(self, *kinds, **kwargs):
+        '''
+            Runs the searches for `kinds` in one `_msearch` round trip.
+            Returns a dict of kind -> (total, hits' data, after cursor).
+            A feed whose search fails is logged and comes back empty.
+        '''
+        request = kwargs.get('request')
+        results = dict((kind, (0, [], '')) for kind in kinds)
+
+        body = []
+        searched = []
+        for kind in kinds:
+            queries, size, offset = self.get_bodies(kind, request)
+            for query in queries:
+                body.append({
+                    'index': FEED_SEARCHES[kind]['index'],
+                    'type': FEED_SEARCHES[kind]['doc_type'],
+                })
+                body.append(query)
+            if queries:
+                searched.append((kind, queries, size, offset))
+
+        if not searched:
+            return results
+
+        es_responses = iter(cached_es.msearch(body=body)['responses'])
+        for kind, queries, size, offset in searched:
+            responses = [next(es_responses) for _ in queries]
+            errors = [es_response.get('error', 'no hits')
+                      for es_response in responses
+                      if 'hits' not in es_response]
+            if errors:
+                logger.error('List %s search failed: %s', kind, errors)
+                continue
+
+            es_response = self.merge_responses(responses, size, offset)
+
+            hits = [hit['_source']['data']
+                    for hit in es_response['hits'].get('hits', [])
+                    if '_source' in hit and 'data' in hit['_source']]
+            results[kind] = (es_response['hits'].get('total', 0), hits,
+                             get_es_after_cursor(es_response, {'size': size}))
+        return results
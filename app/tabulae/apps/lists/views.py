@@ -1,11 +1,12 @@
 # -*- coding: utf-8 -*-
 # Stdlib imports
+from collections import OrderedDict
 import datetime
 import os
 import binascii
 
 # Core Django imports
-from django.db.models import Q
+from django.db.models import Count, Max, Q
 from django.contrib.auth import get_user_model
 from django.shortcuts import get_object_or_404
 
@@ -18,24 +19,48 @@ from rest_framework.parsers import (
     MultiPartParser,
 )
 from rest_framework.exceptions import NotAuthenticated, ParseError
+from rest_framework.settings import api_settings
 
 # Imports from app
 from tabulae.apps.general.viewset import NewsAIModelViewSet
-from tabulae.apps.general.pagination import GlobalPagination
-from tabulae.apps.general.response import Response, BulkResponse
-from tabulae.apps.general.elastic_search import es
+from tabulae.apps.general.pagination import (
+    TOTAL_APPROXIMATE, GlobalPagination)
+from tabulae.apps.general.response import (
+    Response, BulkResponse, StreamingBulkResponse, get_etag, not_modified,
+    with_etag)
+from tabulae.apps.general.serializers import get_requested_fields
+from tabulae.apps.general.timeseries import (
+    TIMESERIES_INTERVALS,
+    get_daily_documents,
+    get_days,
+    get_usernames,
+)
 from tabulae.apps.general.permissions import IsAdminOrIsSelf
 from tabulae.apps.files.models import File
 from tabulae.apps.files.serializers import FileSerializer
+from tabulae.apps.files.tasks import stage_uploaded_file
 from tabulae.apps.contacts.models import Contact
+from tabulae.apps.contacts.rollups import (
+    get_series,
+    get_summed_series,
+)
 from tabulae.apps.emails.serializers import EmailSerializer
 from tabulae.apps.publications.serializers import PublicationSerializer
 from tabulae.apps.emails.models import Email
-from tabulae.apps.contacts.serializers import ContactSerializer
-from tabulae.apps.users.models import UserProfile
-from tabulae.apps.feeds.models import Feed
+from tabulae.apps.contacts.serializers import (
+    ContactSerializer,
+    ContactListSerializer,
+    MediaListContactSerializer,
+)
+from tabulae.apps.contacts.social import order_by_social_field
+from tabulae.apps.emails.utils import (
+    get_last_contacted_updated,
+    order_by_last_contacted,
+)
+from tabulae.apps.users.utils import get_tenant
 from .models import MediaList, CustomFieldsMap
 from .serializers import MediaListSerializer
+from .utils import MediaListFeedQuery
 from .permissions import MediaListPermission
 
 
@@ -56,17 +81,34 @@ class MediaListViewSet(NewsAIModelViewSet):
 
     def get_media_list_by_pk(self, request, pk):
         if request.user and request.user.is_authenticated():
-            user_profile = UserProfile.objects.get(user=request.user)
-            queryset = MediaList.objects.filter(team=user_profile.team)
+            queryset = MediaList.objects.filter(
+                team=get_tenant(request).team)
             media_list = get_object_or_404(queryset, pk=pk)
             return media_list
         raise NotAuthenticated()
 
+    def get_media_list_etag(self, media_list):
+        # Contact membership and the fields map live in other tables and
+        # don't always bump the list's own `updated`.
+        contacts = MediaList.contacts.through.objects.filter(
+            medialist=media_list).count()
+        fields_map = media_list.fields_map.aggregate(
+            updated=Max('updated'), count=Count('pk'))
+        return get_etag(media_list.pk, media_list.updated, contacts,
+                        fields_map['updated'], fields_map['count'])
+
     def retrieve(self, request, pk=None):
         if request.user and request.user.is_authenticated():
             media_list = self.get_media_list_by_pk(request, pk)
-            serializer = MediaListSerializer(media_list)
-            return Response(serializer.data, {})
+
+            etag = self.get_media_list_etag(media_list)
+            response = not_modified(request, etag)
+            if response is not None:
+                return response
+
+            serializer = MediaListSerializer(
+                media_list, context=self.get_serializer_context())
+            return with_etag(Response(serializer.data, {}), etag)
         raise NotAuthenticated()
 
     def list(self, request):
@@ -78,9 +120,9 @@ class MediaListViewSet(NewsAIModelViewSet):
                 serializer = self.get_serializer(page, many=True)
                 return self.get_paginated_response(serializer.data)
 
-            serializer = self.get_serializer(queryset, many=True)
-            return BulkResponse(serializer.data, {},
-                                len(serializer.data), len(serializer.data))
+            return StreamingBulkResponse(
+                queryset, self.get_serializer_class(),
+                self.get_serializer_context())
         raise NotAuthenticated()
 
     def destroy(self, request, pk, format=None):
@@ -95,12 +137,11 @@ class MediaListViewSet(NewsAIModelViewSet):
 
     def get_queryset(self,):
         if self.request.user and self.request.user.is_authenticated():
-            user_profile = UserProfile.objects.get(user=self.request.user)
             return MediaList.objects.filter(
                 created_by=self.request.user,
                 archived=False,
                 is_deleted=False,
-                team=user_profile.team
+                team=get_tenant(self.request).team
             ).order_by('-created')
         raise NotAuthenticated()
 
@@ -116,10 +157,9 @@ class MediaListViewSet(NewsAIModelViewSet):
     @list_route(methods=['get'], url_path='archived',
                 permission_classes=[IsAdminOrIsSelf])
     def archived(self, request):
-        user_profile = UserProfile.objects.get(user=request.user)
         media_lists = MediaList.objects.filter(
             created_by=request.user,
-            team=user_profile.team,
+            team=get_tenant(request).team,
             archived=True,
             is_deleted=False
         ).order_by('-created')
@@ -129,18 +169,17 @@ class MediaListViewSet(NewsAIModelViewSet):
             serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
 
-        serializer = self.get_serializer(media_lists, many=True)
-        return BulkResponse(serializer.data, {},
-                            len(serializer.data), len(serializer.data))
+        return StreamingBulkResponse(
+            media_lists, self.get_serializer_class(),
+            self.get_serializer_context())
 
     # GET /lists/<id> if id == 'clients' (External)
     @list_route(methods=['get'], url_path='clients',
                 permission_classes=[IsAdminOrIsSelf])
     def clients(self, request):
         # Retrieve all distinct clients
-        user_profile = UserProfile.objects.get(user=request.user)
         media_lists = MediaList.objects.filter(
-            team=user_profile.team,
+            team=get_tenant(request).team,
             is_deleted=False,
             archived=False
         ).exclude(
@@ -165,19 +204,19 @@ class MediaListViewSet(NewsAIModelViewSet):
             serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
 
-        serializer = self.get_serializer(media_lists, many=True)
-        return BulkResponse(serializer.data, {},
-                            len(serializer.data), len(serializer.data))
+        return StreamingBulkResponse(
+            media_lists, self.get_serializer_class(),
+            self.get_serializer_context())
 
     # GET /lists/<id> if id == 'team' (External)
     @list_route(methods=['get'], url_path='team',
                 permission_classes=[IsAdminOrIsSelf])
     def team(self, request):
-        user_profile = UserProfile.objects.get(user=request.user)
+        tenant = get_tenant(request)
         media_lists = MediaList.objects.none()
-        if user_profile.team:
+        if tenant.team:
             media_lists = MediaList.objects.filter(
-                team=user_profile.team,
+                team=tenant.team,
                 is_deleted=False,
                 archived=False
             ).filter(~Q(created_by=self.request.user))
@@ -187,9 +226,9 @@ class MediaListViewSet(NewsAIModelViewSet):
             serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
 
-        serializer = self.get_serializer(media_lists, many=True)
-        return BulkResponse(serializer.data, {},
-                            len(serializer.data), len(serializer.data))
+        return StreamingBulkResponse(
+            media_lists, self.get_serializer_class(),
+            self.get_serializer_context())
 
     # GET /lists/<id>/contacts (External)
     @detail_route(methods=['get'], url_path='contacts',
@@ -204,225 +243,104 @@ class MediaListViewSet(NewsAIModelViewSet):
                               '=email', '=employers__name',
                               '=custom_fields__value',)
         queryset = SearchFilter().filter_queryset(request, queryset, self)
-        queryset = queryset.order_by('-created')
+        if request.GET.get(api_settings.SEARCH_PARAM):
+            # Counting a search across the employers and custom fields
+            # joins is the slow part; estimate it unless `?total=` says
+            # otherwise
+            self.pagination_total = TOTAL_APPROXIMATE
+
+        # `?order=-twitterfollowers`, `-lastcontacted` and the like
+        # sort on the precomputed columns; anything else keeps newest
+        # first.
+        team = get_tenant(request).team
+        ordering = request.GET.get(OrderingFilter.ordering_param, '')
+        validators = queryset.order_by().aggregate(
+            updated=Max('updated'), count=Count('pk'),
+            social_updated=Max('social_fields__updated'))
+
+        ordered = order_by_social_field(queryset, ordering)
+        if ordered is None:
+            ordered = order_by_last_contacted(
+                queryset, ordering, team, request.user)
+        if ordered is None:
+            ordered = queryset.order_by('-created')
+        queryset = ordered
+
+        # max(updated) and the row count of the filtered contacts change
+        # whenever any contact on any page does, and so do the nightly
+        # social fields refresh and emails going out; the URL covers the
+        # rest.
+        etag = get_etag(media_list.pk, media_list.updated,
+                        validators['updated'], validators['count'],
+                        validators['social_updated'],
+                        get_last_contacted_updated(team, request.user))
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+
+        queryset = ContactSerializer.sparse_queryset(queryset, request)
 
         page = self.paginate_queryset(queryset)
         if page is not None:
             included = []
 
+            # Prefetch the page once; both the included publications
+            # and the contacts themselves are read from that cache.
+            lookups = ContactSerializer.get_prefetch_lookups(
+                get_requested_fields(request))
+            page = ContactListSerializer.prefetch(page, lookups)
+
             # Initialize included
-            publications = []
+            publications = OrderedDict()
             for contact in page:
-                publication = []
-                if contact.employers.count() > 0:
-                    publication += list(contact.employers.all())
-                if contact.past_employers.count() > 0:
-                    publication += list(contact.past_employers.all())
-                if len(publication) > 0:
-                    publications += publication
+                for relation in ('employers', 'past_employers'):
+                    if relation not in lookups:
+                        continue
+                    for publication in getattr(contact, relation).all():
+                        publications[publication.pk] = publication
 
             if len(publications) > 0:
                 pub_serializer = PublicationSerializer(
-                    publications, many=True)
+                    publications.values(), many=True)
                 included = pub_serializer.data
 
-            serializer = ContactSerializer(page, many=True)
-            return self.get_paginated_response(serializer.data, included)
+            serializer = MediaListContactSerializer(
+                page, many=True, context=self.get_serializer_context())
+            return with_etag(self.get_paginated_response(
+                serializer.data, included), etag)
 
-        serializer = ContactSerializer(queryset, many=True)
-        return BulkResponse(serializer.data, {},
-                            len(serializer.data), len(serializer.data))
+        return with_etag(StreamingBulkResponse(
+            queryset, MediaListContactSerializer,
+            self.get_serializer_context()), etag)
 
     # GET /lists/<id>/headlines (External)
     @detail_route(methods=['get'], url_path='headlines',
                   permission_classes=[IsAdminOrIsSelf])
     def headlines(self, request, pk=None):
         media_list = self.get_media_list_by_pk(request, pk)
-        contacts = media_list.contacts.all()
-
-        # Response to user
-        headlines = []
-        total_headlines = 0
-
-        should = []
-        for contact in contacts:
-            feeds = Feed.objects.filter(
-                contact=contact, valid_feed=True,
-                running=True)
-            for feed in feeds:
-                if feed.feed_url != '':
-                    should.append({
-                        'match': {
-                            'data.FeedURL': feed.feed_url
-                        }
-                    })
-
-        if len(should) > 0:
-            query = {
-                'size': 20,
-                'from': 0,
-                'query': {
-                    'bool': {
-                        'should': should
-                    }
-                },
-                'sort': [{
-                    'data.PublishDate': {
-                        'order': 'desc',
-                        'mode': 'avg'
-                    }
-                }]
-            }
-
-            es_headlines = es.search(
-                index='headlines', doc_type='headline', body=query)
-
-            if 'hits' in es_headlines and 'total' in es_headlines['hits']:
-                total_headlines = es_headlines['hits']['total']
-
-            if 'hits' in es_headlines and 'hits' in es_headlines['hits']:
-                for es_headline in es_headlines['hits']['hits']:
-                    if ('_source' in es_headline and
-                            'data' in es_headline['_source']):
-                        headlines.append(es_headline['_source']['data'])
+        total_headlines, headlines, after = MediaListFeedQuery(
+            media_list).search('headlines', request=request)['headlines']
         return BulkResponse(headlines, {}, len(headlines),
-                            total_headlines)
+                            total_headlines, after=after)
 
     # GET /lists/<id>/tweets (Internal)
     @detail_route(methods=['get'], url_path='tweets',
                   permission_classes=[IsAdminOrIsSelf])
     def tweets(self, request, pk=None):
         media_list = self.get_media_list_by_pk(request, pk)
-
-        total_tweets = 0
-        tweets = []
-
-        if media_list.contacts.count() > 0:
-            twitter_usernames = (media_list.contacts and
-                                 media_list.contacts.values_list(
-                                     'twitter', flat=True))
-            if len(twitter_usernames) > 0:
-                query = {
-                    'size': 20,
-                    'from': 0,
-                    'query': {
-                        'bool': {
-                            'should': [],
-                            'minimum_should_match': '100%'
-                        }
-                    },
-                    'sort': [{
-                        'data.CreatedAt': {
-                            'order': 'desc',
-                            'mode': 'avg'
-                        }
-                    }],
-                }
-
-                for username in twitter_usernames:
-                    query['query']['bool']['should'].append({
-                        'term': {
-                            'data.Username': username
-                        }
-                    })
-
-                es_tweets = es.search(
-                    index='tweets', doc_type='tweet', body=query)
-
-                if 'hits' in es_tweets and 'total' in es_tweets['hits']:
-                    total_tweets = es_tweets['hits']['total']
-
-                if 'hits' in es_tweets and 'hits' in es_tweets['hits']:
-                    for es_tweet in es_tweets['hits']['hits']:
-                        if ('_source' in es_tweet and
-                                'data' in es_tweet['_source']):
-                            tweets.append(es_tweet['_source']['data'])
-        return BulkResponse(tweets, {}, len(tweets), total_tweets)
+        total_tweets, tweets, after = MediaListFeedQuery(
+            media_list).search('tweets', request=request)['tweets']
+        return BulkResponse(tweets, {}, len(tweets), total_tweets,
+                            after=after)
 
     # GET /lists/<id>/feed (External)
     @detail_route(methods=['get'], url_path='feed',
                   permission_classes=[IsAdminOrIsSelf])
     def feed(self, request, pk=None):
         media_list = self.get_media_list_by_pk(request, pk)
-
-        # Response to user
-        feed = []
-        total_feed = 0
-
-        # ES attributes
-        should = []
-
-        if media_list.contacts.count() > 0:
-            twitter_usernames = (media_list.contacts and
-                                 media_list.contacts.values_list(
-                                     'twitter', flat=True))
-            instagram_usernames = (media_list.contacts and
-                                   media_list.contacts.values_list(
-                                       'instagram', flat=True))
-
-            feed_urls = []
-            contacts = media_list.contacts.all()
-            for contact in contacts:
-                feeds = Feed.objects.filter(
-                    contact=contact, valid_feed=True,
-                    running=True)
-                for feed in feeds:
-                    if feed.feed_url != '':
-                        feed_urls.append(feed.feed_url)
-
-            for twitter in twitter_usernames:
-                if twitter != '':
-                    should.append({
-                        'term': {
-                            'data.Username': twitter
-                        }
-                    })
-
-            for instagram in instagram_usernames:
-                if instagram != '':
-                    should.append({
-                        'term': {
-                            'data.InstagramUsername': instagram
-                        }
-                    })
-
-            for feed_url in feed_urls:
-                if feed_url != '':
-                    should.append({
-                        'term': {
-                            'data.FeedURL': feed_url
-                        }
-                    })
-
-        if len(should) > 0:
-            query = {
-                'size': 20,
-                'from': 0,
-                'query': {
-                    'bool': {
-                        'should': should
-                    }
-                },
-                'sort': [{
-                    'data.CreatedAt': {
-                        'order': 'desc',
-                        'mode': 'avg'
-                    }
-                }]
-            }
-
-            es_feeds = es.search(
-                index='feeds', doc_type='feed', body=query)
-
-            if 'hits' in es_feeds and 'total' in es_feeds['hits']:
-                total_feed = es_feeds['hits']['total']
-
-            if 'hits' in es_feeds and 'hits' in es_feeds['hits']:
-                for es_feed in es_feeds['hits']['hits']:
-                    if ('_source' in es_feed and
-                            'data' in es_feed['_source']):
-                        feed.append(es_feed['_source']['data'])
-        return BulkResponse(feed, {}, len(feed), total_feed)
+        total_feed, feed, after = MediaListFeedQuery(
+            media_list).search('feed', request=request)['feed']
+        return BulkResponse(feed, {}, len(feed), total_feed, after=after)
 
     # GET /lists/<id>/emails (External)
     @detail_route(methods=['get'], url_path='emails',
@@ -487,6 +405,9 @@ class MediaListViewSet(NewsAIModelViewSet):
             media_list.file = file
             media_list.save()
 
+            # Parse the upload once, before its headers are asked for
+            stage_uploaded_file.delay(file.pk)
+
             serializer = FileSerializer(file)
             return Response(serializer.data, {})
         raise ParseError()
@@ -537,108 +458,62 @@ class MediaListViewSet(NewsAIModelViewSet):
                 return Response(serializer.data, {})
         raise ParseError()
 
+    def get_timeseries(self, request, pk, network):
+        '''
+            Without `interval` the raw daily documents are returned as
+            before. With `interval` (day, week or month) one bucketed
+            series per username is returned instead, and `sum` adds the
+            contacts up into a single series.
+
+            Bucketed and summed series are read from the social rollups,
+            falling back to Elasticsearch for the usernames they don't
+            have. Raw documents always come from Elasticsearch.
+        '''
+        if 'ids' not in request.data or 'days' not in request.data:
+            raise ParseError()
+
+        interval = request.data.get('interval')
+        if interval is not None and interval not in TIMESERIES_INTERVALS:
+            raise ParseError('interval must be one of: %s.' % ', '.join(
+                TIMESERIES_INTERVALS))
+
+        self.get_media_list_by_pk(request, pk)
+        usernames = get_usernames(
+            Contact.objects.filter(team=get_tenant(request).team),
+            request.data['ids'], network)
+
+        timeseries = []
+        if len(usernames) > 0:
+            days = get_days(request.data['days'])
+            if request.data.get('sum'):
+                timeseries = [get_summed_series(
+                    network, usernames, days, interval or 'day')]
+            elif interval is None:
+                # Whole documents, which only Elasticsearch has
+                timeseries = get_daily_documents(network, usernames, days)
+            else:
+                timeseries = get_series(network, usernames, days, interval)
+
+        return BulkResponse(timeseries, {}, len(timeseries),
+                            len(timeseries))
+
     # POST /lists/<id>/twittertimeseries (External)
     @detail_route(methods=['post'], url_path='twittertimeseries',
                   permission_classes=[IsAdminOrIsSelf])
     def twitter_timeseries(self, request, pk=None):
-        if 'ids' in request.data and 'days' in request.data:
-            timeseries = []
-
-            twitter_usernames = []
-
-            for contact_id in request.data['ids']:
-                contact = Contact.objects.get(pk=contact_id)
-                if contact.twitter != '':
-                    twitter_usernames.append(contact.twitter)
-
-            if len(twitter_usernames) > 0:
-                # Set how many dates we want to look behind
-                default_date = 7
-                if request.data['days'] != 0:
-                    default_date = request.data['days']
-
-                # Add all twitter ids to ES ids
-                elastic_ids = []
-                for twitter in twitter_usernames:
-                    if twitter != '':
-                        for i in xrange(0, default_date):
-                            consider_date = (
-                                datetime.date.today() -
-                                datetime.timedelta(days=i))
-                            single_date = consider_date.strftime('%Y-%m-%d')
-                            elastic_ids.append(twitter + '-' + single_date)
-
-                if len(elastic_ids) > 0:
-                    query = {
-                        'ids': elastic_ids
-                    }
-
-                    es_timeseries = es.mget(
-                        index='timeseries', doc_type='twitter', body=query)
-
-                    if 'docs' in es_timeseries:
-                        for ts in es_timeseries['docs']:
-                            if ts['found']:
-                                if '_source' in ts and 'data' in ts['_source']:
-                                    timeseries.append(ts['_source']['data'])
-            return BulkResponse(timeseries, {}, len(timeseries),
-                                len(timeseries))
-        raise ParseError()
+        return self.get_timeseries(request, pk, 'twitter')
 
     # POST /lists/<id>/instagramtimeseries (External)
     @detail_route(methods=['post'], url_path='instagramtimeseries',
                   permission_classes=[IsAdminOrIsSelf])
     def instagram_timeseries(self, request, pk=None):
-        if 'ids' in request.data and 'days' in request.data:
-            timeseries = []
-
-            instagram_usernames = []
-
-            for contact_id in request.data['ids']:
-                contact = Contact.objects.get(pk=contact_id)
-                if contact.instagram != '':
-                    instagram_usernames.append(contact.instagram)
-
-            if len(instagram_usernames) > 0:
-                # Set how many dates we want to look behind
-                default_date = 7
-                if request.data['days'] != 0:
-                    default_date = request.data['days']
-
-                # Add all instagram ids to ES ids
-                elastic_ids = []
-                for instagram in instagram_usernames:
-                    if instagram != '':
-                        for i in xrange(0, default_date):
-                            consider_date = (
-                                datetime.date.today() -
-                                datetime.timedelta(days=i))
-                            single_date = consider_date.strftime('%Y-%m-%d')
-                            elastic_ids.append(instagram + '-' + single_date)
-
-                if len(elastic_ids) > 0:
-                    query = {
-                        'ids': elastic_ids
-                    }
-
-                    es_timeseries = es.mget(
-                        index='timeseries', doc_type='instagram', body=query)
-
-                    if 'docs' in es_timeseries:
-                        for ts in es_timeseries['docs']:
-                            if ts['found']:
-                                if '_source' in ts and 'data' in ts['_source']:
-                                    timeseries.append(ts['_source']['data'])
-
-            return BulkResponse(timeseries, {}, len(timeseries),
-                                len(timeseries))
-        raise ParseError()
+        return self.get_timeseries(request, pk, 'instagram')
 
     # POST /lists/<id>/duplicate (External)
     @detail_route(methods=['post'], url_path='duplicate',
                   permission_classes=[IsAdminOrIsSelf])
     def duplicate(self, request, pk=None):
-        user_profile = UserProfile.objects.get(user=request.user)
+        tenant = get_tenant(request)
         media_list = self.get_media_list_by_pk(request, pk)
         if 'name' in request.data:
             clients = media_list.clients
@@ -654,7 +529,7 @@ class MediaListViewSet(NewsAIModelViewSet):
             media_list.created = datetime.datetime.now()
             media_list.updated = datetime.datetime.now()
             media_list.created_by = request.user
-            media_list.team = user_profile.team
+            media_list.team = tenant.team
             media_list.save()
 
             if clients.count() > 0:
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.6 on 2017-11-10 17:45
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def empty_urls_to_null(apps, schema_editor):
+    Publication = apps.get_model('publications', 'Publication')
+    Publication.objects.filter(url='').update(url=None)
+
+
+def null_urls_to_empty(apps, schema_editor):
+    Publication = apps.get_model('publications', 'Publication')
+    Publication.objects.filter(url=None).update(url='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('publications', '0003_auto_20171030_2130'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='publication',
+            name='url',
+            field=models.URLField(blank=True, default=None, null=True, unique=True),
+        ),
+        migrations.RunPython(empty_urls_to_null, null_urls_to_empty),
+    ]
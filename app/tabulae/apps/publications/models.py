@@ -9,7 +9,8 @@ from tabulae.apps.general.models import BaseModel
 
 class Publication(BaseModel):
     name = models.TextField(blank=True, default='', unique=True)
-    url = models.URLField(blank=True, default='', unique=True)
+    # Null when unknown: an empty string would collide on the unique key
+    url = models.URLField(blank=True, null=True, default=None, unique=True)
 
     linkedin = models.TextField(blank=True, default='')
     twitter = models.TextField(blank=True, default='')
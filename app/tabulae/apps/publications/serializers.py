@@ -7,11 +7,14 @@ from rest_framework.serializers import ModelSerializer
 
 # Imports from app
 from tabulae.apps.general.response import form_response
+from tabulae.apps.general.serializers import FragmentCacheListSerializer
 from .models import Publication
 
 
 class PublicationSerializer(ModelSerializer):
 
+    fragment_type = 'publications'
+
     def to_representation(self, obj):
         has_data = False
         included = {}
@@ -25,12 +28,12 @@ class PublicationSerializer(ModelSerializer):
         publication = {
             'id': obj.pk,
             'type': 'publications',
-            'createdby': obj.created_by and obj.created_by.pk,
+            'createdby': obj.created_by_id,
             'created': obj.created,
             'updated': obj.updated,
 
             'name': obj.name,
-            'url': obj.url,
+            'url': obj.url or '',
 
             'linkedin': obj.linkedin,
             'twitter': obj.twitter,
@@ -55,6 +58,8 @@ class PublicationSerializer(ModelSerializer):
         if request and hasattr(request, 'user'):
             user = request.user
 
+        # Publications without a url store null, not a clashing ''
+        data['url'] = data.get('url') or None
         publication = Publication.objects.create(**data)
         publication.created_by = user
         publication.save()
@@ -63,23 +68,23 @@ class PublicationSerializer(ModelSerializer):
 
     def update(self, publication, validated_data):
         publication.name = validated_data.get(
-            'name', contact.name)
+            'name', publication.name)
         publication.url = validated_data.get(
-            'url', contact.url)
+            'url', publication.url) or None
 
         publication.linkedin = validated_data.get(
-            'linkedin', contact.linkedin)
+            'linkedin', publication.linkedin)
         publication.twitter = validated_data.get(
-            'twitter', contact.twitter)
+            'twitter', publication.twitter)
         publication.instagram = validated_data.get(
-            'instagram', contact.instagram)
+            'instagram', publication.instagram)
         publication.websites = validated_data.get(
-            'websites', contact.websites)
+            'websites', publication.websites)
         publication.blog = validated_data.get(
-            'blog', contact.blog)
+            'blog', publication.blog)
 
         publication.verified = validated_data.get(
-            'verified', contact.verified)
+            'verified', publication.verified)
 
         publication.save()
         return form_response(publication, {})
@@ -88,3 +93,4 @@ class PublicationSerializer(ModelSerializer):
         model = Publication
         fields = ('name', 'url', 'linkedin', 'twitter',
                           'instagram', 'websites', 'blog', 'verified')
+        list_serializer_class = FragmentCacheListSerializer
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+# Stdlib imports
+from collections import OrderedDict
+import threading
+
+# Core Django imports
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+# Imports from app
+from .models import Publication
+
+# Publication names remembered by every process
+PUBLICATION_CACHE_SIZE = 10000
+
+
+class PublicationNameCache(object):
+    '''
+        A least recently used map of normalized publication name ->
+        publication id, local to the process. Publications can be renamed
+        or deleted in another process, so callers check the ids they get
+        against the database and discard the ones that are gone.
+    '''
+
+    def __init__(self, max_size=PUBLICATION_CACHE_SIZE):
+        self.max_size = max_size
+        self._ids = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, names):
+        found = {}
+        with self._lock:
+            for name in names:
+                publication_id = self._ids.pop(name, None)
+                if publication_id is not None:
+                    self._ids[name] = publication_id
+                    found[name] = publication_id
+        return found
+
+    def set_many(self, ids):
+        with self._lock:
+            for name, publication_id in ids.items():
+                self._ids.pop(name, None)
+                self._ids[name] = publication_id
+            while len(self._ids) > self.max_size:
+                self._ids.popitem(last=False)
+
+    def discard_many(self, names):
+        with self._lock:
+            for name in names:
+                self._ids.pop(name, None)
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+
+
+publication_names = PublicationNameCache()
+
+
+def normalize_publication_name(name):
+    return u' '.join(name.split())
+
+
+def _get_publication_ids(names, ids=()):
+    return dict(Publication.objects.filter(
+        Q(name__in=names) | Q(pk__in=ids)).values_list('name', 'pk'))
+
+
+def resolve_publication_names(names, user=None):
+    '''
+        Returns {name: publication id} for a batch of names as given,
+        creating the publications that don't exist yet. Names are matched
+        with their whitespace collapsed; blank ones are left out.
+
+        Names take one lookup, which also checks the ids the process
+        cache has for them: a publication deleted or renamed since is
+        dropped from the cache instead of being linked to. The missing
+        names take a single insert, retried without the names a
+        concurrent insert got to first.
+    '''
+    normalized = dict((name, normalize_publication_name(name))
+                      for name in names if normalize_publication_name(name))
+    wanted = set(normalized.values())
+    if not wanted:
+        return {}
+
+    # Cached ids are checked in the same query as the other names
+    cached = publication_names.get_many(wanted)
+    ids = dict((name, publication_id) for name, publication_id in
+               _get_publication_ids(wanted.difference(cached),
+                                    cached.values()).items()
+               if name in wanted)
+    publication_names.discard_many([
+        name for name, publication_id in cached.items()
+        if ids.get(name) != publication_id])
+
+    missing = wanted.difference(ids)
+    while missing:
+        try:
+            with transaction.atomic():
+                ids.update((publication.name, publication.pk)
+                           for publication in
+                           Publication.objects.bulk_create([
+                               Publication(name=name, created_by=user)
+                               for name in missing]))
+            missing = set()
+        except IntegrityError:
+            # Only a name someone else created in the meantime is a
+            # race to recover from: when none of the names showed up,
+            # the conflict is on something else and is raised.
+            created = _get_publication_ids(missing)
+            if not created:
+                raise
+            ids.update(created)
+            missing.difference_update(created)
+
+    publication_names.set_many(ids)
+    return dict((name, ids[value]) for name, value in normalized.items())
+
+
+def resolve_publication_ids(publication_ids):
+    '''
+        Returns the ids of the batch that belong to a publication, in one
+        query. Ids that aren't numbers are left out.
+    '''
+    valid = set()
+    for publication_id in publication_ids:
+        try:
+            valid.add(int(publication_id))
+        except (TypeError, ValueError):
+            continue
+
+    if not valid:
+        return []
+    return list(Publication.objects.filter(pk__in=valid).values_list(
+        'pk', flat=True))
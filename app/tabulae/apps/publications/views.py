@@ -16,7 +16,7 @@ from rest_framework.exceptions import NotAuthenticated
 
 # Imports from app
 from tabulae.apps.general.viewset import NewsAIModelViewSet
-from tabulae.apps.general.response import Response, BulkResponse
+from tabulae.apps.general.response import Response, StreamingBulkResponse
 from tabulae.apps.general.permissions import IsAdminOrIsSelf
 from .models import Publication
 from .serializers import PublicationSerializer
@@ -57,9 +57,9 @@ class PublicationViewSet(NewsAIModelViewSet):
             serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
 
-        serializer = self.get_serializer(queryset, many=True)
-        return BulkResponse(serializer.data, {},
-                            len(serializer.data), len(serializer.data))
+        return StreamingBulkResponse(
+            queryset, self.get_serializer_class(),
+            self.get_serializer_context())
 
     def get_queryset(self,):
         if self.request.user and self.request.user.is_authenticated():
@@ -87,7 +87,7 @@ class PublicationViewSet(NewsAIModelViewSet):
     def database_profile(self, request, pk=None):
         database_profile = {}
         publication = self.get_publication_by_pk(request, pk)
-        if publication.url != '':
+        if publication.url:
             publication_enhance_url = urlparse(publication.url)
             publication_enhance_url = publication_enhance_url.netloc
             r = requests.get(
@@ -8,7 +8,7 @@ from rest_framework.serializers import ModelSerializer
 # Imports from app
 from tabulae.apps.general.response import form_response
 from tabulae.apps.general.serializers import DynamicFieldsModelSerializer
-from tabulae.apps.users.models import UserProfile
+from tabulae.apps.users.utils import get_tenant
 from .models import Template
 
 
@@ -53,8 +53,7 @@ class TemplateSerializer(ModelSerializer):
         if request and hasattr(request, 'user'):
             user = request.user
 
-        user_profile = UserProfile.objects.get(user=user)
-        template.team = user_profile.team
+        template.team = get_tenant(request).team
 
         template.created_by = user
         template.save()
@@ -11,7 +11,7 @@ from rest_framework.exceptions import NotAuthenticated, ParseError
 
 # Imports from app
 from tabulae.apps.general.viewset import NewsAIModelViewSet
-from tabulae.apps.general.response import Response, BulkResponse
+from tabulae.apps.general.response import Response, StreamingBulkResponse
 from .models import Template
 from .serializers import TemplateSerializer
 from .permissions import TemplatePermission
@@ -44,9 +44,9 @@ class TemplateViewSet(NewsAIModelViewSet):
             serializer = self.get_serializer(page, many=True)
             return self.get_paginated_response(serializer.data)
 
-        serializer = self.get_serializer(queryset, many=True)
-        return BulkResponse(serializer.data, {},
-                            len(serializer.data), len(serializer.data))
+        return StreamingBulkResponse(
+            queryset, self.get_serializer_class(),
+            self.get_serializer_context())
 
     def get_queryset(self,):
         if self.request.user and self.request.user.is_authenticated():
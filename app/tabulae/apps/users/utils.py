@@ -8,6 +8,61 @@ from django.contrib.auth.backends import ModelBackend
 from .models import Agency, UserProfile, Team
 
 
+class TenantContext(object):
+    '''
+        Resolves the UserProfile (and through it the Team) for the
+        user behind a request or task once, and keeps it around for
+        every later lookup in that same request or task.
+    '''
+
+    def __init__(self, request=None, user=None):
+        self.request = request
+        self._user = user
+        self._user_profiles = {}
+
+    @property
+    def user(self):
+        if self._user is not None:
+            return self._user
+        return self.request and self.request.user
+
+    @property
+    def user_profile(self):
+        return self.profile_for(self.user)
+
+    @property
+    def team(self):
+        return self.user_profile.team
+
+    @property
+    def team_id(self):
+        return self.user_profile.team_id
+
+    def profile_for(self, user):
+        if user.pk not in self._user_profiles:
+            self._user_profiles[user.pk] = UserProfile.objects.select_related(
+                'team').get(user=user)
+        return self._user_profiles[user.pk]
+
+
+def get_tenant(request):
+    '''
+        Returns the TenantContext attached to the request by the
+        `tenant_context` middleware, attaching a new one if the request
+        did not go through it (tests, the shell, internal calls).
+    '''
+    http_request = getattr(request, '_request', request)
+    tenant = getattr(http_request, 'tenant', None)
+    if tenant is None:
+        tenant = TenantContext(request=http_request)
+        http_request.tenant = tenant
+    return tenant
+
+
+def get_user_profile(request):
+    return get_tenant(request).user_profile
+
+
 class EmailBackend(ModelBackend):
 
     def authenticate(self, username=None, password=None, **kwargs):
@@ -24,9 +24,9 @@ from rest_framework.exceptions import (
 
 # Imports from app
 from tabulae.apps.general.viewset import NewsAIModelViewSet
-from tabulae.apps.general.response import Response, BulkResponse
+from tabulae.apps.general.response import (
+	Response, BulkResponse, get_etag, not_modified, with_etag)
 from .models import (
-	UserProfile,
 	Billing,
 	Agency,
 	Client,
@@ -44,6 +44,7 @@ from .serializers import (
 	UserLiveTokenSerializer,
 )
 
+from .utils import get_tenant
 from .permissions import (
 	IsAdminOrIsSelf,
 	UserPermission,
@@ -145,9 +146,9 @@ class UserViewSet(NewsAIModelViewSet):
 			else:
 				UserModel = get_user_model()
 				user = UserModel.objects.get(pk=pk)
-				requested_user_profile = UserProfile.objects.get(user=user)
+				requested_user_profile = get_tenant(request).profile_for(user)
 
-				loggedin_user_profile = UserProfile.objects.get(user=request.user)
+				loggedin_user_profile = get_tenant(request).user_profile
 
 				if loggedin_user_profile.team != requested_user_profile.team:
 					raise PermissionDenied()
@@ -208,10 +209,27 @@ class UserViewSet(NewsAIModelViewSet):
 	def me(self, request):
 		if request.user and request.user.is_authenticated():
 			if request.method == 'GET':
-				serializer = UserSerializer(self.request.user)
-				return Response(serializer.data, {})
+				# Everything /users/me returns comes from the user and
+				# their profile, which the tenant has already loaded.
+				# Changing the profile's employers (an M2M) or team
+				# doesn't touch its `updated`, so they're part of the
+				# validator themselves.
+				user = request.user
+				user_profile = get_tenant(request).user_profile
+				employer_ids = sorted(user_profile.employers.values_list(
+					'pk', flat=True))
+				etag = get_etag(user.pk, user.email, user.first_name,
+								user.last_name, user.is_active, user.is_staff,
+								user_profile.updated, user_profile.team_id,
+								employer_ids)
+				response = not_modified(request, etag)
+				if response is not None:
+					return response
+
+				serializer = UserSerializer(user)
+				return with_etag(Response(serializer.data, {}), etag)
 			elif request.method == 'PATCH':
-				user_profile = UserProfile.objects.get(user=request.user)
+				user_profile = get_tenant(request).user_profile
 				if ('emailsignatures' in request.data):
 					user_profile.email_signatures = request.data['emailsignatures']
 				if ('emailsignature' in request.data):
@@ -227,7 +245,7 @@ class UserViewSet(NewsAIModelViewSet):
 				  permission_classes=[IsAdminOrIsSelf])
 	def live_token(self, request, pk=None):
 		user = self.get_user_by_pk(request, pk)
-		user_profile = UserProfile.objects.get(user=user)
+		user_profile = get_tenant(request).profile_for(user)
 
 		serializer = UserLiveTokenSerializer(user_profile)
 		return Response(serializer.data, {})
@@ -237,7 +255,7 @@ class UserViewSet(NewsAIModelViewSet):
 				  permission_classes=[IsAdminOrIsSelf])
 	def confirm_email(self, request, pk=None):
 		user = self.get_user_by_pk(request, pk)
-		user_profile = UserProfile.objects.get(user=user)
+		user_profile = get_tenant(request).profile_for(user)
 		code = request.query_params.get('code')
 		if code:
 			email_code = EmailCode.objects.get(invite_code=code)
@@ -265,7 +283,7 @@ class UserViewSet(NewsAIModelViewSet):
 				  permission_classes=[IsAdminOrIsSelf])
 	def plan_details(self, request, pk=None):
 		user = self.get_user_by_pk(request, pk)
-		user_profile = UserProfile.objects.get(user=user)
+		user_profile = get_tenant(request).profile_for(user)
 
 		return Response({
 			'planname': 'Growing Business',
@@ -281,7 +299,7 @@ class UserViewSet(NewsAIModelViewSet):
 	def remove_integration(self, request, pk=None):
 		if self.request.user and self.request.user.is_authenticated():
 			user = self.get_user_by_pk(request, pk)
-			user_profile = UserProfile.objects.get(user=user)
+			user_profile = get_tenant(request).profile_for(user)
 
 			user_profile.gmail = False
 			user_profile.outlook = False
@@ -304,7 +322,7 @@ class UserViewSet(NewsAIModelViewSet):
 				  permission_classes=[IsAdminOrIsSelf])
 	def feedback(self, request, pk=None):
 		user = self.get_user_by_pk(request, pk)
-		user_profile = UserProfile.objects.get(user=user)
+		user_profile = get_tenant(request).profile_for(user)
 
 		if 'reason' in request.data and 'feedback' in request.data:
 			user_profile.trial_expire_reason = request.data['reason']
@@ -320,7 +338,7 @@ class UserViewSet(NewsAIModelViewSet):
 				  permission_classes=[IsAdminOrIsSelf])
 	def add_email(self, request, pk=None):
 		user = self.get_user_by_pk(request, pk)
-		user_profile = UserProfile.objects.get(user=user)
+		user_profile = get_tenant(request).profile_for(user)
 
 		if 'email' in request.data:
 			email = request.data['email']
@@ -369,7 +387,7 @@ class UserViewSet(NewsAIModelViewSet):
 				  permission_classes=[IsAdminOrIsSelf])
 	def remove_email(self, request, pk=None):
 		user = self.get_user_by_pk(request, pk)
-		user_profile = UserProfile.objects.get(user=user)
+		user_profile = get_tenant(request).profile_for(user)
 
 		if 'email' in request.data:
 			if request.data['email'] in user_profile.sendgrid_emails:
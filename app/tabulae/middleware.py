@@ -1,5 +1,17 @@
 # -*- coding: utf-8 -*-
+# Imports from app
+from tabulae.apps.users.utils import TenantContext
+
+
 class disable_csrf(object):
 
 	def process_request(self, request):
 		setattr(request, '_dont_enforce_csrf_checks', True)
+
+
+class tenant_context(object):
+
+	def process_request(self, request):
+		# The profile is only looked up the first time a view asks
+		# for it, after DRF has authenticated the request.
+		request.tenant = TenantContext(request=request)
@@ -5,6 +5,7 @@ import os
 from logging.handlers import SysLogHandler
 
 # Third-party app imports
+from celery.schedules import crontab
 from kombu import Queue
 
 # Imports from app
@@ -104,6 +105,7 @@ MIDDLEWARE_CLASSES = (
     'django.middleware.security.SecurityMiddleware',
     'debug_toolbar.middleware.DebugToolbarMiddleware',
     'tabulae.middleware.disable_csrf',
+    'tabulae.middleware.tenant_context',
 )
 
 ROOT_URLCONF = 'tabulae.urls'
@@ -182,6 +184,20 @@ CELERY_QUEUES = (
     Queue('emails'),
 )
 
+# Run by the `celery beat` program (tabulae-celerybeat in supervisord.conf);
+# a worker alone never queues these. Nothing fills the social rollups or
+# ContactSocialFields otherwise.
+CELERYBEAT_SCHEDULE = {
+    'refresh-social-rollups': {
+        'task': 'tabulae.apps.contacts.tasks.refresh_social_rollups',
+        'schedule': 60 * 60,
+    },
+    'refresh-listed-social-fields': {
+        'task': 'tabulae.apps.contacts.tasks.refresh_listed_social_fields',
+        'schedule': crontab(hour=4, minute=0),
+    },
+}
+
 # Cache
 CACHALOT_ENABLED = True
 
@@ -16,6 +16,7 @@ from django.contrib import admin
 
 # Imports from app
 from tabulae.apps.api_router_v1 import router
+from tabulae.apps.general.batch import BatchView
 from tabulae.apps.integrations.gmail import GmailLoginView, GmailCompleteView
 from tabulae.apps.integrations.outlook import (
     OutlookLoginView,
@@ -41,6 +42,7 @@ urlpatterns = [
     url(r'^docs/$', schema_view),
 
     # API & JSON Web Tokens
+    url(r'^api/v1/batch/?$', BatchView.as_view(), name='v1-batch'),
     url(r'^api/v1/', include(router.urls, namespace='v1')),
 
     # Payments